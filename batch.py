@@ -0,0 +1,247 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from whatsapp_parser.whats_app_parser import WhatsAppParser
+from whatsapp_parser import report
+import pandas as pd
+import argparse
+import time
+import glob
+import os
+
+# Extensions of the exports, a chat alone or a chat with its media
+EXPORT_EXTENSIONS = ('.txt', '.zip')
+
+# Graph methods of WhatsAppParser saved for each chat, and whether they take a language
+GRAPHS = [
+    ('generate_graph_number_of_messages_per_day', True),
+    ('generate_graph_number_of_types_of_messages', True),
+    ('generate_graph_number_of_types_of_messages_per_user', True),
+    ('generate_graph_number_of_messages_per_hour', True),
+    ('generate_word_cloud', False),
+    ('generate_number_of_messages_per_user', True),
+    ('generate_activity_heatmap', True),
+    ('generate_first_last_message', True),
+]
+
+# Times a file is tried again after the process parsing it died, e.g. out of memory
+PROCESS_RETRIES = 1
+
+
+def find_exports(sources: list) -> list:
+    """
+    Lists the exports of directories and glob patterns.
+
+    Parameters:
+    - sources (list): Directories, whose .txt and .zip files are listed, or glob patterns ('**' matches any
+      number of folders).
+
+    Returns:
+    - list: The paths of the .txt and .zip files found, sorted and without repetitions.
+    """
+
+    paths = set()
+    for source in sources:
+        pattern = os.path.join(source, '*') if os.path.isdir(source) else source
+        paths.update(path for path in glob.glob(pattern, recursive=True)
+                     if os.path.isfile(path) and path.lower().endswith(EXPORT_EXTENSIONS))
+
+    return sorted(paths)
+
+
+def output_folders(paths: list) -> list:
+    """
+    Names the folder of the outputs of each export after its path, relative to the folder all the exports are in,
+    so that e.g. the .txt and .zip exports of a chat, or the exports of a chat made on different days, don't share it.
+
+    Parameters:
+    - paths (list): Paths of the .txt and .zip exports.
+
+    Returns:
+    - list: The name of the folder of each export, in the order of paths.
+    """
+
+    if not paths: return []
+
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+
+    return [os.path.relpath(os.path.abspath(path), root).replace(os.sep, '_').replace('.', '_') for path in paths]
+
+
+def process_export(path: str, output: str, language: str, single_report: bool = False, folder_name: str = None) -> dict:
+    """
+    Parses an export and saves every graph of the chat and its Excel workbook to a folder of its own in output.
+
+    A graph that can't be built, e.g. the word cloud of a chat without text messages, is reported without
+    stopping the others, and a file that can't be parsed is reported as failed.
+
+    Parameters:
+    - path (str): Path of the .txt or .zip export.
+    - output (str): Folder where the folder of the chat is created.
+    - language (str): Language of the graphs.
+    - single_report (bool, optional): If True, the graphs are saved to a single HTML report that references the
+      plotly.js bundle of output (see report.write_plotlyjs), instead of to a file each.
+    - folder_name (str, optional): Name of the folder of the chat in output. If not provided, uses the name of the
+      file (see output_folders).
+
+    Returns:
+    - dict: The 'file', its 'status' ('ok', 'partial' or 'failed'), its number of 'messages' and 'megabytes',
+      the 'parse_seconds', 'outputs_seconds' and total 'seconds' it took, and the 'error' of each output that failed.
+    """
+
+    result = {'file': path, 'status': 'failed', 'messages': 0, 'megabytes': os.path.getsize(path) / 2 ** 20,
+              'parse_seconds': None, 'outputs_seconds': None, 'seconds': None, 'error': None}
+    start = time.perf_counter()
+
+    try:
+        chat = WhatsAppParser(path)
+    except Exception as error:
+        result.update(seconds=time.perf_counter() - start, error=f"{type(error).__name__}: {error}")
+        return result
+
+    parsed = time.perf_counter()
+    result.update(messages=len(chat.chat_dataframe), parse_seconds=parsed - start)
+
+    # The outputs are saved in the folder of the chat
+    folder = os.path.join(output, folder_name or output_folders([path])[0])
+    if not os.path.exists(folder): os.makedirs(folder)
+
+    if single_report:
+        plotlyjs = os.path.relpath(os.path.join(output, report.PLOTLYJS_FILE), folder).replace(os.sep, '/')
+        calls = [('save_report', {'path': folder, 'language': language, 'include_plotlyjs': plotlyjs})]
+    else:
+        calls = [(method, {'save_as_file': True, 'path': folder, **({'language': language} if takes_language else {})})
+                 for method, takes_language in GRAPHS]
+    calls.append(('save_chat_to_excel_file', {'path': folder}))
+    errors = []
+
+    for method, arguments in calls:
+        try:
+            getattr(chat, method)(**arguments)
+        except Exception as error:
+            errors.append(f"{method}: {type(error).__name__}: {error}")
+
+    end = time.perf_counter()
+    result.update(status='partial' if errors else 'ok', outputs_seconds=end - parsed, seconds=end - start,
+                  error='; '.join(errors) or None)
+
+    return result
+
+
+def run_batch(paths: list,
+              output: str,
+              workers: int = None,
+              language: str = 'English 🇺🇸',
+              max_pending: int = None,
+              single_report: bool = False
+              ) -> pd.DataFrame:
+    """
+    Processes exports in a pool of processes (see process_export).
+
+    At most max_pending files are handed to the pool at once, so that listing thousands of exports doesn't queue
+    them all up front. If a process dies while parsing a file, e.g. out of memory, the pool is started again and the
+    files that were in it are tried PROCESS_RETRIES more times, one at a time, before they are reported as failed.
+
+    Parameters:
+    - paths (list): Paths of the .txt and .zip exports.
+    - output (str): Folder where the folder of each chat is created (see output_folders).
+    - workers (int, optional): Number of processes. If not provided, uses the number of CPUs.
+    - language (str, optional): Language of the graphs.
+    - max_pending (int, optional): Maximum number of files handed to the pool at once. If not provided, uses twice
+      the number of processes.
+    - single_report (bool, optional): If True, saves a single HTML report per chat, all of them sharing one
+      plotly.js bundle written to output, instead of a file per graph.
+
+    Returns:
+    - pd.DataFrame: The result of each file, in the order of paths, with its 'messages_per_second' and
+      'megabytes_per_second'.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    if single_report: report.write_plotlyjs(output)
+
+    folders = output_folders(paths)
+    queue = [(position, path, 0) for position, path in enumerate(paths)][::-1]
+    results, pending = {}, {}
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        while queue or pending:
+            while queue and len(pending) < max_pending:
+                # The files of a pool that broke are tried again one at a time, so that only the one that breaks it fails
+                if queue[-1][2] and pending: break
+                position, path, attempt = queue.pop()
+                pending[pool.submit(process_export, path, output, language, single_report, folders[position])] = (position, path, attempt)
+                if attempt: break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = False
+
+            for future in done:
+                position, path, attempt = pending.pop(future)
+                try:
+                    results[position] = future.result()
+                except BrokenProcessPool as error:
+                    broken = True
+                    if attempt < PROCESS_RETRIES: queue.append((position, path, attempt + 1))
+                    else: results[position] = {'file': path, 'status': 'failed', 'error': f"BrokenProcessPool: {error}"}
+                except Exception as error:
+                    results[position] = {'file': path, 'status': 'failed', 'error': f"{type(error).__name__}: {error}"}
+
+            # Every file still in a broken pool fails with it, so start them again in a new one
+            if broken:
+                for future, (position, path, attempt) in pending.items(): queue.append((position, path, attempt + 1))
+                pending.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    columns = ['file', 'status', 'messages', 'megabytes', 'parse_seconds', 'outputs_seconds', 'seconds', 'error']
+    summary = pd.DataFrame([results[position] for position in range(len(paths))], columns=columns)
+    summary['messages_per_second'] = summary['messages'] / summary['seconds']
+    summary['megabytes_per_second'] = summary['megabytes'] / summary['seconds']
+
+    return summary
+
+
+def main(arguments: list = None) -> int:
+    """
+    Runs the batch from the command line, e.g. python batch.py "exports/**/*.zip" --output reports --workers 4
+
+    Returns:
+    - int: The exit code, 1 if any file failed.
+    """
+
+    parser = argparse.ArgumentParser(description='Saves the graphs and the Excel workbook of many WhatsApp exports at once.')
+    parser.add_argument('sources', nargs='+', help='Directories or glob patterns of .txt and .zip exports.')
+    parser.add_argument('--output', default='batch_output', help='Folder where the folder of each chat is created.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes (default: number of CPUs).')
+    parser.add_argument('--max-pending', type=int, default=None, help='Files handed to the processes at once (default: twice the workers).')
+    parser.add_argument('--language', default='English 🇺🇸', choices=['English 🇺🇸', 'Português 🇧🇷'], help='Language of the graphs.')
+    parser.add_argument('--single-report', action='store_true',
+                        help='Save the graphs of each chat to a single HTML report, sharing one plotly.js bundle, instead of a file per graph.')
+    arguments = parser.parse_args(arguments)
+
+    paths = find_exports(arguments.sources)
+    if not os.path.exists(arguments.output): os.makedirs(arguments.output)
+
+    start = time.perf_counter()
+    summary = run_batch(paths, arguments.output, arguments.workers, arguments.language, arguments.max_pending, arguments.single_report)
+    seconds = time.perf_counter() - start
+
+    summary_file = os.path.join(arguments.output, 'summary.csv')
+    summary.to_csv(summary_file, index=False)
+
+    print(summary[['file', 'status', 'messages', 'seconds', 'messages_per_second']].to_string(index=False, float_format='{:.2f}'.format))
+    print(f"\n{len(summary)} files ({(summary['status'] == 'ok').sum()} ok, {(summary['status'] == 'partial').sum()} partial, "
+          f"{(summary['status'] == 'failed').sum()} failed), {int(summary['messages'].sum())} messages, "
+          f"{summary['megabytes'].sum():.1f} MB in {seconds:.1f} s "
+          f"({summary['messages'].sum() / seconds:.0f} messages/s, {summary['megabytes'].sum() / seconds:.2f} MB/s). "
+          f"Summary saved to {summary_file}")
+
+    return int((summary['status'] == 'failed').any())
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,10 +1,40 @@
 from whatsapp_parser.whats_app_parser import WhatsAppParser
+from whatsapp_parser.dashboard import Dashboard
+from concurrent.futures import as_completed
+from whatsapp_parser import export
 from utils import Utils
-from io import BytesIO
-import matplotlib.pyplot as plt
+import plotly.graph_objs as go
 import streamlit as st
-import tempfile
-import os
+import hashlib
+
+# Parsed chats kept for all the sessions of the app, and for how long (seconds) after their last use
+CHAT_CACHE_ENTRIES = 8
+CHAT_CACHE_TTL = 3600
+
+
+@st.cache_resource(max_entries=CHAT_CACHE_ENTRIES, ttl=CHAT_CACHE_TTL, show_spinner=False)
+def load_chat(digest: str, _uploaded_file) -> WhatsAppParser:
+    """
+    Parses an uploaded chat once for all the reruns and sessions that upload the same bytes, keyed by their sha256
+    (the file itself is not hashed by Streamlit). The parsed chat is shared, so its graphs are cached across reruns.
+    """
+    _uploaded_file.seek(0)
+    return WhatsAppParser(_uploaded_file)
+
+
+def get_chat(uploaded_file) -> WhatsAppParser:
+    """
+    Returns the parsed chat of the upload of this session, which the session keeps even if it leaves the shared
+    cache, until another file is uploaded, along with the dashboard that builds its graphs for the session.
+    """
+    digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    if st.session_state.get('chat_digest') != digest:
+        if 'dashboard' in st.session_state: st.session_state['dashboard'].shutdown()
+        st.session_state['chat'] = load_chat(digest, uploaded_file)
+        st.session_state['dashboard'] = Dashboard(st.session_state['chat'])
+        st.session_state['chat_digest'] = digest
+    return st.session_state['chat']
+
 
 try:
     st.set_page_config(
@@ -13,11 +43,9 @@ try:
         layout="wide",
     )
 
-    st.set_option('deprecation.showPyplotGlobalUse', False)
-
     language = st.sidebar.selectbox('Language', ('Português 🇧🇷', 'English 🇺🇸'))
     texts = Utils.read_language_files(language)
-    uploaded_file = st.sidebar.file_uploader(texts['select_file'], type=["txt"])
+    uploaded_file = st.sidebar.file_uploader(texts['select_file'], type=["txt", "zip"])
     st.sidebar.markdown(texts['warning'])
 
     # Garanta que a chave seja gerada e armazenada
@@ -29,16 +57,8 @@ try:
         st.info(texts['info'])
 
     if uploaded_file is not None:
-        # Save the content of the uploaded file to a temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
-        temp_file.write(uploaded_file.read())
-        temp_file_path = temp_file.name
-        temp_file.close()
-
-        chat = WhatsAppParser(temp_file_path)
-
-        # Clean up the temporary file
-        os.remove(temp_file_path)
+        # The uploaded .txt or .zip file is parsed straight from memory, once per distinct upload
+        chat = get_chat(uploaded_file)
 
         # File was uploaded
         if chat:
@@ -57,54 +77,63 @@ try:
             end_date = col2.date_input(texts['end_date'], chat.chat_dataframe['date'].max(), max_value=chat.chat_dataframe['date'].max(),
                                        min_value=chat.chat_dataframe['date'].min()).strftime('%Y-%m-%d')
 
+            # Button to reset dates in the third column
+            if col1.button(texts['reset_date']):
+                start_date = chat.chat_dataframe['date'].min().strftime('%Y-%m-%d')
+                end_date = chat.chat_dataframe['date'].max().strftime('%Y-%m-%d')
+
+            # Start building the graphs of the date range in the background, cancelling the ones of the previous range
+            if start_date <= end_date:
+                dates = {'start_date': start_date, 'end_date': end_date}
+                graphs = {
+                    'wordcloud': ('generate_word_cloud', {**dates, 'preview': True}),
+                    'heatmap': ('generate_activity_heatmap', {**dates, 'language': language}),
+                    'per_hour': ('generate_graph_number_of_messages_per_hour', {**dates, 'language': language}),
+                    'per_day': ('generate_graph_number_of_messages_per_day', {**dates, 'language': language,
+                                                                              'fill_missing': st.session_state.get('fill_missing', False)}),
+                    'per_user': ('generate_number_of_messages_per_user', {**dates, 'language': language}),
+                }
+                if chat.chat_downloaded_from_apple_device:
+                    graphs['types_per_user'] = ('generate_graph_number_of_types_of_messages_per_user', {**dates, 'language': language})
+                    graphs['types'] = ('generate_graph_number_of_types_of_messages', {**dates, 'language': language})
+                jobs = st.session_state['dashboard'].submit(graphs)
+
             # Displaying dataframe
             df_display = chat.display_dataframe(start_date=start_date,
                                                 end_date=end_date,
                                                 language=language)
             st.dataframe(df_display.set_index(texts['dataframe_columns']['timestamp']), height=200)
 
-            # Button to reset dates in the third column
-            if col1.button(texts['reset_date']):
-                start_date = chat.chat_dataframe['date'].min().strftime('%Y-%m-%d')
-                end_date = chat.chat_dataframe['date'].max().strftime('%Y-%m-%d')
-
             if start_date > end_date: st.warning(texts['date_conflict'], icon="⚠️")
             else:
+                # Places of the graphs on the page, filled in as they are built
                 st.markdown(f"#### {texts['Wordcloud']}")
-                plt.imshow(chat.generate_word_cloud(), interpolation='bilinear')
-                plt.axis("off")
-                plt.show()
-                st.pyplot()
-
-                # Activity Heatmap
-                fig6 = chat.generate_activity_heatmap(start_date=start_date, end_date=end_date, language=language).update_layout(height=400, width=1000)
-                st.plotly_chart(fig6, theme="streamlit")
-
-                # Number of messages per hour
-                fig4 = chat.generate_graph_number_of_messages_per_hour(start_date=start_date, end_date=end_date, language=language)
-                st.plotly_chart(fig4, theme="streamlit", use_container_width=True)
+                places = {'wordcloud': st.empty(), 'heatmap': st.empty(), 'per_hour': st.empty()}
 
                 # Number of messages per day
-                fill_missing = st.checkbox(
+                st.checkbox(
                     value=False,
                     label=texts['Graph_1']['button']["label"],
-                    help=texts['Graph_1']['button']["help"])
-                fig1 = chat.generate_graph_number_of_messages_per_day(start_date=start_date, end_date=end_date, language=language, fill_missing=fill_missing).update_layout(width=1000)
-                st.plotly_chart(fig1, theme="streamlit")
-
-                # Number from type of messages per user
-                if chat.chat_downloaded_from_apple_device:
-                    fig3 = chat.generate_graph_number_of_types_of_messages_per_user(start_date=start_date, end_date=end_date, language=language)
-                    st.plotly_chart(fig3, theme="streamlit", use_container_width=True)
-
-                # Number of messages per user
-                fig5 = chat.generate_number_of_messages_per_user(start_date=start_date, end_date=end_date, language=language)
-                st.plotly_chart(fig5, theme="streamlit", use_container_width=True)
-
-                # Number from type of messages
-                if chat.chat_downloaded_from_apple_device:
-                    fig2 = chat.generate_graph_number_of_types_of_messages(start_date=start_date, end_date=end_date, language=language)
-                    st.plotly_chart(fig2, theme="streamlit", use_container_width=True)
+                    help=texts['Graph_1']['button']["help"],
+                    key='fill_missing')
+                places['per_day'] = st.empty()
+
+                # Number from type of messages per user, number of messages per user and number from type of messages
+                places.update({'types_per_user': st.empty(), 'per_user': st.empty(), 'types': st.empty()})
+
+                names = {job: name for name, job in jobs.items()}
+                for job in as_completed(names):
+                    name = names[job]
+                    if job.exception() is not None:
+                        places[name].error(f"An error occurred: {job.exception()}")
+                        continue
+
+                    # The graphs come from the figure cache of the chat, shared by every session: copy them before resizing
+                    graph = job.result()
+                    if name == 'wordcloud': places[name].image(graph.to_array(), use_column_width=True)
+                    elif name == 'heatmap': places[name].plotly_chart(go.Figure(graph).update_layout(height=400, width=1000), theme="streamlit")
+                    elif name == 'per_day': places[name].plotly_chart(go.Figure(graph).update_layout(width=1000), theme="streamlit")
+                    else: places[name].plotly_chart(graph, theme="streamlit", use_container_width=True)
 
                 # Search word per person
                 st.write(texts['count_word_occurrences_by_person']['title'])
@@ -116,16 +145,17 @@ try:
                                       color=chat.hex['main_wpp_7'])
                 st.write(styler.to_html(), unsafe_allow_html=True)
 
-                # Structure for excel download
-                excel_buffer = BytesIO()
-                chat.chat_dataframe.to_excel(excel_buffer, index=False, engine='xlsxwriter')
-                excel_buffer.seek(0)
-                st.sidebar.download_button(
-                    label=texts['Download_excel_button'],
-                    data=excel_buffer.read(),
-                    file_name='chat_analysis.xlsx',
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
+                # Download of the messages of the date range, only written once asked for and then kept in the export cache
+                export_format = st.sidebar.selectbox(texts['Export']['format'], list(export.FORMATS))
+                export_key = (st.session_state['chat_digest'], export_format, start_date, end_date)
+                if st.sidebar.button(texts['Export']['prepare']): st.session_state['export_key'] = export_key
+                if st.session_state.get('export_key') == export_key:
+                    st.sidebar.download_button(
+                        label=texts['Export']['download'],
+                        data=chat.export(export_format, start_date=start_date, end_date=end_date),
+                        file_name=f'chat_analysis.{export_format}',
+                        mime=export.FORMATS[export_format]
+                    )
 
 except Exception as e:
     st.error(f"An error occurred: {e}")
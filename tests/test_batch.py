@@ -0,0 +1,73 @@
+from whatsapp_parser import report
+import pandas as pd
+import zipfile
+import batch
+import os
+import pytest
+
+CHAT = """[01/03/2023, 10:00:00] Ana: Bom dia
+[01/03/2023, 22:00:00] Bruno: Boa noite
+[13/03/2023, 09:00:00] Ana: image omitted
+[13/03/2023, 23:00:00] Bruno: Bom dia
+"""
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """
+    A chat exported as .txt and as .zip to a folder, and a file that isn't a chat to another.
+    """
+
+    for folder in ('first', 'second'): (tmp_path / 'exports' / folder).mkdir(parents=True)
+    (tmp_path / 'exports' / 'first' / 'chat.txt').write_text(CHAT, encoding='utf-8')
+    with zipfile.ZipFile(tmp_path / 'exports' / 'first' / 'chat.zip', 'w') as archive: archive.writestr('_chat.txt', CHAT)
+    (tmp_path / 'exports' / 'second' / 'chat.txt').write_text('Not a chat', encoding='utf-8')
+    (tmp_path / 'exports' / 'second' / 'notes.md').write_text(CHAT, encoding='utf-8')
+
+    return tmp_path / 'exports'
+
+
+def test_find_exports(exports):
+    found = [os.path.relpath(path, exports) for path in batch.find_exports([str(exports / 'first'), str(exports / '**' / '*.txt')])]
+
+    assert found == [os.path.join('first', 'chat.txt'), os.path.join('first', 'chat.zip'), os.path.join('second', 'chat.txt')]
+
+
+def test_output_folders(exports):
+    paths = batch.find_exports([str(exports / '**' / '*')])
+
+    # Every export gets a folder of its own, even the .txt and .zip exports of a chat
+    assert batch.output_folders(paths) == ['first_chat_txt', 'first_chat_zip', 'second_chat_txt']
+    assert batch.output_folders([]) == []
+
+
+@pytest.mark.parametrize('single_report', [False, True])
+def test_run_batch(exports, tmp_path, single_report):
+    paths = batch.find_exports([str(exports / '**' / '*')])
+    output = str(tmp_path / 'output')
+
+    summary = batch.run_batch(paths, output, workers=2, single_report=single_report)
+
+    assert summary['file'].tolist() == paths
+    assert summary['status'].tolist() == ['ok', 'ok', 'failed']
+    assert summary['messages'].tolist() == [4, 4, 0]
+    assert summary['error'][:2].isna().all()
+
+    for folder in ('first_chat_txt', 'first_chat_zip'):
+        files = os.listdir(os.path.join(output, folder))
+        assert sum(file.endswith('.xlsx') for file in files) == 1
+        assert sum(file.endswith('.html') for file in files) == (1 if single_report else len(batch.GRAPHS) - 1)
+
+    # The reports share a single plotly.js bundle
+    assert os.path.exists(os.path.join(output, report.PLOTLYJS_FILE)) == single_report
+
+
+def test_main(exports, tmp_path, capsys):
+    output = tmp_path / 'output'
+
+    # A file failed
+    assert batch.main([str(exports / '**' / '*.txt'), '--output', str(output), '--workers', '1']) == 1
+    assert pd.read_csv(output / 'summary.csv')['status'].tolist() == ['ok', 'failed']
+    assert '2 files (1 ok, 0 partial, 1 failed)' in capsys.readouterr().out
+
+    assert batch.main([str(exports / 'first'), '--output', str(output), '--workers', '1']) == 0
@@ -0,0 +1,64 @@
+from whatsapp_parser.whats_app_parser import WhatsAppParser
+from whatsapp_parser.chat_cache import ChatCache
+import pandas as pd
+import os
+import pytest
+
+CHAT = """[01/03/2023, 10:00:00] Ana: Bom dia
+[01/03/2023, 22:00:00] Bruno: Boa noite
+[13/03/2023, 09:00:00] Ana: image omitted
+[13/03/2023, 23:00:00] Bruno: Bom dia
+"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ChatCache(str(tmp_path / 'cache'))
+
+
+def test_store_and_load(cache):
+    chat_dataframe = pd.DataFrame({'who_sended': ['Ana', 'Bruno'], 'message': ['oi', 'ola']}, index=[3, 7])
+    cache.store('key', chat_dataframe, {'users': ['Ana', 'Bruno']})
+
+    loaded, metadata = cache.load('key')
+
+    pd.testing.assert_frame_equal(loaded, chat_dataframe)
+    assert metadata == {'users': ['Ana', 'Bruno']}
+    assert cache.load('other key') is None
+
+
+def test_evict_the_least_recently_used(cache):
+    chat_dataframe = pd.DataFrame({'message': ['oi'] * 100})
+    for key in ('first', 'second'): cache.store(key, chat_dataframe, {})
+    os.utime(cache._path('first'), (0, 0))
+
+    # Only one of them fits
+    cache.max_bytes = os.path.getsize(cache._path('second'))
+    cache.store('third', chat_dataframe, {})
+
+    assert [cache.load(key) is None for key in ('first', 'second', 'third')] == [True, True, False]
+
+    cache.clear()
+    assert cache.load('third') is None
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_parse_from_the_cache(cache, compact, monkeypatch):
+    chat = WhatsAppParser(CHAT.encode(), cache=cache, compact=compact)
+
+    # The same export is loaded from the cache instead of being parsed
+    monkeypatch.setattr(WhatsAppParser, '_parse_chat', None)
+    cached = WhatsAppParser(CHAT.encode(), cache=cache, compact=compact)
+
+    pd.testing.assert_frame_equal(cached.chat_dataframe, chat.chat_dataframe)
+    for attribute in ('users', 'group_chat', 'chat_downloaded_from_apple_device', 'excel_file_name', 'parse_state'):
+        assert getattr(cached, attribute) == getattr(chat, attribute)
+    assert cached.message_cube.messages == 4
+
+
+def test_layouts_are_cached_apart(cache):
+    WhatsAppParser(CHAT.encode(), cache=cache)
+    compact = WhatsAppParser(CHAT.encode(), cache=cache, compact=True)
+
+    assert 'time' not in compact.chat_dataframe
+    assert len(os.listdir(cache.directory)) == 2
@@ -0,0 +1,32 @@
+from whatsapp_parser import chat_reader
+import io
+import pytest
+
+
+@pytest.mark.parametrize('line, timestamp', [
+    ('[15/01/2023, 13:05:01] Ana: oi', '15/01/2023 13:05:01'),
+    ('[15/01/23, 13:05:01] Ana: oi', '15/01/2023 13:05:01'),
+    ('[1/15/23, 12:05:01 AM] Ana: oi', '1/15/2023 0:05:01'),
+    ('[1/15/23, 12:05 PM] Ana: oi', '1/15/2023 12:05:00'),
+    ('[1/15/23, 3:05:09 pm] Ana: oi', '1/15/2023 15:05:09'),
+    ('[1/15/23, 3:05:09\u202fPM] Ana: oi', '1/15/2023 15:05:09'),
+    ('15/01/2023 13:05 - Ana: oi', '15/01/2023 13:05:00'),
+    ('1/15/23, 11:05 PM - Ana: oi', '1/15/2023 23:05:00'),
+])
+def test_timestamps_of_the_headers(line, timestamp):
+    scanned, info = chat_reader.scan_file(f'{line}\n'.encode())
+    parsed, _ = chat_reader.parse_lines(io.StringIO(f'{line}\n'))
+
+    assert scanned == parsed == {'timestamp': [timestamp], 'who_sended': ['Ana'], 'message': ['oi']}
+    assert info['apple_device'] == line.startswith('[')
+
+
+@pytest.mark.parametrize('lines, month_first', [
+    (['[1/2/23, 10:00:00] Ana: oi', '[1/13/23, 10:00:00] Ana: oi'], True),
+    (['[1/2/23, 10:00:00] Ana: oi', '[13/1/23, 10:00:00] Ana: oi'], False),
+    (['[1/2/23, 10:00:00] Ana: oi', '[2/1/23, 10:00:00] Ana: oi'], False),
+    (['1/2/23, 10:00 - Ana: oi', '1/13/23, 10:00 - Ana: 13/1/23'], True),
+    (['Not a chat'], False),
+])
+def test_detect_month_first(lines, month_first):
+    assert chat_reader.detect_month_first(io.StringIO('\n'.join(lines))) == month_first
@@ -0,0 +1,45 @@
+from whatsapp_parser.whats_app_parser import WhatsAppParser
+from whatsapp_parser import export
+import pandas as pd
+import io
+import pytest
+
+CHAT = ''.join(f"[{1 + position % 28:02d}/{1 + position // 28:02d}/2023, {position % 24:02d}:{position % 60:02d}:05] "
+               f"{'Ana' if position % 3 else 'Bruno'}: {'image omitted' if position % 7 == 0 else f'mensagem {position}, =1+1'}\n"
+               for position in range(120))
+
+
+def read(content: bytes, file_format: str) -> pd.DataFrame:
+    if file_format == 'xlsx': return pd.read_excel(io.BytesIO(content))
+    if file_format == 'parquet': return pd.read_parquet(io.BytesIO(content))
+    return pd.read_csv(io.BytesIO(content), compression='gzip' if file_format == 'csv.gz' else None)
+
+
+def written_by_pandas(dataframe: pd.DataFrame, file_format: str) -> pd.DataFrame:
+    """
+    Writes a DataFrame with pandas' own writer of the format, and reads it back.
+    """
+
+    buffer = io.BytesIO()
+    if file_format == 'xlsx': dataframe.to_excel(buffer, index=False)
+    elif file_format == 'parquet': dataframe.to_parquet(buffer, index=False)
+    else: dataframe.to_csv(buffer, index=False, compression='gzip' if file_format == 'csv.gz' else None)
+
+    return read(buffer.getvalue(), file_format)
+
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('file_format', list(export.FORMATS))
+def test_export_reads_back_as_written_by_pandas(file_format, compact):
+    chat = WhatsAppParser(CHAT.encode(), compact=compact)
+    messages = chat.chat_dataframe[chat.chat_dataframe['timestamp'].between('2023-02-01', '2023-03-15 23:59:59')]
+
+    content = chat.export(file_format, start_date='2023-02-01', end_date='2023-03-15')
+
+    pd.testing.assert_frame_equal(read(content, file_format), written_by_pandas(messages, file_format))
+    assert chat.export(file_format, start_date='2023-02-01', end_date='2023-03-15') is content
+
+
+def test_export_of_an_unknown_format():
+    with pytest.raises(ValueError):
+        WhatsAppParser(CHAT.encode()).export('json')
@@ -0,0 +1,36 @@
+from whatsapp_parser.message_cube import MessageCube
+import pandas as pd
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def cube():
+    timestamps = pd.to_datetime(['2023-03-01 10:00', '2023-03-01 11:00', '2023-03-02 09:00', '2023-03-10 20:00'])
+    chat_dataframe = pd.DataFrame({'timestamp': timestamps,
+                                   'who_sended': ['Ana', 'Bruno', 'Bruno', 'Ana'],
+                                   'message_type': ['Text', 'Text', 'Audio', 'Text'],
+                                   'hour': timestamps.hour})
+    return MessageCube.from_frame(chat_dataframe)
+
+
+def test_messages_per_day_and_sender(cube):
+    days, senders, counts = cube.messages_per_day_and_sender()
+
+    assert days.tolist() == np.array(['2023-03-01', '2023-03-02', '2023-03-10'], dtype='datetime64[D]').tolist()
+    assert senders.tolist() == ['Ana', 'Bruno']
+    assert counts.tolist() == [[1, 1], [0, 1], [1, 0]]
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2023-03-04', '2023-03-08'),  # A gap in the chat
+    ('2023-03-10', '2023-03-01'),  # Start date after the end date
+    ('2023-04-01', '2023-04-30'),  # After the chat
+    (None, '2023-02-28'),  # Before the chat
+])
+def test_messages_per_day_and_sender_of_an_empty_range(cube, start_date, end_date):
+    days, senders, counts = cube.messages_per_day_and_sender(start_date, end_date)
+
+    assert len(days) == 0
+    assert len(senders) == 0
+    assert counts.shape == (0, 0)
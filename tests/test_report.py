@@ -0,0 +1,79 @@
+from whatsapp_parser.whats_app_parser import WhatsAppParser
+from whatsapp_parser import report
+from plotly.offline.offline import get_plotlyjs, get_plotlyjs_version
+from PIL import Image
+import plotly.graph_objs as go
+import json
+import os
+import re
+import pytest
+
+CHAT = """[01/03/2023, 10:00:00] Ana: Bom dia
+[01/03/2023, 22:00:00] Bruno: Boa noite
+[13/03/2023, 09:00:00] Ana: image omitted
+[13/03/2023, 23:00:00] Bruno: Bom dia
+"""
+
+
+def figures_of(document: str) -> tuple:
+    """
+    Reads back the templates and the figures written to a report.
+    """
+
+    templates = json.loads(re.search(r'^var templates = (.*);$', document, re.MULTILINE).group(1))
+    figures = json.loads(re.search(r'^var figures = (.*);$', document, re.MULTILINE).group(1))
+
+    return templates, figures
+
+
+def test_write_report(tmp_path):
+    figures = [go.Figure(go.Bar(x=['Ana', 'Bruno'], y=[1, 2], name='</script>')), go.Figure(go.Scatter(x=[1, 2], y=[3, 4]))]
+    file_path = str(tmp_path / 'report.html')
+
+    report.write_report(file_path, 'Ana & Bruno', [figures[0], Image.new('RGB', (4, 4)), figures[1]])
+    with open(file_path, encoding='utf-8') as file: document = file.read()
+    templates, written = figures_of(document)
+
+    # plotly.js and the template shared by both figures are written once
+    assert document.count(get_plotlyjs()) == 1
+    assert len(templates) == 1 and [figure['template'] for figure in written] == [0, 0]
+    assert document.count('<img src="data:image/png;base64,') == 1
+    assert '<title>Ana &amp; Bruno</title>' in document
+
+    # Only the script elements of plotly.js and of the figures end, not the one in the name of the bar
+    assert document.count('</script>') == 2
+
+    for figure, figure_json in zip(figures, written):
+        plotly_json = json.loads(figure.to_json())
+        assert figure_json['data'] == plotly_json['data']
+        assert {'template': templates[0], **figure_json['layout']} == plotly_json['layout']
+
+
+@pytest.mark.parametrize('include_plotlyjs, source', [
+    ('directory', report.PLOTLYJS_FILE),
+    ('cdn', f'https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js'),
+    ('../plotly.min.js', '../plotly.min.js'),
+])
+def test_reference_plotlyjs(tmp_path, include_plotlyjs, source):
+    file_path = str(tmp_path / 'report.html')
+
+    report.write_report(file_path, 'Chat', [go.Figure()], include_plotlyjs)
+    with open(file_path, encoding='utf-8') as file: document = file.read()
+
+    assert f'<script type="text/javascript" src="{source}"></script>' in document
+    assert get_plotlyjs() not in document
+    assert os.path.exists(tmp_path / report.PLOTLYJS_FILE) == (include_plotlyjs == 'directory')
+
+
+def test_save_report(tmp_path):
+    chat = WhatsAppParser(CHAT.encode())
+
+    file_path = chat.save_report(path=str(tmp_path), title='Chat')
+    with open(file_path, encoding='utf-8') as file: document = file.read()
+    _, written = figures_of(document)
+
+    # The word cloud and every graph of an Apple chat
+    assert file_path == os.path.join(str(tmp_path), 'Report.html')
+    assert document.count('<img src=') == 1
+    assert len(written) == 7
+    assert written[-1]['data'] == json.loads(chat.generate_first_last_message().to_json())['data']
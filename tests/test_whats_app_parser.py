@@ -0,0 +1,278 @@
+from whatsapp_parser.whats_app_parser import WhatsAppParser
+from whatsapp_parser import chat_reader
+import functools
+import io
+import tempfile
+import zipfile
+from utils import Utils
+import pandas as pd
+import numpy as np
+import pytest
+
+CHAT = """[01/03/2023, 10:00:00] Ana: Bom dia
+[01/03/2023, 22:00:00] Bruno: Boa noite
+[02/03/2023, 09:00:00] Ana: Bom dia
+[02/03/2023, 23:00:00] Bruno: Boa noite
+[03/03/2023, 08:00:00] Bruno: Bom dia
+[03/03/2023, 21:00:00] Ana: Boa noite
+"""
+
+
+def twelve_hour_chat(messages: int = 300) -> bytes:
+    """
+    Builds an iOS export with month-first dates and a 12-hour clock, e.g. "[1/15/23, 3:45:12 PM]", with an image
+    every 5 messages.
+    """
+
+    lines = []
+    for position in range(messages):
+        month, day, hour = 1 + position // 28 % 12, 1 + position % 28, 1 + position % 12
+        message = 'image omitted' if position % 5 == 0 else f'oi {position}'
+        lines.append(f"[{month}/{day}/23, {hour}:{position % 60:02d}:12 {'PM' if position % 3 == 0 else 'AM'}] "
+                     f"{'Ana' if position % 2 else 'Bia'}: {message}")
+
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def month_first_chat(messages: int = 200) -> bytes:
+    """
+    Builds an iOS export with month-first dates, whose first days read the same day first, e.g. "[1/2/23, 10:00:00]".
+    """
+
+    lines = [f"[{1 + position // 28}/{1 + position % 28}/23, {position % 24:02d}:00:00] {'Ana' if position % 3 else 'Bia'}: oi {position}"
+             for position in range(messages)]
+
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def export_chat(messages: int = 300, apple_device: bool = True, month_first: bool = False) -> bytes:
+    """
+    Builds an export with a 24-hour clock, as read by whatstk as well, in order: a group chat with images and
+    messages of two lines.
+    """
+
+    lines = []
+    for position in range(messages):
+        day, month = 1 + position % 28, 1 + position // 28
+        date = f'{month}/{day}/2023' if month_first else f'{day:02d}/{month:02d}/2023'
+        sender = ['Ana', 'Bruno', 'Carla'][position % 3]
+        message = 'image omitted' if position % 7 == 0 else f'oi {position}\nsegunda linha' if position % 11 == 0 else f'mensagem {position}'
+        lines.append(f'[{date}, {position % 24:02d}:{position % 60:02d}:05] {sender}: {message}' if apple_device
+                     else f'{date} {position % 24:02d}:{position % 60:02d} - {sender}: {message}')
+
+    return ('\n'.join(lines) + '\n').encode()
+
+
+EXPORTS = [
+    pytest.param({}, id='apple'),
+    pytest.param({'month_first': True}, id='apple-month-first'),
+    pytest.param({'apple_device': False}, id='android'),
+    pytest.param({'apple_device': False, 'month_first': True}, id='android-month-first'),
+]
+
+
+def assert_same_cube(cube, other):
+    assert cube.days.tolist() == other.days.tolist()
+    assert cube.senders == other.senders
+    assert cube.types == other.types
+    np.testing.assert_array_equal(cube.cumulative_counts, other.cumulative_counts)
+    np.testing.assert_array_equal(cube.cumulative_hours, other.cumulative_hours)
+
+
+@pytest.fixture
+def chat():
+    return WhatsAppParser(CHAT.encode())
+
+
+def test_first_last_message_traces(chat):
+    fig = chat.generate_first_last_message()
+    columns = Utils.read_language_files('English 🇺🇸')['Graph_7']['dataframe_columns']
+
+    # A vertical bar per sender, with the number of days they sent the first or the last message
+    assert [trace.name for trace in fig.data] == [columns['first'], columns['last']]
+    assert [list(trace.x) for trace in fig.data] == [['Ana', 'Bruno'], ['Ana', 'Bruno']]
+    assert [list(trace.y) for trace in fig.data] == [[2, 1], [1, 2]]
+    assert all(trace.orientation in (None, 'v') for trace in fig.data)
+    assert fig.layout.barmode == 'group'
+
+
+def test_first_last_message_traces_of_a_date_range(chat):
+    fig = chat.generate_first_last_message(start_date='2023-03-02', end_date='2023-03-03')
+
+    assert [list(trace.x) for trace in fig.data] == [['Ana', 'Bruno'], ['Ana', 'Bruno']]
+    assert [list(trace.y) for trace in fig.data] == [[1, 1], [1, 1]]
+
+
+def test_twelve_hour_apple_export(tmp_path):
+    path = tmp_path / 'chat.txt'
+    path.write_bytes(twelve_hour_chat())
+
+    for source in (str(path), path.read_bytes()):
+        chat = WhatsAppParser(source)
+
+        # The device is told by the brackets of the header, even when whatstk parses the chat
+        assert chat.chat_downloaded_from_apple_device
+        assert chat.chat_dataframe['message_type'].value_counts()[['Text', 'Foto']].tolist() == [240, 60]
+
+
+def test_chunks_of_a_month_first_export():
+    chat = WhatsAppParser(month_first_chat())
+    chunks = list(WhatsAppParser.iter_chunks(month_first_chat(), chunk_messages=5))
+
+    assert chat.chat_dataframe['timestamp'].iloc[1] == pd.Timestamp('2023-01-02 01:00')
+    pd.testing.assert_series_equal(pd.concat(chunks)['timestamp'], chat.chat_dataframe['timestamp'])
+    assert_same_cube(WhatsAppParser(month_first_chat(), chunk_messages=5).message_cube, chat.message_cube)
+
+
+def test_chunks_of_a_twelve_hour_export():
+    chat = WhatsAppParser(twelve_hour_chat())
+
+    assert chat.chat_dataframe['timestamp'].iloc[:2].tolist() == [pd.Timestamp('2023-01-01 13:00:12'), pd.Timestamp('2023-01-02 02:01:12')]
+    assert_same_cube(WhatsAppParser(twelve_hour_chat(), chunk_messages=7).message_cube, chat.message_cube)
+
+
+def test_zip_export(tmp_path):
+    chat = WhatsAppParser(month_first_chat())
+    path = tmp_path / 'chat.zip'
+    with zipfile.ZipFile(path, 'w') as archive: archive.writestr('_chat.txt', month_first_chat())
+
+    # The chat is streamed out of the archive, whatever the engine asked for
+    for source in (str(path), path.read_bytes(), io.BytesIO(path.read_bytes())):
+        zipped = WhatsAppParser(source, workers=2)
+
+        pd.testing.assert_frame_equal(zipped.chat_dataframe, chat.chat_dataframe)
+        assert zipped.parse_state == chat.parse_state
+
+
+def test_whatstk_reads_the_text_of_the_chat(tmp_path, monkeypatch):
+    path = tmp_path / 'chat.txt'
+    path.write_text(CHAT)
+    monkeypatch.setattr(tempfile, 'NamedTemporaryFile', None)
+
+    from_path = WhatsAppParser(str(path), engine='whatstk')
+    from_bytes = WhatsAppParser(CHAT.encode(), engine='whatstk')
+
+    pd.testing.assert_frame_equal(from_bytes.chat_dataframe, from_path.chat_dataframe)
+
+
+@pytest.mark.parametrize('parsed, added', [
+    (150, 50),  # New messages appended to the export
+    (150, 0),  # The same export again
+])
+def test_update_equals_a_full_parse(tmp_path, parsed, added):
+    path = tmp_path / 'chat.txt'
+    path.write_bytes(month_first_chat(parsed))
+    chat = WhatsAppParser(str(path))
+
+    parse_state = chat.parse_state
+    path.write_bytes(month_first_chat(parsed + added))
+
+    assert chat.update(str(path), parse_state)
+    pd.testing.assert_frame_equal(chat.chat_dataframe, WhatsAppParser(str(path)).chat_dataframe)
+    assert_same_cube(chat.message_cube, WhatsAppParser(str(path)).message_cube)
+    assert chat.parse_state == WhatsAppParser(str(path)).parse_state
+
+
+def test_update_of_a_changed_export(tmp_path):
+    path = tmp_path / 'chat.txt'
+    path.write_bytes(month_first_chat(150))
+    chat = WhatsAppParser(str(path))
+
+    # The first messages changed, so the chat is parsed again
+    path.write_bytes(month_first_chat(200).replace(b'oi 1\n', b'ola 1\n'))
+
+    assert not chat.update(str(path))
+    pd.testing.assert_frame_equal(chat.chat_dataframe, WhatsAppParser(str(path)).chat_dataframe)
+
+
+def test_export_is_hashed_only_when_needed(tmp_path, monkeypatch):
+    hash_export = chat_reader.hash_export
+    hashed = []
+    monkeypatch.setattr(chat_reader, 'hash_export', lambda *args: hashed.append(args) or hash_export(*args))
+
+    path = tmp_path / 'chat.txt'
+    path.write_bytes(month_first_chat(150))
+    chat = WhatsAppParser(str(path))
+    assert not hashed
+
+    # Hashed once, the first time the state is read
+    assert chat.parse_state == {**chat.parse_state, 'offset': path.stat().st_size}
+    assert len(hashed) == 1
+
+    # Once the parsed file changed it can't be hashed as it was parsed anymore
+    chat = WhatsAppParser(str(path))
+    path.write_bytes(month_first_chat(200))
+    assert chat.parse_state is None
+    assert not chat.update(str(path))
+    pd.testing.assert_frame_equal(chat.chat_dataframe, WhatsAppParser(str(path)).chat_dataframe)
+
+
+PHRASES = """[01/03/2023, 10:00:00] Ana: Bom dia! Bom dia
+[01/03/2023, 10:05:00] Bruno: bom diazinho, bom
+[01/03/2023, 10:06:00] Bruno: Abom dia
+[02/03/2023, 09:00:00] Ana: dia bom
+[02/03/2023, 09:30:00] Carla: bom-dia, bom dia.
+[02/03/2023, 09:40:00] Carla: image omitted
+"""
+
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('word', ['bom dia', 'Bom dia!', 'm di', 'bom-dia', 'dia.', 'bom d.a', '!!'])
+@pytest.mark.parametrize('whole_word', [False, True])
+def test_count_a_phrase(word, whole_word, compact):
+    chat = WhatsAppParser(PHRASES.encode(), compact=compact)
+
+    # The same counts as searching every message
+    pattern = chat._word_pattern(word, whole_word)
+    expected = chat.chat_dataframe.groupby('who_sended', observed=False)['message'].apply(lambda x: x.str.lower().str.count(pattern).sum())
+
+    by_person = chat.count_word_occurrences_by_person(word, whole_word)
+    assert dict(zip(by_person['who_sended'], by_person['message'])) == expected.to_dict()
+    assert chat.count_word_occurrences(word, whole_word) == expected.sum()
+
+
+@pytest.mark.parametrize('options', EXPORTS)
+def test_engines_equal_whatstk(options, monkeypatch):
+    # Split even a small export, so that it's parsed by several processes
+    monkeypatch.setattr(chat_reader, 'shard_file', functools.partial(chat_reader.shard_file, min_shard_bytes=1))
+    baseline = WhatsAppParser(export_chat(**options), engine='whatstk')
+
+    for chat in (WhatsAppParser(export_chat(**options)),
+                 WhatsAppParser(export_chat(**options), engine='native'),
+                 WhatsAppParser(export_chat(**options), workers=3)):
+        pd.testing.assert_frame_equal(chat.chat_dataframe, baseline.chat_dataframe, check_dtype=False)
+        assert chat.users == baseline.users
+        assert chat.chat_downloaded_from_apple_device == baseline.chat_downloaded_from_apple_device == options.get('apple_device', True)
+        assert chat.group_chat == baseline.group_chat
+
+
+@pytest.mark.parametrize('options', EXPORTS)
+def test_chunks_equal_the_whole_chat(options):
+    chat = WhatsAppParser(export_chat(**options))
+    chunks = pd.concat(WhatsAppParser.iter_chunks(export_chat(**options), chunk_messages=25))
+
+    pd.testing.assert_frame_equal(chunks, chat.chat_dataframe[chunks.columns])
+    assert_same_cube(WhatsAppParser(export_chat(**options), chunk_messages=25).message_cube, chat.message_cube)
+
+
+@pytest.mark.parametrize('graph', ['generate_graph_number_of_messages_per_day', 'generate_graph_number_of_types_of_messages',
+                                   'generate_graph_number_of_types_of_messages_per_user', 'generate_graph_number_of_messages_per_hour',
+                                   'generate_number_of_messages_per_user', 'generate_activity_heatmap', 'generate_first_last_message'])
+def test_compact_layout_draws_the_same_graphs(graph):
+    chat = WhatsAppParser(export_chat())
+    compact = WhatsAppParser(export_chat(), compact=True)
+
+    assert getattr(compact, graph)().to_json() == getattr(chat, graph)().to_json()
+    assert getattr(compact, graph)(start_date='2023-02-01', end_date='2023-03-15').to_json() == \
+        getattr(chat, graph)(start_date='2023-02-01', end_date='2023-03-15').to_json()
+
+
+def test_compact_layout():
+    chat = WhatsAppParser(export_chat())
+    compact = WhatsAppParser(export_chat(), compact=True)
+
+    # The same messages in less memory
+    assert 'time' not in compact.chat_dataframe
+    assert compact.chat_dataframe['who_sended'].dtype == 'category'
+    pd.testing.assert_frame_equal(compact.display_dataframe(), chat.display_dataframe(), check_dtype=False, check_categorical=False)
+    assert compact.memory_report().loc['Total', 'bytes'] < chat.memory_report().loc['Total', 'bytes'] / 2
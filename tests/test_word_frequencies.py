@@ -0,0 +1,30 @@
+from whatsapp_parser.word_frequencies import WordFrequencies
+from wordcloud import WordCloud, STOPWORDS
+import pandas as pd
+import pytest
+
+MESSAGES = pd.Series(["Bom dia, Ana's cats", "the cat is here", "Cats and CATS", "dogs dog Dog", "boss bosses 123 it's", None, "Olá olá OLÁ"])
+TIMESTAMPS = pd.Series(pd.to_datetime(['2023-03-01 10:00', '2023-03-01 11:00', '2023-03-02 09:00', '2023-03-03 08:00',
+                                       '2023-03-03 20:00', '2023-03-04 12:00', '2023-03-06 07:00']))
+
+
+@pytest.fixture
+def word_frequencies():
+    return WordFrequencies(MESSAGES, TIMESTAMPS)
+
+
+@pytest.mark.parametrize('start_date, end_date, messages', [
+    (None, None, slice(None)),
+    ('2023-03-02', '2023-03-03', slice(2, 5)),
+    ('2023-03-05', '2023-03-06', slice(6, 7)),  # Starts on a day without messages
+])
+def test_frequencies_as_word_cloud_counts_them(word_frequencies, start_date, end_date, messages):
+    # The words of the range, as WordCloud.generate counts them before drawing the cloud
+    expected = WordCloud(stopwords=STOPWORDS | {'bom'}, collocations=False).process_text(' '.join(MESSAGES[messages].fillna('')))
+
+    assert word_frequencies.frequencies(start_date, end_date, ['Bom']) == expected
+
+
+def test_frequencies_of_an_empty_range(word_frequencies):
+    assert word_frequencies.frequencies('2023-04-01', '2023-04-30') == {}
+    assert WordFrequencies(pd.Series([], dtype=object), pd.Series([], dtype='datetime64[ns]')).frequencies() == {}
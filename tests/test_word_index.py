@@ -0,0 +1,59 @@
+from whatsapp_parser.word_index import WordIndex, count_terms
+import pandas as pd
+import re
+import pytest
+
+MESSAGES = pd.Series(['Bom dia! Bom dia', 'bom diazinho, bom', 'Abom dia', 'dia bom', 'bom-dia, bom dia.', None])
+SENDERS = pd.Series(['Ana', 'Bruno', 'Bruno', 'Ana', 'Carla', 'Carla'])
+
+
+@pytest.mark.parametrize('query, whole_word, positions', [
+    ('bom dia', False, [0, 1, 2, 3, 4]),  # Also 'Abom' and 'diazinho' at the ends of the phrase
+    ('bom dia', True, [0, 3, 4]),
+    ('Bom dia!', False, [0, 2, 3, 4]),  # 'dia' between a space and '!' must be a whole word
+    ('m di', False, [0, 1, 2, 3, 4]),
+    ('x dia', False, []),
+    ('!!', False, None),  # No words to find the messages by
+])
+def test_messages_containing(query, whole_word, positions):
+    found = WordIndex(MESSAGES, SENDERS).messages_containing(query, whole_word)
+
+    assert (found if found is None else found.tolist()) == positions
+
+
+def count_each_term(terms, case_sensitive, whole_word, regex):
+    """
+    Counts the terms one at a time, in the messages of each sender.
+    """
+
+    counts = {}
+    for sender, messages in MESSAGES.fillna('').groupby(SENDERS, sort=False):
+        if regex:
+            counts[sender] = [messages.str.count(term, flags=0 if case_sensitive else re.IGNORECASE).sum() for term in terms]
+            continue
+
+        text = '\x00'.join(messages) if case_sensitive else '\x00'.join(messages).lower()
+        folded = terms if case_sensitive else [term.lower() for term in terms]
+        counts[sender] = [len(re.findall(rf'(?<!\w){re.escape(term)}(?!\w)', text)) if whole_word else text.count(term) for term in folded]
+
+    return pd.DataFrame(counts, index=terms).T
+
+
+@pytest.mark.parametrize('terms, regex', [
+    (['bom dia', 'Bom', 'dia bom', 'bom-dia', 'dia.', 'm d'], False),  # 'bom dia' and 'dia bom' may overlap, so they're counted on their own
+    (['^bom', r'dia\W', 'zinho'], True),
+    (['(bom) (dia)', r'(d)ia\1'], True),  # Groups of their own, counted one at a time
+])
+@pytest.mark.parametrize('case_sensitive', [False, True])
+@pytest.mark.parametrize('whole_word', [False, True])
+def test_count_terms(terms, regex, case_sensitive, whole_word):
+    counts = count_terms(MESSAGES, SENDERS, terms, case_sensitive, whole_word, regex)
+
+    pd.testing.assert_frame_equal(counts, count_each_term(terms, case_sensitive, whole_word, regex).loc[counts.index])
+
+
+def test_count_overlapping_regular_expressions():
+    # Only the first of the regular expressions is counted where their occurrences overlap
+    counts = count_terms(MESSAGES, SENDERS, ['bom dia', 'dia!'], regex=True)
+
+    assert counts.loc['Ana'].tolist() == [2, 0]
@@ -1,6 +1,8 @@
 import json
 from datetime import datetime
+from types import MappingProxyType
 import pandas as pd
+import numpy as np
 from cryptography.fernet import Fernet
 import os
 
@@ -9,6 +11,10 @@ class Utils:
     _key = None
     _cipher_suite = None
 
+    # Texts of each language, loaded from the language folder next to this file the first time they are read
+    _languages = {}
+    _language_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'language')
+
     @staticmethod
     def generate_and_store_key():
         """Generate a key for encryption and store it securely."""
@@ -30,12 +36,57 @@ class Utils:
 
     @staticmethod
     def read_language_files(language: str):
-        file_path = f'language/{language}.json'
-        with open(file_path, 'r') as file:
-            return json.load(file)
+        """Return the read-only texts of a language, reading its file only once per process."""
+        if language not in Utils._languages:
+            with open(os.path.join(Utils._language_folder, f'{language}.json'), 'r', encoding='utf-8') as file:
+                Utils._languages[language] = Utils._freeze(json.load(file))
+        return Utils._languages[language]
+
+    @staticmethod
+    def _freeze(value):
+        """Turn the dictionaries and lists of a JSON value into read-only mappings and tuples."""
+        if isinstance(value, dict): return MappingProxyType({key: Utils._freeze(item) for key, item in value.items()})
+        if isinstance(value, list): return tuple(Utils._freeze(item) for item in value)
+        return value
+
+    @staticmethod
+    def index_days(dataframe) -> tuple:
+        """
+        Builds the day-boundary index of a DataFrame sorted by its 'timestamp' (or 'date') column.
+
+        Returns:
+        - tuple: The distinct days of the rows (numpy datetime64[D] array), and the offset of the first row of
+          each day followed by the number of rows, so that the rows of days[i] are offsets[i]:offsets[i + 1].
+        """
+
+        days = dataframe['timestamp' if 'timestamp' in dataframe else 'date'].values.astype('datetime64[D]')
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.array([], dtype=int)
+
+        return days[starts], np.append(starts, len(days))
 
     @staticmethod
-    def check_and_apply_filter_dates(start_date, end_date, dataframe) -> pd.DataFrame:
+    def day_range(start_date, end_date, days) -> tuple:
+        """
+        Finds the positions of a date range in a sorted array of days with a binary search.
+
+        Returns:
+        - tuple: The positions of the first day in the range and of the first day after it, so that the range is days[first:last].
+        """
+
+        first, last = 0, len(days)
+        if start_date and end_date: first = days.searchsorted(np.datetime64(datetime.strptime(start_date, '%Y-%m-%d').date(), 'D'), 'left')
+        if end_date: last = days.searchsorted(np.datetime64(datetime.strptime(end_date, '%Y-%m-%d').date(), 'D'), 'right')
+
+        return first, last
+
+    @staticmethod
+    def check_and_apply_filter_dates(start_date, end_date, dataframe, day_index=None) -> pd.DataFrame:
+        if day_index is not None:
+            # Binary search of the days, and a positional slice of the rows
+            days, offsets = day_index
+            first, last = Utils.day_range(start_date, end_date, days)
+            return dataframe.iloc[offsets[first]:offsets[last]]
+
         if start_date and end_date:
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
@@ -46,6 +97,10 @@ class Utils:
             start_date = dataframe['date'].min()
             end_date = dataframe['date'].max()
 
+        # The dates of a compact chat are datetime64 days
+        if pd.api.types.is_datetime64_any_dtype(dataframe['date']):
+            start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
         return dataframe[
             (dataframe['date'] >= start_date) & (dataframe['date'] <= end_date)
         ]
@@ -0,0 +1,105 @@
+import pyarrow.parquet as pq
+import pandas as pd
+import pyarrow
+import tempfile
+import json
+import os
+
+
+class ChatCache:
+    # Key of the schema metadata where the information about the chat is stored
+    _metadata_key = b'whatsapp_parser'
+
+    def __init__(self, directory: str = None, max_bytes: int = 1 << 30):
+        """
+        Initializes a ChatCache instance, a persistent cache of parsed chats stored as Parquet files.
+
+        Chats are keyed by the hash of the exported file, so that uploading the same export again loads
+        the tidy DataFrame directly instead of parsing it.
+
+        Parameters:
+        - directory (str, optional): Folder where the cached chats are stored. If not provided, uses a folder in the temp directory.
+        - max_bytes (int, optional): Maximum size of the cache. The least recently used chats are evicted beyond it.
+        """
+
+        if directory is None: directory = os.path.join(tempfile.gettempdir(), 'whatsapp_parser_cache')
+        if not os.path.exists(directory): os.makedirs(directory)
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        """
+        Returns the path of the Parquet file of a cached chat.
+        """
+        return os.path.join(self.directory, f'{key}.parquet')
+
+    def load(self, key: str):
+        """
+        Loads a cached chat.
+
+        Parameters:
+        - key (str): Hash of the exported file.
+
+        Returns:
+        - tuple: The tidy chat DataFrame and the dictionary of information stored with it, or None if the chat is not cached.
+        """
+
+        path = self._path(key)
+
+        try:
+            table = pq.read_table(path)
+        except (FileNotFoundError, pyarrow.ArrowInvalid):
+            return None
+
+        # Mark the chat as recently used
+        os.utime(path)
+
+        return table.to_pandas(), json.loads(table.schema.metadata[self._metadata_key])
+
+    def store(self,
+              key: str,
+              chat_dataframe: pd.DataFrame,
+              metadata: dict):
+        """
+        Stores a chat in the cache, evicting the least recently used chats if the cache gets too big.
+
+        Parameters:
+        - key (str): Hash of the exported file.
+        - chat_dataframe (pd.DataFrame): Tidy chat DataFrame.
+        - metadata (dict): JSON serializable information about the chat.
+        """
+
+        table = pyarrow.Table.from_pandas(chat_dataframe, preserve_index=True)
+        table = table.replace_schema_metadata({**table.schema.metadata, self._metadata_key: json.dumps(metadata)})
+
+        # Write to a temporary file first, so that a chat is never read half written
+        path = self._path(key)
+        pq.write_table(table, f'{path}.tmp')
+        os.replace(f'{path}.tmp', path)
+
+        self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used chats until the cache fits in max_bytes.
+        """
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.parquet'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Removes every chat from the cache.
+        """
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.parquet'): os.remove(entry.path)
@@ -0,0 +1,696 @@
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import re
+import zipfile
+
+
+# Time of a header, on a 24-hour clock or on a 12-hour one, e.g. "14:30:15", "2:30 PM" or "2:30:15\u202fpm"
+_TIME = r"(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?(?:[ \u202f](?P<meridiem>[AaPp][Mm]))?"
+
+# Header of a message exported from an Apple device, e.g. "[25/12/2023, 14:30:15] Name: message"
+APPLE_HEADER = re.compile(r"^\[(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{2,4}),? " + _TIME + r"\] "
+                          r"(?:(?P<who_sended>[^:]*): )?(?P<message>.*)$")
+
+# Header of a message exported from an Android device, e.g. "25/12/2023 14:30 - Name: message"
+ANDROID_HEADER = re.compile(r"^(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{2,4}),? " + _TIME + r" - "
+                            r"(?:(?P<who_sended>[^:]*): )?(?P<message>.*)$")
+
+# Same headers, matched on the raw bytes of the export. They also capture the sender so that
+# a message can be decoded straight from the file without splitting it into lines
+_BYTES_PREFIX = rb"^(?:\xef\xbb\xbf|\xe2\x80\x8e)*"
+_BYTES_SENDER = rb"(?:(?P<who_sended>[^:\r\n]*): )?"
+_BYTES_TIMESTAMP = (rb"(?P<timestamp>(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{2,4}),? "
+                    rb"(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?(?:(?: |\xe2\x80\xaf)(?P<meridiem>[AaPp][Mm]))?)")
+APPLE_HEADER_BYTES = re.compile(_BYTES_PREFIX + rb"\[" + _BYTES_TIMESTAMP + rb"\] " + _BYTES_SENDER, re.M)
+ANDROID_HEADER_BYTES = re.compile(_BYTES_PREFIX + _BYTES_TIMESTAMP + rb" - " + _BYTES_SENDER, re.M)
+
+# Characters WhatsApp sprinkles over the export that are never part of the content
+INVISIBLE_CHARACTERS = ('\ufeff', '\u200e', '~\u202f')
+
+# Name of the chat in the .zip exports of Apple devices. Android names it after the chat, e.g. "WhatsApp Chat with Name.txt"
+ZIP_CHAT_NAME = '_chat.txt'
+
+# Type of the media files of a .zip export, by extension. Any other file is a 'Document'
+MEDIA_TYPES = {
+    'opus': 'Audio', 'm4a': 'Audio', 'mp3': 'Audio', 'aac': 'Audio', 'ogg': 'Audio',
+    'mp4': 'Video', 'mov': 'Video', '3gp': 'Video',
+    'jpg': 'Foto', 'jpeg': 'Foto', 'png': 'Foto', 'heic': 'Foto',
+    'webp': 'Sticker',
+    'gif': 'GIF',
+}
+
+
+def clean_line(line: str) -> str:
+    """
+    Removes the invisible characters and the line break from a raw line of the export.
+
+    Parameters:
+    - line (str): Raw line read from the .txt file.
+
+    Returns:
+    - str: The cleaned line.
+    """
+
+    line = line.rstrip('\r\n')
+    for character in INVISIBLE_CHARACTERS:
+        if character in line: line = line.replace(character, '')
+
+    return line
+
+
+def detect_header(line: str):
+    """
+    Detects which device the chat was exported from, based on the header of a message line.
+
+    Parameters:
+    - line (str): Cleaned line of the export.
+
+    Returns:
+    - re.Pattern: APPLE_HEADER or ANDROID_HEADER, or None if the line matches none of them.
+    """
+
+    for header in (APPLE_HEADER, ANDROID_HEADER):
+        if header.match(line): return header
+
+    return None
+
+
+def detect_month_first(lines) -> bool:
+    """
+    Detects whether the dates of a WhatsApp export are written month first, reading only the headers of its
+    messages, and only until one of them tells the order: a date with a first field after 12 is day first, and
+    one with a second field after 12 is month first.
+
+    Parameters:
+    - lines (iterable): Raw lines of the export, e.g. an open file object.
+
+    Returns:
+    - bool: True if the dates are month first. A chat whose dates read the same both ways is day first.
+    """
+
+    header = None
+
+    for line in lines:
+        line = clean_line(line)
+        if header is None:
+            header = detect_header(line)
+            if header is None: return False
+
+        match = header.match(line)
+        if match is None: continue
+
+        if int(match.group('day')) > 12: return False
+        if int(match.group('month')) > 12: return True
+
+    return False
+
+
+def is_apple_line(line: str) -> bool:
+    """
+    Detects whether the chat was exported from an Apple device, whose lines start with the timestamp in brackets,
+    whatever the format of the timestamp, i.e. also when the header is not recognized and whatstk parses the chat.
+
+    Parameters:
+    - line (str): Cleaned first line of the export.
+
+    Returns:
+    - bool: True if the chat was exported from an Apple device.
+    """
+    return line.startswith('[')
+
+
+def format_timestamp(match) -> str:
+    """
+    Builds the timestamp of a message in the '%d/%m/%Y %H:%M:%S' format from a header match.
+
+    Parameters:
+    - match (re.Match): Match of APPLE_HEADER or ANDROID_HEADER.
+
+    Returns:
+    - str: The timestamp of the message.
+    """
+
+    year = match.group('year')
+    if len(year) == 2: year = f'20{year}'
+
+    return f"{match.group('day')}/{match.group('month')}/{year} {_hour(match.group('hour'), match.group('meridiem'))}:{match.group('minute')}:{match.group('second') or '00'}"
+
+
+def _hour(hour, meridiem) -> str:
+    """
+    Converts the hour of a header to the 24-hour clock, e.g. '2' and 'PM' to '14', or '12' and 'AM' to '0'.
+
+    Parameters:
+    - hour (str): Hour of the header.
+    - meridiem (str): 'AM' or 'PM' in any case, or None if the header is on a 24-hour clock.
+
+    Returns:
+    - str: The hour on the 24-hour clock.
+    """
+
+    if meridiem is None: return hour
+
+    return str(int(hour) % 12 + (12 if meridiem.lower() == 'pm' else 0))
+
+
+def iter_messages(lines, info: dict):
+    """
+    Iterates over the messages of a WhatsApp export in a single pass.
+
+    Lines that don't start with a header are continuations of the previous message, so a message is
+    only yielded once the next header (or the end of the export) is reached. Header lines without a
+    sender (Android system notifications) are skipped.
+
+    Parameters:
+    - lines (iterable): Raw lines of the export, e.g. an open file object.
+    - info (dict): Dictionary filled with the 'first_line', 'last_line', 'apple_device' and 'header'
+      information of the export while the lines are read. 'header' is None if the format of the
+      export was not recognized, in which case no message is yielded.
+
+    Yields:
+    - tuple: The timestamp, sender and content of each message.
+    """
+
+    info.update({"first_line": None, "last_line": None, "apple_device": False, "header": None})
+    header = None
+    timestamp = who_sended = message_parts = None
+
+    for line in lines:
+        line = clean_line(line)
+        info["last_line"] = line
+
+        if header is None:
+            if info["first_line"] is None:
+                info["first_line"] = line
+                header = info["header"] = detect_header(line)
+                info["apple_device"] = is_apple_line(line)
+            # Format not recognized, keep reading only to know the last line
+            if header is None: continue
+
+        match = header.match(line)
+
+        # If there's no match, it means the line is a continuation of the last message
+        if not match:
+            if message_parts is not None: message_parts.append(line)
+            continue
+
+        if message_parts is not None: yield timestamp, who_sended, '\n'.join(message_parts).strip()
+
+        if match.group('who_sended') is None:
+            message_parts = None
+            continue
+
+        timestamp = format_timestamp(match)
+        who_sended = match.group('who_sended')
+        message_parts = [match.group('message')]
+
+    if message_parts is not None: yield timestamp, who_sended, '\n'.join(message_parts).strip()
+
+
+def parse_lines(lines) -> tuple:
+    """
+    Parses the lines of a WhatsApp export in a single pass.
+
+    Parameters:
+    - lines (iterable): Raw lines of the export, e.g. an open file object.
+
+    Returns:
+    - tuple: A dictionary with the 'timestamp', 'who_sended' and 'message' columns and a dictionary
+      with the 'first_line', 'last_line' and 'apple_device' information of the export. The columns
+      are None if the format of the export was not recognized.
+    """
+
+    result = {"timestamp": [], "who_sended": [], "message": []}
+    info = {}
+
+    for timestamp, who_sended, message in iter_messages(lines, info):
+        result["timestamp"].append(timestamp)
+        result["who_sended"].append(who_sended)
+        result["message"].append(message)
+
+    if info["header"] is None: return None, info
+
+    return result, info
+
+
+def iter_chunks(lines, chunk_messages: int, info: dict):
+    """
+    Parses the lines of a WhatsApp export in chunks of complete messages.
+
+    Parameters:
+    - lines (iterable): Raw lines of the export, e.g. an open file object.
+    - chunk_messages (int): Maximum number of messages in each chunk.
+    - info (dict): Dictionary filled with the information of the export, see iter_messages.
+
+    Yields:
+    - dict: A dictionary with the 'timestamp', 'who_sended' and 'message' columns of the chunk.
+    """
+
+    result = {"timestamp": [], "who_sended": [], "message": []}
+
+    for timestamp, who_sended, message in iter_messages(lines, info):
+        result["timestamp"].append(timestamp)
+        result["who_sended"].append(who_sended)
+        result["message"].append(message)
+
+        if len(result["timestamp"]) >= chunk_messages:
+            yield result
+            result = {"timestamp": [], "who_sended": [], "message": []}
+
+    if info["header"] is None: raise ValueError("Format of the chat not recognized.")
+
+    if result["timestamp"]: yield result
+
+
+def _edge_lines(buffer) -> tuple:
+    """
+    Finds the first and last lines of a memory-mapped export, as iterating over the file would.
+
+    Parameters:
+    - buffer (mmap.mmap): The memory-mapped export.
+
+    Returns:
+    - tuple: The cleaned first and last lines.
+    """
+
+    size = len(buffer)
+    first_end = buffer.find(b'\n')
+    if first_end == -1: first_end = size
+
+    # A trailing line break doesn't start a new line
+    last_start = buffer.rfind(b'\n', 0, size - 1 if buffer[size - 1:size] == b'\n' else size) + 1
+
+    return (clean_line(str(buffer[:first_end], 'utf-8', 'replace')),
+            clean_line(str(buffer[last_start:], 'utf-8', 'replace')))
+
+
+def _buffer_info(buffer) -> dict:
+    """
+    Collects the information about a memory-mapped export.
+
+    Parameters:
+    - buffer (mmap.mmap): The memory-mapped export.
+
+    Returns:
+    - dict: The 'first_line', 'last_line', 'apple_device' and 'header' information of the export.
+    """
+
+    first_line, last_line = _edge_lines(buffer)
+    header = detect_header(first_line)
+
+    return {"first_line": first_line, "last_line": last_line, "apple_device": is_apple_line(first_line), "header": header}
+
+
+def _header_bytes(apple_device: bool):
+    """
+    Returns the bytes header regex of the device the chat was exported from.
+    """
+    return APPLE_HEADER_BYTES if apple_device else ANDROID_HEADER_BYTES
+
+
+def _as_source(source):
+    """
+    Returns the path of an export given as a path, or a binary file-like object for bytes and file-like objects.
+    """
+    if isinstance(source, (bytes, bytearray)): return io.BytesIO(source)
+    if hasattr(source, 'read'): return source
+    return os.fspath(source)
+
+
+def _chat_member(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    """
+    Finds the chat in a .zip export: the _chat.txt file, or the only .txt file of Android exports.
+    """
+
+    members = [member for member in archive.infolist() if member.filename.lower().endswith('.txt')]
+    for member in members:
+        if os.path.basename(member.filename) == ZIP_CHAT_NAME: return member
+    if members: return members[0]
+
+    raise ValueError("No chat found in the .zip export.")
+
+
+def is_zip(source) -> bool:
+    """
+    Tells whether a WhatsApp export, see read_export for the kinds of exports, is a .zip file.
+    """
+    return zipfile.is_zipfile(_as_source(source))
+
+
+@contextlib.contextmanager
+def _open_zip_chat(source):
+    """
+    Opens the chat of a .zip export as a binary stream, decompressed as it is read.
+    """
+    with zipfile.ZipFile(source) as archive, archive.open(_chat_member(archive)) as data:
+        yield data
+
+
+def read_export(source):
+    """
+    Reads the chat of a WhatsApp export given as the path of a .txt or .zip file, as bytes, or as a binary
+    file-like object, in the form the other functions of this module accept.
+
+    The chat of a .zip export is decompressed in memory, without extracting the archive: use open_text to
+    stream it instead.
+
+    Parameters:
+    - source (str, bytes or file-like): The export.
+
+    Returns:
+    - str or bytes: The path of the .txt file, or the content of the chat.
+    """
+
+    source = _as_source(source)
+
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return archive.read(_chat_member(archive))
+
+    if isinstance(source, str): return source
+
+    source.seek(0)
+    return source.read()
+
+
+@contextlib.contextmanager
+def open_text(source):
+    """
+    Opens the chat of a WhatsApp export as text, see read_export for the kinds of exports.
+
+    The chat of a .zip export is streamed out of the archive, so that it is never held in memory as a whole.
+
+    Parameters:
+    - source (str, bytes or file-like): The export.
+
+    Yields:
+    - io.TextIOBase: The lines of the chat.
+    """
+
+    source = _as_source(source)
+
+    if zipfile.is_zipfile(source):
+        with _open_zip_chat(source) as data:
+            yield io.TextIOWrapper(data, encoding='utf-8')
+
+    elif isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as data:
+            yield data
+
+    else:
+        source.seek(0)
+        data = io.TextIOWrapper(source, encoding='utf-8')
+        # Don't close the file-like object of the caller along with the wrapper
+        try: yield data
+        finally: data.detach()
+
+
+def index_media(source) -> list:
+    """
+    Lists the media files of a .zip export, reading only the directory of the archive, i.e. without decompressing them.
+
+    Parameters:
+    - source (str, bytes or file-like): The export.
+
+    Returns:
+    - list: A dictionary with the 'name', 'size', 'compressed_size' and 'type' (see MEDIA_TYPES) of each
+      media file. Empty if the export is not a .zip file.
+    """
+
+    source = _as_source(source)
+    if not zipfile.is_zipfile(source): return []
+
+    with zipfile.ZipFile(source) as archive:
+        chat = _chat_member(archive)
+        return [{'name': member.filename,
+                 'size': member.file_size,
+                 'compressed_size': member.compress_size,
+                 'type': MEDIA_TYPES.get(os.path.splitext(member.filename)[1][1:].lower(), 'Document')}
+                for member in archive.infolist() if member is not chat and not member.is_dir()]
+
+
+@contextlib.contextmanager
+def _map_export(txt_file):
+    """
+    Yields the content of an export: the memory-mapped file if given its path, or the bytes themselves.
+    """
+
+    if not isinstance(txt_file, str):
+        yield txt_file
+        return
+
+    with open(txt_file, 'rb') as data:
+        if os.fstat(data.fileno()).st_size == 0:
+            yield b''
+            return
+
+        with mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def scan_file(txt_file: str) -> tuple:
+    """
+    Parses a WhatsApp export by memory-mapping it and scanning the raw bytes for message headers.
+
+    The file is never decoded as a whole nor split into lines: only the timestamp, sender and
+    content of each message are decoded, straight from the mapped file.
+
+    Parameters:
+    - txt_file (str or bytes): Path to the .txt file, or the content of the export.
+
+    Returns:
+    - tuple: The columns and information of the export, as returned by parse_lines.
+    """
+
+    with _map_export(txt_file) as buffer:
+        if not buffer: return parse_lines(())
+
+        info = _buffer_info(buffer)
+        if info["header"] is None: return None, info
+
+        return _scan_buffer(buffer, _header_bytes(info["apple_device"])), info
+
+
+def shard_file(txt_file: str, shards: int, min_shard_bytes: int = 1 << 20) -> tuple:
+    """
+    Splits a WhatsApp export in byte ranges that start at message headers, so that no message is cut.
+
+    Parameters:
+    - txt_file (str or bytes): Path to the .txt file, or the content of the export.
+    - shards (int): Maximum number of ranges.
+    - min_shard_bytes (int, optional): Minimum size of a range, so that small exports aren't split.
+
+    Returns:
+    - tuple: A list of (start, end) byte ranges covering the whole export, and the information of the
+      export, as returned by parse_lines. The list is empty if the format of the export was not recognized.
+    """
+
+    with _map_export(txt_file) as buffer:
+        size = len(buffer)
+        if size == 0: return [], parse_lines(())[1]
+
+        info = _buffer_info(buffer)
+        if info["header"] is None: return [], info
+
+        header_bytes = _header_bytes(info["apple_device"])
+        shards = max(1, min(shards, size // min_shard_bytes))
+        boundaries = [0]
+
+        for shard in range(1, shards):
+            # Move each boundary forward to the next message header
+            match = header_bytes.search(buffer, max(size * shard // shards, boundaries[-1] + 1))
+            if match is None: break
+            boundaries.append(match.start())
+
+        boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:])), info
+
+
+def scan_range(txt_file: str, start: int, end: int, apple_device: bool) -> dict:
+    """
+    Parses the messages of a byte range of a WhatsApp export, as returned by shard_file.
+
+    Parameters:
+    - txt_file (str or bytes): Path to the .txt file, or the content of the export.
+    - start (int): Offset of the first message of the range.
+    - end (int): Offset where the range ends.
+    - apple_device (bool): Whether the chat was downloaded from an Apple device.
+
+    Returns:
+    - dict: A dictionary with the 'timestamp', 'who_sended' and 'message' columns.
+    """
+
+    with _map_export(txt_file) as buffer:
+        return _scan_buffer(buffer, _header_bytes(apple_device), start, end)
+
+
+def hash_export(txt_file, prefix: int = None) -> dict:
+    """
+    Hashes the content of a WhatsApp export, and optionally the first bytes of it, in a single pass.
+
+    Parameters:
+    - txt_file (str, bytes or file-like): Path to the .txt file, or the content of the export. A .zip export, given
+      in any of the forms of read_export, is hashed by the content of its chat, streamed out of the archive.
+    - prefix (int, optional): Number of bytes of the prefix to be hashed as well.
+
+    Returns:
+    - dict: The 'size' and 'sha256' of the export, and the 'prefix_sha256' of its first prefix bytes
+      (None if prefix was not provided or the export is shorter than it).
+    """
+
+    if is_zip(txt_file):
+        with _open_zip_chat(_as_source(txt_file)) as data:
+            return _hash_blocks(iter(lambda: data.read(1 << 20), b''), prefix)
+
+    with _map_export(txt_file) as buffer, memoryview(buffer) as view:
+        return _hash_blocks([view], prefix)
+
+
+def stamp_export(txt_file):
+    """
+    Stamps an export given as a path with the size and modification time of the file, which change along with its
+    content, e.g. to tell whether it can still be hashed as it was parsed.
+
+    Returns:
+    - tuple or None: The stamp of the file, or None if the export was not given as a path.
+    """
+
+    if not isinstance(txt_file, str): return None
+
+    stat = os.stat(txt_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _hash_blocks(blocks, prefix: int = None) -> dict:
+    """
+    Hashes the content of an export given in consecutive blocks, see hash_export.
+    """
+
+    digest = hashlib.sha256()
+    prefix_digest = None
+    size = 0
+
+    for block in blocks:
+        if prefix is not None and prefix_digest is None and size + len(block) >= prefix:
+            digest.update(block[:prefix - size])
+            prefix_digest = digest.copy()
+            block = block[prefix - size:]
+            size = prefix
+
+        digest.update(block)
+        size += len(block)
+
+    if prefix is not None and prefix_digest is None and prefix <= size: prefix_digest = digest.copy()
+
+    return {"size": size, "sha256": digest.hexdigest(), "prefix_sha256": prefix_digest.hexdigest() if prefix_digest else None}
+
+
+def scan_tail(txt_file: str, offset: int, apple_device: bool) -> tuple:
+    """
+    Parses the messages added to a WhatsApp export after a byte offset, e.g. the end of a previous export.
+
+    Parameters:
+    - txt_file (str or bytes): Path to the .txt file, or the content of the export.
+    - offset (int): Offset where the new content starts.
+    - apple_device (bool): Whether the chat was downloaded from an Apple device.
+
+    Returns:
+    - tuple: The columns of the new messages and the information of the export, as returned by parse_lines.
+      The columns are None if the new content doesn't start with a new message, i.e. it continues the
+      last message already parsed.
+    """
+
+    with _map_export(txt_file) as buffer:
+        size = len(buffer)
+        if size == 0: return None, parse_lines(())[1]
+
+        info = _buffer_info(buffer)
+        header_bytes = _header_bytes(apple_device)
+
+        match = header_bytes.search(buffer, offset)
+        start = match.start() if match else size
+        if buffer[offset:start].strip(): return None, info
+
+        return _scan_buffer(buffer, header_bytes, start, size), info
+
+
+def _scan_buffer(buffer, header_bytes, start: int = 0, end: int = None) -> dict:
+    """
+    Builds the columns of the export from the message headers found in a buffer.
+
+    Parameters:
+    - buffer (bytes-like): Raw content of the export.
+    - header_bytes (re.Pattern): APPLE_HEADER_BYTES or ANDROID_HEADER_BYTES.
+    - start (int, optional): Offset where the scan starts.
+    - end (int, optional): Offset where the scan ends. Defaults to the end of the buffer.
+
+    Returns:
+    - dict: A dictionary with the 'timestamp', 'who_sended' and 'message' columns.
+    """
+
+    if end is None: end = len(buffer)
+    timestamps, senders, messages = [], [], []
+    previous = None
+
+    for match in header_bytes.finditer(buffer, start, end):
+        # Decode only the fields of the message, straight from the buffer
+        if previous is not None: messages.append(_clean_field(buffer[previous:match.start()].decode('utf-8', 'replace')).strip())
+
+        who_sended = match.group('who_sended')
+
+        # Header lines without a sender are system notifications
+        if who_sended is None:
+            previous = None
+            continue
+
+        timestamps.append(_bytes_timestamp(match))
+        senders.append(_clean_field(who_sended.decode('utf-8', 'replace')))
+        previous = match.end()
+
+    if previous is not None: messages.append(_clean_field(buffer[previous:end].decode('utf-8', 'replace')).strip())
+
+    return {"timestamp": timestamps, "who_sended": senders, "message": messages}
+
+
+def _bytes_timestamp(match) -> str:
+    """
+    Builds the timestamp of a message in the '%d/%m/%Y %H:%M:%S' format from a bytes header match.
+
+    Parameters:
+    - match (re.Match): Match of APPLE_HEADER_BYTES or ANDROID_HEADER_BYTES.
+
+    Returns:
+    - str: The timestamp of the message.
+    """
+
+    # Most exports already have four-digit years, seconds and a 24-hour clock, only the comma has to go
+    if match.end('second') != -1 and match.end('meridiem') == -1 and match.end('year') - match.start('year') == 4:
+        return match.group('timestamp').decode('ascii').replace(',', '')
+
+    day, month, year, hour, minute, second, meridiem = (field and field.decode('ascii') for field in
+                                                        match.group('day', 'month', 'year', 'hour', 'minute', 'second', 'meridiem'))
+    if len(year) == 2: year = f'20{year}'
+
+    return f"{day}/{month}/{year} {_hour(hour, meridiem)}:{minute}:{second or '00'}"
+
+
+def _clean_field(field: str) -> str:
+    """
+    Removes the invisible characters and carriage returns from a decoded field of the export.
+
+    Parameters:
+    - field (str): Decoded sender or content of a message.
+
+    Returns:
+    - str: The cleaned field.
+    """
+
+    if '\r' in field: field = field.replace('\r', '')
+    for character in INVISIBLE_CHARACTERS:
+        if character in field: field = field.replace(character, '')
+
+    return field
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class Dashboard:
+    def __init__(self, chat, workers: int = 4):
+        """
+        Initializes a Dashboard instance, which builds the graphs of a chat in a pool of threads, so that each
+        one can be shown as soon as it is ready instead of after all the graphs before it.
+
+        The graphs are built in threads rather than processes because they read the parsed chat in place, and
+        the graph methods of WhatsAppParser are safe to call from several threads (see _cached_figure).
+
+        Parameters:
+        - chat (WhatsAppParser): The parsed chat.
+        - workers (int, optional): Number of threads building graphs at once.
+        """
+
+        self.chat = chat
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dashboard')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _job_key(method: str, arguments: dict) -> tuple:
+        """
+        Returns the key of a call to a graph method, the name of the method and the value of each argument.
+        """
+        return (method,) + tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                                        for name, value in arguments.items()))
+
+    def submit(self, graphs: dict) -> dict:
+        """
+        Starts building the graphs of the dashboard, e.g. for a new date range.
+
+        A graph that is already being built with the same arguments is not built again, and the graphs of the
+        previous call that are no longer asked for are cancelled if they have not started yet.
+
+        Parameters:
+        - graphs (dict): The method of WhatsAppParser that builds each graph ('generate_activity_heatmap', ...) and
+          its keyword arguments, as a tuple (method, arguments), by name of the graph.
+
+        Returns:
+        - dict: The Future of each graph, by name of the graph, e.g. for concurrent.futures.as_completed.
+        """
+
+        keys = {name: self._job_key(method, arguments) for name, (method, arguments) in graphs.items()}
+
+        with self._lock:
+            jobs = {}
+            for name, (method, arguments) in graphs.items():
+                future = self._jobs.get(keys[name])
+                if future is None or future.cancelled(): future = self._executor.submit(getattr(self.chat, method), **arguments)
+                jobs[keys[name]] = future
+
+            for key, future in self._jobs.items():
+                if key not in jobs: future.cancel()
+            self._jobs = jobs
+
+        return {name: jobs[key] for name, key in keys.items()}
+
+    def shutdown(self):
+        """
+        Cancels the graphs that have not started yet and stops the threads once the running ones are built,
+        e.g. when another chat is uploaded.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+import xlsxwriter
+import datetime
+import pandas as pd
+import numpy as np
+
+# File formats a chat can be exported to, and their MIME types
+FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+    'csv': 'text/csv',
+    'csv.gz': 'application/gzip',
+}
+
+# Number formats of the dates and times, as pandas writes them to Excel
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+DATE_FORMAT = 'yyyy-mm-dd'
+
+# Rows of an Excel worksheet, the header included
+EXCEL_MAX_ROWS = 1048576
+
+# Excel serial number of 1970-01-01
+EXCEL_EPOCH = 25569
+
+
+def _excel_column(column: pd.Series) -> tuple:
+    """
+    Converts a column to the values of its cells and the kind of cell they are written as, at once for the whole
+    column: dates and timestamps become Excel serial numbers, categories and other objects strings.
+
+    Returns:
+    - tuple: The values of the cells (None for the missing ones), and 'number', 'boolean', 'string', 'date' or
+      'datetime'.
+    """
+
+    missing = column.isna().to_numpy()
+    first = column[~missing].iloc[0] if (~missing).any() else None
+
+    if pd.api.types.is_datetime64_any_dtype(column.dtype) or isinstance(first, datetime.date):
+        kind = 'datetime' if pd.api.types.is_datetime64_any_dtype(column.dtype) or isinstance(first, datetime.datetime) else 'date'
+        nanoseconds = pd.to_datetime(column).to_numpy('datetime64[ns]').astype(np.int64)
+        values = (nanoseconds / 86400e9 + EXCEL_EPOCH).astype(object)
+    elif pd.api.types.is_bool_dtype(column.dtype):
+        kind, values = 'boolean', column.to_numpy(dtype=object)
+    elif pd.api.types.is_numeric_dtype(column.dtype):
+        kind, values = 'number', column.to_numpy(dtype=np.float64).astype(object)
+    else:
+        kind, values = 'string', column.astype(str).to_numpy(dtype=object)
+
+    values[missing] = None
+
+    return values.tolist(), kind
+
+
+def write_xlsx(dataframe: pd.DataFrame, target):
+    """
+    Writes a DataFrame to an Excel workbook, row by row in xlsxwriter's constant_memory mode, so that only the
+    current row is kept in memory. The cells look as with DataFrame.to_excel(index=False), except that the
+    strings are always written as text, never as formulas.
+
+    Parameters:
+    - dataframe (pd.DataFrame): DataFrame to write.
+    - target (str or file-like): Path of the workbook, or binary file-like object to write it to.
+    """
+
+    if len(dataframe) >= EXCEL_MAX_ROWS:
+        raise ValueError(f"An Excel worksheet holds at most {EXCEL_MAX_ROWS - 1} rows, not {len(dataframe)}: "
+                         f"export the chat to parquet or csv instead")
+
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+    worksheet = workbook.add_worksheet()
+    header = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    formats = {'date': workbook.add_format({'num_format': DATE_FORMAT}),
+               'datetime': workbook.add_format({'num_format': DATETIME_FORMAT})}
+    methods = {'number': worksheet.write_number, 'boolean': worksheet.write_boolean, 'string': worksheet.write_string,
+               'date': worksheet.write_number, 'datetime': worksheet.write_number}
+
+    worksheet.write_row(0, 0, [str(name) for name in dataframe.columns], header)
+
+    values, writers = [], []
+    for position, name in enumerate(dataframe.columns):
+        column_values, kind = _excel_column(dataframe[name])
+        values.append(column_values)
+        writers.append((position, methods[kind], formats.get(kind)))
+
+    for row, cells in enumerate(zip(*values), start=1):
+        for (position, write, cell_format), value in zip(writers, cells):
+            if value is not None: write(row, position, value, cell_format)
+
+    workbook.close()
+
+
+def write(dataframe: pd.DataFrame, target, file_format: str = 'xlsx'):
+    """
+    Writes a DataFrame to a file in one of FORMATS, without its index.
+
+    Parameters:
+    - dataframe (pd.DataFrame): DataFrame to write.
+    - target (str or file-like): Path of the file, or binary file-like object to write it to.
+    - file_format (str, optional): 'xlsx' (see write_xlsx), 'parquet', 'csv', or 'csv.gz' for a gzipped csv.
+    """
+
+    if file_format == 'xlsx': write_xlsx(dataframe, target)
+    elif file_format == 'parquet': dataframe.to_parquet(target, index=False)
+    elif file_format == 'csv': dataframe.to_csv(target, index=False, encoding='utf-8')
+    elif file_format == 'csv.gz': dataframe.to_csv(target, index=False, encoding='utf-8', compression={'method': 'gzip', 'mtime': 0})
+    else: raise ValueError(f"file_format must be one of {list(FORMATS)}, not {file_format!r}")
@@ -0,0 +1,257 @@
+import plotly.graph_objs as go
+import plotly.colors
+import pandas as pd
+import numpy as np
+
+# Colors of the traces without a color of their own, as plotly express picks them
+DEFAULT_COLORS = plotly.colors.qualitative.Plotly
+
+# Number of points of a graph beyond which plotly express draws the lines with WebGL
+WEBGL_POINTS = 1000
+
+# Periods the days of a time series can be grouped in, from the finest
+BUCKETS = ['day', 'week', 'month']
+
+
+def groups(keys, *columns, order: list = None) -> list:
+    """
+    Splits arrays by the value of a key, e.g. the points of each sender, without a groupby.
+
+    Parameters:
+    - keys (array-like): Key of each element.
+    - *columns (array-like): Arrays to split, of the same length as keys.
+    - order (list, optional): Keys that come first, in this order, as with the category_orders of plotly express.
+
+    Returns:
+    - list: A tuple (key, *slices of the columns) for each distinct key, in the order the keys first appear.
+    """
+
+    keys = np.asarray(keys, dtype=object)
+    if order:
+        present = set(keys)
+        first = [key for key in order if key in present]
+        keys_order = first + [key for key in pd.unique(keys) if key not in set(first)]
+        codes, uniques = pd.Categorical(keys, categories=keys_order).codes.astype(np.int64), np.array(keys_order, dtype=object)
+    else:
+        codes, uniques = pd.factorize(keys)
+
+    positions = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[positions], np.arange(len(uniques) + 1))
+    columns = [np.asarray(column)[positions] for column in columns]
+
+    return [(key, *(column[bounds[code]:bounds[code + 1]] for column in columns)) for code, key in enumerate(uniques)]
+
+
+def choose_bucket(days: np.ndarray, max_points: int) -> str:
+    """
+    Chooses the finest period that puts at most max_points points on each line of a time series.
+
+    Parameters:
+    - days (np.ndarray): Sorted days of the series (datetime64[D]).
+    - max_points (int): Maximum number of points of a line.
+
+    Returns:
+    - str: 'day', 'week' or 'month'.
+    """
+
+    span = int((days[-1] - days[0]).astype(np.int64)) + 1 if len(days) else 0
+    if span <= max_points: return 'day'
+    if span / 7 <= max_points: return 'week'
+    return 'month'
+
+
+def resample(days: np.ndarray, counts: np.ndarray, bucket: str) -> tuple:
+    """
+    Sums the rows of a time series per day, week (starting on Monday) or month.
+
+    Parameters:
+    - days (np.ndarray): Sorted days of the series (datetime64[D]).
+    - counts (np.ndarray): Values of each day, of shape (days, ...).
+    - bucket (str): 'day', 'week' or 'month'.
+
+    Returns:
+    - tuple: The first day of each period with days in the series, and the sum of the values of its days.
+    """
+
+    if bucket == 'day': return days, counts
+    if bucket == 'week': starts = days - (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    elif bucket == 'month': starts = days.astype('datetime64[M]').astype('datetime64[D]')
+    else: raise ValueError(f"bucket must be one of {BUCKETS} or 'auto', not {bucket!r}")
+
+    periods, positions = np.unique(starts, return_index=True)
+    if not len(days): return periods, counts
+
+    return periods, np.add.reduceat(counts, positions, axis=0)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Downsamples a line with the Largest-Triangle-Three-Buckets algorithm: the points between the first and the last
+    are split in buckets, and the point of each bucket that forms the largest triangle with the point kept in the
+    previous bucket and the mean of the next one is kept, which preserves the peaks and the shape of the line.
+
+    Parameters:
+    - x (np.ndarray): Position of the points, sorted (numbers or datetime64).
+    - y (np.ndarray): Value of the points.
+    - points (int): Number of points to keep, at least 3.
+
+    Returns:
+    - np.ndarray: The positions of the points kept, sorted.
+    """
+
+    if points >= len(x) or points < 3: return np.arange(len(x))
+
+    x = x.astype(np.int64).astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) else x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, len(x) - 1, points - 1).astype(np.int64)
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, len(x) - 1
+
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else len(x)
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        previous = kept[bucket]
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        kept[bucket + 1] = start + areas.argmax()
+
+    return kept
+
+
+def bar(x,
+        y,
+        name: str = '',
+        color=None,
+        hovertemplate: str = None,
+        **properties
+        ) -> go.Bar:
+    """
+    Builds a vertical bar trace from arrays, with the properties plotly express gives its bar traces.
+
+    Parameters:
+    - x (array-like): Position of the bars.
+    - y (array-like): Height of the bars.
+    - name (str, optional): Name of the trace in the legend. A trace without a name is left out of the legend.
+    - color (optional): Color of the bars, or the values mapped to the color axis.
+    - hovertemplate (str, optional): Template of the hover labels.
+    - **properties: Other properties of the trace, e.g. text, hovertext or textposition.
+
+    Returns:
+    - go.Bar: The bar trace.
+    """
+
+    marker = dict(color=color, pattern=dict(shape=''))
+    if 'coloraxis' in properties: marker['coloraxis'] = properties.pop('coloraxis')
+
+    return go.Bar(**{'alignmentgroup': 'True', 'hovertemplate': hovertemplate, 'legendgroup': name, 'marker': marker,
+                     'name': name, 'offsetgroup': name, 'orientation': 'v', 'showlegend': bool(name),
+                     'textposition': 'auto', 'x': x, 'xaxis': 'x', 'y': y, 'yaxis': 'y', **properties})
+
+
+def line(x,
+         y,
+         name: str,
+         color: str,
+         hovertemplate: str,
+         webgl: bool = False
+         ):
+    """
+    Builds a line trace from arrays, with the properties plotly express gives its line traces.
+
+    Parameters:
+    - x (array-like): Position of the points.
+    - y (array-like): Value of the points.
+    - name (str): Name of the trace in the legend.
+    - color (str): Color of the line.
+    - hovertemplate (str): Template of the hover labels.
+    - webgl (bool, optional): If True, the line is drawn with WebGL, as plotly express does beyond WEBGL_POINTS points.
+
+    Returns:
+    - go.Scatter or go.Scattergl: The line trace.
+    """
+
+    properties = dict(hovertemplate=hovertemplate, legendgroup=name, line=dict(color=color, dash='solid'), mode='lines',
+                      name=name, showlegend=True, x=x, xaxis='x', y=y, yaxis='y')
+
+    return go.Scattergl(**properties) if webgl else go.Scatter(orientation='v', **properties)
+
+
+def pie(labels, values) -> go.Pie:
+    """
+    Builds a pie trace from arrays, with the properties plotly express gives its pie traces.
+    """
+
+    return go.Pie(domain=dict(x=[0.0, 1.0], y=[0.0, 1.0]), hovertemplate='label=%{label}<br>value=%{value}<extra></extra>',
+                  labels=labels, legendgroup='', name='', showlegend=True, values=values)
+
+
+def heatmap(z: np.ndarray,
+            x,
+            y,
+            contrast: float = 0.3,
+            **properties
+            ) -> list:
+    """
+    Builds a heatmap with the value of each cell written on it.
+
+    The values are a single text trace over the heatmap instead of an annotation per cell, which is much faster
+    to build and serialize. A value is written in white on the cells above a share of the maximum, else in black.
+
+    Parameters:
+    - z (np.ndarray): Values of the cells, of shape (len(y), len(x)).
+    - x (array-like): Columns of the heatmap.
+    - y (array-like): Rows of the heatmap.
+    - contrast (float, optional): Share of the maximum above which the values are written in white.
+    - **properties: Other properties of the heatmap trace, e.g. colorscale or hovertemplate.
+
+    Returns:
+    - list: The heatmap trace and the text trace.
+    """
+
+    values = z.ravel()
+
+    return [go.Heatmap(z=z, x=x, y=y, zmin=0, zmax=z.max(), **properties),
+            go.Scatter(x=np.tile(np.asarray(x), len(y)),
+                       y=np.repeat(np.asarray(y, dtype=object), len(x)),
+                       text=values.astype(np.int64).astype(str),
+                       mode='text',
+                       textfont=dict(color=np.where(values > z.max() * contrast, 'white', 'black')),
+                       hoverinfo='skip',
+                       showlegend=False)]
+
+
+def layout(title: str,
+           x_title: str = None,
+           y_title: str = None,
+           legend_title: str = None,
+           xaxis: dict = None,
+           yaxis: dict = None,
+           **properties
+           ) -> dict:
+    """
+    Builds the layout plotly express gives a figure with a single plot.
+
+    Parameters:
+    - title (str): Title of the figure.
+    - x_title (str, optional): Title of the x axis.
+    - y_title (str, optional): Title of the y axis.
+    - legend_title (str, optional): Title of the legend.
+    - xaxis (dict, optional): Other properties of the x axis.
+    - yaxis (dict, optional): Other properties of the y axis.
+    - **properties: Other properties of the layout, e.g. barmode.
+
+    Returns:
+    - dict: The layout, for go.Figure.
+    """
+
+    figure_layout = dict(legend=dict(tracegroupgap=0), title=dict(text=title), **properties)
+    if legend_title is not None: figure_layout['legend']['title'] = dict(text=legend_title)
+
+    if x_title is not None:
+        figure_layout['xaxis'] = dict(anchor='y', domain=[0.0, 1.0], title=dict(text=x_title), **(xaxis or {}))
+    if y_title is not None:
+        figure_layout['yaxis'] = dict(anchor='x', domain=[0.0, 1.0], title=dict(text=y_title), **(yaxis or {}))
+
+    return figure_layout
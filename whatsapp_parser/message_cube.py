@@ -0,0 +1,270 @@
+from utils import Utils
+import pandas as pd
+import numpy as np
+
+
+class MessageCube:
+    def __init__(self,
+                 days: np.ndarray,
+                 senders: list,
+                 types: list,
+                 counts: np.ndarray,
+                 hours: np.ndarray,
+                 first_seen: np.ndarray,
+                 first: np.ndarray,
+                 last: np.ndarray):
+        """
+        Initializes a MessageCube instance, the number of messages of a chat per day, sender, type of message and hour,
+        which every graph but the word cloud is built from.
+
+        The counts are stored as dense arrays of prefix sums over the days, so that the counts of any date range
+        are the difference of two rows: aggregating a range costs time proportional to the number of cells, not to
+        the number of messages. The weekday of each count is the weekday of its day, so it's not a dimension of its own.
+
+        Use from_frame to build a cube from a tidy chat DataFrame.
+
+        Parameters:
+        - days (np.ndarray): Sorted distinct days of the messages (datetime64[D]).
+        - senders (list): Senders of the messages, in the order they first sent a message.
+        - types (list): Types of message (Text, Audio, ...).
+        - counts (np.ndarray): Number of messages per day, sender and type, of shape (days, senders, types).
+        - hours (np.ndarray): Number of messages per day and hour, of shape (days, 24).
+        - first_seen (np.ndarray): Position in the chat of the first message of each sender on each day, of shape
+          (days, senders), or -1 if the sender sent no message that day.
+        - first (np.ndarray): Sender of the first message of each day.
+        - last (np.ndarray): Sender of the last message of each day.
+        """
+
+        self.days = days
+        self.senders = list(senders)
+        self.types = list(types)
+        self.first_seen = first_seen
+        self.first = first
+        self.last = last
+
+        # Row i is the sum of the counts of the days before days[i]
+        self.cumulative_counts = np.concatenate([np.zeros((1,) + counts.shape[1:], dtype=np.int64), counts.cumsum(axis=0)])
+        self.cumulative_hours = np.concatenate([np.zeros((1, 24), dtype=np.int64), hours.cumsum(axis=0)])
+
+    @classmethod
+    def from_frame(cls, chat_dataframe: pd.DataFrame):
+        """
+        Builds the cube of a tidy chat DataFrame (or chunk of it), in the standard or compact layout.
+
+        Parameters:
+        - chat_dataframe (pd.DataFrame): Tidy chat DataFrame.
+
+        Returns:
+        - MessageCube: The cube of the chat.
+        """
+
+        days, day_codes = np.unique(chat_dataframe['timestamp'].values.astype('datetime64[D]'), return_inverse=True)
+        sender_codes, senders = pd.factorize(chat_dataframe['who_sended'])
+        message_type = pd.Categorical(chat_dataframe['message_type'])
+        hours = chat_dataframe['hour'].values.astype(np.int64)
+        shape = (len(days), len(senders), len(message_type.categories))
+
+        counts = np.bincount(np.ravel_multi_index((day_codes, sender_codes, message_type.codes), shape),
+                             minlength=int(np.prod(shape))).reshape(shape)
+        hour_counts = np.bincount(day_codes * 24 + hours, minlength=len(days) * 24).reshape(len(days), 24)
+
+        pairs, first_rows = np.unique(day_codes * len(senders) + sender_codes, return_index=True)
+        first_seen = np.full(shape[:2], -1, dtype=np.int64)
+        first_seen.flat[pairs] = first_rows
+
+        first = sender_codes[np.unique(day_codes, return_index=True)[1]]
+        last = sender_codes[len(day_codes) - 1 - np.unique(day_codes[::-1], return_index=True)[1]]
+
+        return cls(days, list(senders), list(message_type.categories), counts, hour_counts, first_seen, first, last)
+
+    @property
+    def messages(self) -> int:
+        """
+        Number of messages in the cube.
+        """
+        return int(self.cumulative_hours[-1].sum())
+
+    def merge(self, other):
+        """
+        Merges the cube of the messages that come after the ones of this cube, e.g. of the next chunk of the chat.
+
+        Parameters:
+        - other (MessageCube): Cube of the later messages.
+
+        Returns:
+        - MessageCube: The cube of the messages of both.
+        """
+
+        senders = self.senders + [sender for sender in other.senders if sender not in set(self.senders)]
+        types = self.types + [message_type for message_type in other.types if message_type not in set(self.types)]
+        days = np.union1d(self.days, other.days)
+
+        counts = np.zeros((len(days), len(senders), len(types)), dtype=np.int64)
+        hours = np.zeros((len(days), 24), dtype=np.int64)
+        first_seen = np.full((len(days), len(senders)), -1, dtype=np.int64)
+        first, last = np.full(len(days), -1), np.full(len(days), -1)
+        offset = self.messages
+
+        # Later messages only fill in what the earlier ones leave out, except for the last sender of each day
+        for cube in (other, self):
+            day_index = days.searchsorted(cube.days)
+            sender_index = np.array([senders.index(sender) for sender in cube.senders], dtype=np.int64)
+            type_index = np.array([types.index(message_type) for message_type in cube.types], dtype=np.int64)
+
+            counts[np.ix_(day_index, sender_index, type_index)] += np.diff(cube.cumulative_counts, axis=0)
+            hours[day_index] += np.diff(cube.cumulative_hours, axis=0)
+
+            seen = cube.first_seen + (offset if cube is other else 0)
+            seen[cube.first_seen == -1] = -1
+            current = first_seen[np.ix_(day_index, sender_index)]
+            first_seen[np.ix_(day_index, sender_index)] = np.where(seen == -1, current, seen)
+
+            first[day_index] = sender_index[cube.first]
+            if cube is other: last[day_index] = sender_index[cube.last]
+            else: last[day_index] = np.where(last[day_index] == -1, sender_index[cube.last], last[day_index])
+
+        return MessageCube(days, senders, types, counts, hours, first_seen, first, last)
+
+    def _range(self, start_date: str, end_date: str) -> tuple:
+        """
+        Returns the positions of a date range in days, see Utils.day_range.
+        """
+        return Utils.day_range(start_date, end_date, self.days)
+
+    def _totals(self, start_date: str, end_date: str) -> np.ndarray:
+        """
+        Returns the number of messages per sender and type in a date range.
+        """
+        first, last = self._range(start_date, end_date)
+        return self.cumulative_counts[max(first, last)] - self.cumulative_counts[first]
+
+    def messages_per_day_and_sender(self, start_date: str = None, end_date: str = None) -> tuple:
+        """
+        Counts the messages per day and sender in a date range, as a dense array.
+
+        Parameters:
+        - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
+        - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
+
+        Returns:
+        - tuple: The days with messages in the range (datetime64[D]), the senders with messages in the range, in the
+          order they first sent a message in it, and the number of messages of each sender on each day, of shape
+          (days, senders).
+        """
+
+        first, last = self._range(start_date, end_date)
+        last = max(first, last)
+        per_day = np.diff(self.cumulative_counts[first:last + 1], axis=0).sum(axis=2)
+
+        # No days in the range, e.g. a gap in the chat, or a start date after the end date
+        if not len(per_day): return self.days[first:last], np.array([], dtype=object), np.zeros((0, 0), dtype=np.int64)
+
+        # Order the senders by their first day in the range, then by their first message on that day
+        active = per_day > 0
+        first_day = active.argmax(axis=0)
+        first_seen = self.first_seen[first:last][first_day, np.arange(len(self.senders))]
+        sender = np.lexsort((first_seen, first_day))
+        sender = sender[active.any(axis=0)[sender]]
+
+        return self.days[first:last], np.array(self.senders, dtype=object)[sender], per_day[:, sender]
+
+    def messages_per_type(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Counts the messages per type in a date range.
+
+        Returns:
+        - pd.DataFrame: The 'message_type' and 'message' count of each type with messages, in the order of the types.
+        """
+
+        totals = self._totals(start_date, end_date).sum(axis=0)
+        codes = np.flatnonzero(totals)
+
+        return pd.DataFrame({'message_type': pd.Categorical.from_codes(codes, categories=self.types),
+                             'message': totals[codes]})
+
+    def messages_per_sender_and_type(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Counts the messages per sender and type in a date range.
+
+        Returns:
+        - pd.DataFrame: The 'who_sended', 'message_type' and 'message' count of each sender and type with messages,
+          by sender name and in the order of the types.
+        """
+
+        totals = self._totals(start_date, end_date)
+        senders = np.array(self.senders, dtype=object)
+        by_name = np.argsort(senders, kind='stable')
+
+        sender, codes = np.nonzero(totals[by_name])
+        sender = by_name[sender]
+
+        return pd.DataFrame({'who_sended': senders[sender],
+                             'message_type': pd.Categorical.from_codes(codes, categories=self.types),
+                             'message': totals[sender, codes]})
+
+    def messages_per_sender(self, start_date: str = None, end_date: str = None) -> pd.Series:
+        """
+        Counts the messages per sender in a date range.
+
+        Returns:
+        - pd.Series: The number of messages of each sender with messages, indexed by sender name ('who_sended').
+        """
+
+        totals = self._totals(start_date, end_date).sum(axis=1)
+        senders = np.array(self.senders, dtype=object)
+        sender = np.flatnonzero(totals)
+        sender = sender[np.argsort(senders[sender], kind='stable')]
+
+        return pd.Series(totals[sender], index=pd.Index(senders[sender], name='who_sended'), name='message')
+
+    def messages_per_hour(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Counts the messages per hour of the day in a date range.
+
+        Returns:
+        - pd.DataFrame: The 'hour' and 'message' count of each hour with messages, by hour.
+        """
+
+        first, last = self._range(start_date, end_date)
+        totals = self.cumulative_hours[max(first, last)] - self.cumulative_hours[first]
+        hour = np.flatnonzero(totals)
+
+        return pd.DataFrame({'hour': hour.astype(np.int64), 'message': totals[hour]})
+
+    def messages_per_weekday_and_hour(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Counts the messages per weekday and hour of the day in a date range.
+
+        Returns:
+        - pd.DataFrame: The 'weekday_number' (Monday is 1), 'hour' and 'message_count' of each weekday and hour
+          with messages, by weekday and hour.
+        """
+
+        first, last = self._range(start_date, end_date)
+        per_day = np.diff(self.cumulative_hours[first:max(first, last) + 1], axis=0)
+
+        # 1970-01-01, day 0, was a Thursday
+        weekday = (self.days[first:max(first, last)].astype(np.int64) + 3) % 7
+        grid = np.zeros((7, 24), dtype=np.int64)
+        np.add.at(grid, weekday, per_day)
+
+        weekday, hour = np.nonzero(grid)
+
+        return pd.DataFrame({'weekday_number': (weekday + 1).astype(np.int64),
+                             'hour': hour.astype(np.int64),
+                             'message_count': grid[weekday, hour]})
+
+    def first_last_senders(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Returns the senders of the first and last messages of each day in a date range.
+
+        Returns:
+        - pd.DataFrame: The 'date', and the 'first' and 'last' sender of each day with messages.
+        """
+
+        first, last = self._range(start_date, end_date)
+        senders = np.array(self.senders, dtype=object)
+
+        return pd.DataFrame({'date': self.days[first:last].astype(object),
+                             'first': senders[self.first[first:last]],
+                             'last': senders[self.last[first:last]]})
@@ -0,0 +1,127 @@
+from plotly.offline.offline import get_plotlyjs, get_plotlyjs_version
+import plotly.graph_objs as go
+import plotly.io as pio
+from io import BytesIO
+import base64
+import html
+import os
+
+# Name of the plotly.js bundle written next to the reports that share it
+PLOTLYJS_FILE = 'plotly.min.js'
+
+# Draws each figure of a report in its div, with the template it shares with the other figures
+DRAW_FIGURES = """
+figures.forEach(function (figure, position) {
+    figure.layout.template = templates[figure.template];
+    Plotly.newPlot('figure-' + position, figure.data, figure.layout, {responsive: true});
+});
+"""
+
+
+def write_plotlyjs(directory: str) -> str:
+    """
+    Writes the plotly.js bundle to a folder, to be shared by the reports that reference it, unless it's there already.
+
+    Parameters:
+    - directory (str): Folder of the bundle.
+
+    Returns:
+    - str: The path of the bundle.
+    """
+
+    file_path = os.path.join(directory, PLOTLYJS_FILE)
+    plotlyjs = get_plotlyjs().encode('utf-8')
+
+    if not os.path.exists(file_path) or os.path.getsize(file_path) != len(plotlyjs):
+        if not os.path.exists(directory): os.makedirs(directory)
+        with open(file_path, 'wb') as file: file.write(plotlyjs)
+
+    return file_path
+
+
+def _plotlyjs_script(include_plotlyjs, file_path: str) -> str:
+    """
+    Returns the script element that loads plotly.js in a report, see write_report.
+    """
+
+    if include_plotlyjs is True: return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    if include_plotlyjs is False: return ''
+
+    if include_plotlyjs == 'cdn': source = f'https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js'
+    elif include_plotlyjs == 'directory': source = os.path.basename(write_plotlyjs(os.path.dirname(os.path.abspath(file_path))))
+    else: source = include_plotlyjs
+
+    return f'<script type="text/javascript" src="{html.escape(source)}"></script>'
+
+
+def _image_element(image) -> str:
+    """
+    Returns an img element with a PIL image embedded as a PNG.
+    """
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+
+    return f'<img src="data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}" style="max-width: 100%">'
+
+
+def write_report(file_path: str,
+                 title: str,
+                 items: list,
+                 include_plotlyjs=True):
+    """
+    Writes several figures and images to a single HTML document.
+
+    plotly.js is included once for all the figures, and each figure is written as compact JSON without its
+    template, which is written once for all the figures that share it. Plotly draws the figures when the
+    document is opened, as with Figure.write_html.
+
+    Parameters:
+    - file_path (str): Path of the HTML document.
+    - title (str): Title of the document.
+    - items (list): The plotly figures (go.Figure) and PIL images (e.g. WordCloud.to_image()), in the order of the document.
+    - include_plotlyjs (bool or str, optional): True to embed plotly.js in the document, 'directory' to reference a
+      plotly.min.js in the folder of the document, written there if missing so that all the reports of the folder
+      share it, 'cdn' to load it from the plotly CDN, any other string to reference it from that path or URL
+      (see write_plotlyjs), or False to leave it out.
+    """
+
+    elements, data, templates = [], [], []
+
+    for item in items:
+        if not isinstance(item, go.Figure):
+            elements.append(_image_element(item))
+            continue
+
+        figure = item.to_plotly_json()
+        template = pio.json.to_json_plotly(figure['layout'].pop('template', {}))
+        if template not in templates: templates.append(template)
+
+        elements.append(f'<div id="figure-{len(data)}"></div>')
+        data.append({'data': figure['data'], 'layout': figure['layout'], 'template': templates.index(template)})
+
+    # A "</" in a string would end the script element
+    figures_json = pio.json.to_json_plotly(data).replace('</', '<\\/')
+    templates_json = f"[{','.join(templates)}]".replace('</', '<\\/')
+
+    document = '\n'.join([
+        '<!DOCTYPE html>',
+        '<html>',
+        '<head>',
+        '<meta charset="utf-8">',
+        f'<title>{html.escape(title)}</title>',
+        _plotlyjs_script(include_plotlyjs, file_path),
+        '</head>',
+        '<body>',
+        f'<h1>{html.escape(title)}</h1>',
+        *elements,
+        '<script type="text/javascript">',
+        f'var templates = {templates_json};',
+        f'var figures = {figures_json};',
+        DRAW_FIGURES,
+        '</script>',
+        '</body>',
+        '</html>',
+    ])
+
+    with open(file_path, 'w', encoding='utf-8') as file: file.write(document)
@@ -1,51 +1,203 @@
-from wordcloud import WordCloud, STOPWORDS
-from whatstk import df_from_txt_whatsapp
-import matplotlib.pyplot as plt
+from wordcloud import WordCloud
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from whatsapp_parser.word_frequencies import WordFrequencies
+from whatsapp_parser.message_cube import MessageCube
+from whatsapp_parser.word_index import WordIndex, count_terms
+from whatsapp_parser import chat_reader, export, figures, report
 import plotly.graph_objs as go
-from itertools import product
-import plotly_express as px
+from io import BytesIO
+from itertools import repeat
 from utils import Utils
 import pandas as pd
+import numpy as np
+import functools
+import threading
+import hashlib
+import inspect
 import plotly
-import re
 import os
+import re
+
+try: from whatstk import df_from_txt_whatsapp
+except ImportError: df_from_txt_whatsapp = None
+
+# whatstk only reads files through its public API, this parses the text of a chat already in memory
+try: from whatstk.whatsapp.parser import _df_from_str as df_from_str_whatsapp
+except ImportError: df_from_str_whatsapp = None
+
+
+# Placeholders written in place of the media of a message, by device and type of message. Every other message is
+# a 'Text', and a new type of message only needs its placeholders here, e.g. 'Document': ['documento omitido', ...]
+MEDIA_PLACEHOLDERS = {
+    'apple': {
+        'Audio': ['áudio ocultado', 'audio omitted'],
+        'Video': ['vídeo omitido', 'video omitted'],
+        'Foto': ['imagem ocultada', 'image omitted'],
+        'Sticker': ['figurinha omitida', 'sticker omitted'],
+        'GIF': ['GIF omitido', 'GIF omitted'],
+    },
+    'android': {
+        'Mídia': ['<Mídia oculta>'],
+    },
+}
+
+# Lookup table from a placeholder (also followed by a line break) to the code of its type of message, 'Text' being 0
+MESSAGE_TYPE_CODES = {
+    device: {placeholder + ending: code
+             for code, placeholders in enumerate(types.values(), start=1)
+             for placeholder in placeholders
+             for ending in ('', '\n')}
+    for device, types in MEDIA_PLACEHOLDERS.items()
+}
+
+# Orders of the day and the month in the headers, depending on the locale of the device. A chat reads the same
+# in both until a day after the 12th shows up, so it is day first unless some date only makes sense month first
+DAY_FIRST = '%d/%m/%Y %H:%M:%S'
+MONTH_FIRST = '%m/%d/%Y %H:%M:%S'
+
+# Formats the timestamps of the chat may come in, in the order they are tried
+TIMESTAMP_FORMATS = [DAY_FIRST, MONTH_FIRST, '%y/%m/%d %H:%M:%S']
+
+# Names of the weekdays, indexed by the day of the week (Monday is 0)
+WEEKDAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], dtype=object)
+
+# Order of the types of message in the graphs, the other types coming after them
+MESSAGE_TYPE_ORDER = ['Text', 'Audio', 'Foto', 'Sticker', 'Video', 'GIF']
+
+# Size in pixels of the word clouds, and of their previews, which take several times less to lay out
+WORD_CLOUD_SIZE = (1600, 800)
+WORD_CLOUD_PREVIEW_SIZE = (800, 400)
+
+# Maximum number of rendered word clouds kept in the render cache
+WORD_CLOUD_CACHE_SIZE = 16
+
+# Rendered word clouds, shared by every chat and keyed by the hash of their frequencies and their size
+_word_cloud_renders = OrderedDict()
+_word_cloud_renders_lock = threading.Lock()
+
+# Maximum number of exported files kept in the export cache
+EXPORT_CACHE_SIZE = 4
+
+# Exported files, shared by every chat and keyed by the hash of the chat, the file format and the date range
+_exports = OrderedDict()
+_exports_lock = threading.Lock()
+
+
+def _cached_figure(method):
+    """
+    Memoizes a graph method of WhatsAppParser in the LRU figure cache of the instance, keyed by the name of the
+    method and the value of each of its parameters (date range, language, options, ...).
+
+    Graphs saved as files are always generated again, so that the file is written. The cache may be used from
+    several threads at once, e.g. by the sessions of the Streamlit app that share a parsed chat.
+    """
+
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        if arguments.arguments.get('save_as_file'): return method(self, *args, **kwargs)
+
+        key = (method.__name__,) + tuple((name, tuple(value) if isinstance(value, list) else value)
+                                         for name, value in arguments.arguments.items() if name != 'self')
+
+        with self._figure_cache_lock:
+            if key in self._figure_cache:
+                self._figure_cache_stats['hits'] += 1
+                self._figure_cache.move_to_end(key)
+                return self._figure_cache[key]
+            self._figure_cache_stats['misses'] += 1
+
+        figure = method(self, *args, **kwargs)
+
+        with self._figure_cache_lock:
+            self._figure_cache[key] = figure
+            if len(self._figure_cache) > self.figure_cache_size: self._figure_cache.popitem(last=False)
+
+        return figure
+
+    return wrapper
+
+
+def _render_word_cloud(frequencies: dict, size: tuple) -> WordCloud:
+    """
+    Renders a word cloud from the frequencies of its words, or returns it from the render cache if the same
+    frequencies were rendered at the same size before, e.g. for another date range or chat.
+    """
+
+    digest = hashlib.sha256(repr(sorted((word, int(count)) for word, count in frequencies.items())).encode()).hexdigest()
+    key = (digest,) + tuple(size)
+
+    with _word_cloud_renders_lock:
+        if key in _word_cloud_renders:
+            _word_cloud_renders.move_to_end(key)
+            return _word_cloud_renders[key]
+
+    width, height = size
+    wordcloud = WordCloud(background_color='black',
+                          width=width,
+                          height=height,
+                          colormap='BuGn_r').generate_from_frequencies(frequencies)
+
+    with _word_cloud_renders_lock:
+        _word_cloud_renders[key] = wordcloud
+        if len(_word_cloud_renders) > WORD_CLOUD_CACHE_SIZE: _word_cloud_renders.popitem(last=False)
+
+    return wordcloud
 
 
 class WhatsAppParser:
-    def __init__(self, txt_file: str):
+    def __init__(self, txt_file, engine: str = 'mmap', chunk_messages: int = None, workers: int = None, cache=None,
+                 compact: bool = False, figure_cache_size: int = 32):
         """
         Initializes a WhatsAppParser instance.
 
         Parameters:
-        - txt_file (str): Path to the .txt file containing WhatsApp chat data.
+        - txt_file (str, bytes or file-like): Path to the .txt file containing WhatsApp chat data, or to the .zip
+          file of an export with media. The export may also be given as bytes or as a binary file-like object.
+          The chat of a .zip export is read from the archive without extracting it, and its media are listed in media.
+        - engine (str, optional): 'mmap' to scan the memory-mapped file for message headers, 'native' to parse the
+          file line by line in a single pass, or 'whatstk' to use the whatstk library. The mmap and native engines
+          fall back to whatstk when they don't recognize the format of the export. The chat of a .zip export can't
+          be memory-mapped, so it's always streamed out of the archive line by line, as with the native engine.
+        - chunk_messages (int, optional): If provided, the chat is streamed in chunks of this many messages and only
+          the message counts are kept, so that very large exports fit in a fixed memory budget. In this mode
+          chat_dataframe is None and only the graphs built from the counts are available.
+        - workers (int, optional): If greater than 1, the export is split in byte ranges aligned to the messages,
+          which are parsed and tidied in a pool of this many processes. Only used with the mmap engine, for .txt exports.
+        - cache (ChatCache, optional): Cache of parsed chats. If the export was parsed before, the tidy chat is
+          loaded from it instead of being parsed again.
+        - compact (bool, optional): If True, chat_dataframe is kept in a compact layout that uses several times less
+          memory: categories for 'who_sended', 'weekday' and 'message_type', int8 for 'hour' and 'weekday_number',
+          a datetime64 'date' (the day of the message) and no 'time' column, which can be derived from 'timestamp'.
+        - figure_cache_size (int, optional): Maximum number of graphs kept in the figure cache. Calling a graph method
+          again with the same arguments returns the cached figure, which is shared between the calls: copy it
+          (go.Figure(figure)) before changing it in a way that depends on the call.
         """
 
-        # Check if txt_file is provided
-        if txt_file:
-            # Read the content of the .txt file into a list
-            self.txt_file_list = self._txt_file_to_list(txt_file)
-
-        # self.chat_dict = self._organize_data_in_dict()
-        # self.chat_dataframe = pd.DataFrame(self.chat_dict)  # Create a Pandas DataFrame from the organized chat data
-
-        self.chat_downloaded_from_apple_device = True if self.txt_file_list[0].replace('\u200e', '').replace('~\u202f', '').startswith("[") else False
+        # Least recently used graphs, cleared whenever the messages of the chat change
+        self._figure_cache = OrderedDict()
+        self._figure_cache_lock = threading.Lock()
 
-        self.chat_dataframe = df_from_txt_whatsapp(txt_file)
-        self.chat_dataframe.rename(columns={
-            'date': 'timestamp',
-            'username': 'who_sended',
-            'message': 'message'}, inplace=True)
+        # Held while the word index or the word frequencies are built, so that graphs built at once build them once
+        self._indexes_lock = threading.Lock()
+        self._figure_cache_stats = {'hits': 0, 'misses': 0}
+        self.figure_cache_size = figure_cache_size
 
-        # Extract user information from the list of messages
-        self.users = list(self.chat_dataframe['who_sended'].unique())
-        self.group_chat = True if len(self.users) > 2 else False
+        # Keep what is needed to parse a new export of the same chat later on
+        self._parse_options = {'engine': engine, 'workers': workers, 'cache': cache, 'compact': compact}
+        self._unhashed_export = None
+        self.media = self._index_media(txt_file)
 
-        # Define attributes related to Excel file, folder, and chat data
-        self.excel_file_name = self._define_excel_file_name()
-        self._folder_name = self._define_folder_name()
-
-        # Tidy up the DataFrame (potentially removing unnecessary columns, etc.)
-        self._tidy_data_frame()
+        if chunk_messages:
+            self.chat_dataframe = self.parse_state = None
+            self._aggregate_chunks(txt_file, chunk_messages)
+            self._define_chat_names()
+        else:
+            self._parse_export(txt_file)
 
         # Define a color palette in hexadecimal format
         self.hex = {
@@ -121,75 +273,248 @@ class WhatsAppParser:
             'Sunday': 'Domingo'
         }
 
-    def _txt_file_to_list(self,
-                          file: str
-                          ) -> list:
+    def _parse_export(self, txt_file):
+        """
+        Parses the chat with the options of __init__, or loads it from the cache, and defines its parse_state.
+
+        Parameters:
+        - txt_file (str, bytes or file-like): The export, see __init__.
+        """
+
+        # A .zip export is streamed out of the archive, the others are read at once to be memory-mapped
+        if not chat_reader.is_zip(txt_file): txt_file = chat_reader.read_export(txt_file)
+
+        # Without a cache, the export is only hashed once parse_state is read, e.g. by update(), unless it's a
+        # file-like object, which the caller may have closed by then
+        cache = self._parse_options['cache']
+        export_hash = chat_reader.hash_export(txt_file) if cache is not None or hasattr(txt_file, 'read') else None
+        if cache is not None and self._load_from_cache(cache, export_hash['sha256']): return
+
+        self._parse_chat(txt_file, self._parse_options['engine'], self._parse_options['workers'])
+        if self._parse_options['compact']: self.chat_dataframe = self._compact_data_frame(self.chat_dataframe)
+
+        self.parse_state = self._define_parse_state(export_hash)
+        if export_hash is None: self._unhashed_export = (txt_file, chat_reader.stamp_export(txt_file), self._parse_state)
+        if cache is not None: self._store_in_cache(cache, export_hash['sha256'])
+
+    def _parse_chat(self,
+                    txt_file: str,
+                    engine: str,
+                    workers: int):
+        """
+        Parses and tidies the chat, see __init__ for the parameters.
+        """
+
+        # The chat of a .zip export can't be memory-mapped, it's streamed out of the archive line by line instead
+        reader = 'native' if engine == 'native' or chat_reader.is_zip(txt_file) else 'mmap'
+
+        # Read the .txt file once, collecting the messages and the information about the export
+        try:
+            if workers and workers > 1 and engine == reader == 'mmap':
+                self.chat_dataframe = self._parse_in_parallel(txt_file, workers)
+            else:
+                chat_dict = self._organize_data_in_dict(txt_file, reader)
+                # Create a Pandas DataFrame from the organized chat data
+                self.chat_dataframe = pd.DataFrame(chat_dict) if chat_dict is not None and engine != 'whatstk' else None
+                del chat_dict
+                if self.chat_dataframe is not None:
+                    self.chat_dataframe = self._enrich_data_frame(self.chat_dataframe, self.chat_downloaded_from_apple_device)
+        except ValueError:
+            # The timestamps are in none of TIMESTAMP_FORMATS, whatstk detects more of them
+            self.chat_dataframe = None
+
+        enriched = self.chat_dataframe is not None
+        self._timestamp_format = self.chat_dataframe.attrs.get('timestamp_format') if enriched else None
+
+        if self.chat_dataframe is None:
+            self.chat_dataframe = self._read_with_whatstk(txt_file)
+            self.chat_dataframe.rename(columns={
+                'date': 'timestamp',
+                'username': 'who_sended',
+                'message': 'message'}, inplace=True)
+
+        # Extract user information from the list of messages
+        self.users = list(self.chat_dataframe['who_sended'].unique())
+        self._define_chat_names()
+
+        # Tidy up the DataFrame (potentially removing unnecessary columns, etc.)
+        self._tidy_data_frame(enrich=not enriched)
+        self._index_chat()
+
+    @staticmethod
+    def _read_with_whatstk(txt_file) -> pd.DataFrame:
         """
-        Reads the content of a .txt file and returns a list where each item is a line from the file.
+        Parses the chat with whatstk, which detects more formats than the mmap and native engines, e.g. other date separators.
 
         Parameters:
-        - file (str): Path to the .txt file.
+        - txt_file (str, bytes or file-like): Path to the .txt file, or the content of the chat (see
+          chat_reader.read_export), or a .zip export.
 
         Returns:
-        - list: A list where each item represents a line from the .txt file.
+        - pd.DataFrame: The DataFrame built by whatstk.
         """
 
-        # Open the .txt file in read mode with UTF-8 encoding
-        with open(file, 'r', encoding='utf-8') as data:
-            lines = data.read().splitlines()
+        if df_from_txt_whatsapp is None or df_from_str_whatsapp is None:
+            raise ValueError("Format of the chat not recognized. Install whatstk to parse it.")
+
+        if isinstance(txt_file, str) and not chat_reader.is_zip(txt_file): return df_from_txt_whatsapp(txt_file)
+
+        # The chat of an uploaded or .zip export is given to whatstk as text, which it reads whole anyway
+        with chat_reader.open_text(txt_file) as data: return df_from_str_whatsapp(data.read())
+
+    def _define_chat_names(self):
+        """
+        Defines whether the chat is a group, and the names of the Excel file and folder, based on the users.
+        """
+
+        self.group_chat = True if len(self.users) > 2 else False
+
+        # Define attributes related to Excel file, folder, and chat data
+        self.excel_file_name = self._define_excel_file_name()
+        self._folder_name = self._define_folder_name()
+
+    def _load_from_cache(self, cache, key: str) -> bool:
+        """
+        Loads the tidy chat and its information from a cache of parsed chats.
+
+        Parameters:
+        - cache (ChatCache): Cache of parsed chats.
+        - key (str): Hash of the exported file.
+
+        Returns:
+        - bool: True if the chat was found in the cache.
+        """
+
+        cached = cache.load(self._cache_key(key))
+        if cached is None: return False
+
+        self.chat_dataframe, metadata = cached
+        for attribute, value in metadata.items(): setattr(self, attribute, value)
+        self._timestamp_format = self.parse_state.get('timestamp_format', DAY_FIRST)
+        self._index_chat()
+
+        return True
+
+    def _store_in_cache(self, cache, key: str):
+        """
+        Stores the tidy chat and its information in a cache of parsed chats.
+
+        Parameters:
+        - cache (ChatCache): Cache of parsed chats.
+        - key (str): Hash of the exported file.
+        """
+
+        attributes = ['users', 'group_chat', 'chat_is_group', 'chat_downloaded_from_apple_device', 'excel_file_name',
+                      '_folder_name', '_first_line', '_last_line', '_group_sender', 'parse_state']
+        cache.store(self._cache_key(key), self.chat_dataframe, {attribute: getattr(self, attribute) for attribute in attributes})
+
+    def _cache_key(self, key: str) -> str:
+        """
+        Returns the key of the chat in the cache, which depends on the layout of chat_dataframe.
+
+        Parameters:
+        - key (str): Hash of the exported file.
+        """
+        return f'{key}-compact' if self._parse_options['compact'] else key
+
+    def _index_media(self, txt_file) -> pd.DataFrame:
+        """
+        Lists the media files of the export, see chat_reader.index_media.
+
+        Parameters:
+        - txt_file (str, bytes or file-like): The export.
 
-        return lines
+        Returns:
+        - pd.DataFrame: The 'name', 'size', 'compressed_size' and 'type' of each media file (no rows for .txt exports).
+        """
+        return pd.DataFrame(chat_reader.index_media(txt_file), columns=['name', 'size', 'compressed_size', 'type'])
 
-    def _organize_data_in_dict(self) -> dict:
+    def _organize_data_in_dict(self, txt_file, engine: str = 'mmap') -> dict:
         """
-        Organizes WhatsApp chat data into a dictionary.
+        Organizes WhatsApp chat data into a dictionary, reading the export in a single pass.
+
+        Along with the messages, the first and last lines of the export and the device it was
+        downloaded from are stored in the instance.
+
+        Parameters:
+        - txt_file (str or bytes): Path to the .txt file, or the content of the chat (see chat_reader.read_export).
+        - engine (str, optional): 'mmap' to scan the memory-mapped file, or 'native' to read it line by line.
 
         Returns:
-        - dict: A dictionary containing the following keys:
+        - dict: A dictionary containing the following keys, or None if the format of the chat was not recognized:
             - 'timestamp': Date and time that the message was sent
             - 'who_sended': Person who sent the message
             - 'message': Message content
-            - 'message_type': Type of message (audio, video, photo, sticker, text)
         """
 
-        # Regular expression to extract information
-        regex = re.compile(r"\[(?P<timestamp>[\d\/\,\s:]+)\] (?P<who_sended>.*?): (?P<message>.*?)$")
+        if engine == 'mmap':
+            result, info = chat_reader.scan_file(txt_file)
+        else:
+            with chat_reader.open_text(txt_file) as data:
+                result, info = chat_reader.parse_lines(data)
 
-        # Initializing lists in the dictionary
-        result = {"timestamp": [], "who_sended": [], "message": [], "message_type": []}
+        self._store_export_info(info)
 
-        # Iterating over messages
-        for c, message in enumerate(self.txt_file_list):
-            message = message.replace('\u200e', '').replace('~\u202f', '')
-            match = regex.match(message)
+        return result
 
-            # Checking if it's a valid message
-            if match:
-                message_text = match.group('message')
+    def _store_export_info(self, info: dict):
+        """
+        Stores the first and last lines of the export and the device it was downloaded from.
 
-                # In some cases, the first message is the Group name with the cryptography message
-                if c == 0: self.chat_has_group_name = any(keyword in message_text.lower() for keyword in ['criptografia', 'cryptography'])
-
-                if 'criou este grupo' not in message_text and \
-                   'adicionou você' not in message_text:
-                    # Determine message type based on content
-                    if message_text in ['áudio ocultado', 'audio omitted']: message_type = 'Audio'
-                    elif message_text in ['vídeo omitido', 'video omitted']: message_type = 'Video'
-                    elif message_text in ['imagem ocultada', 'image omitted']: message_type = 'Foto'
-                    elif message_text in ['figurinha omitida', 'sticker omitted']: message_type = 'Sticker'
-                    elif message_text in ['GIF omitido', 'GIF omitted']: message_type = 'GIF'
-                    else: message_type = 'Text'
-
-                    result["timestamp"].append(match.group('timestamp').replace(',', ''))
-                    result["who_sended"].append(match.group('who_sended'))
-                    result["message"].append(message_text)
-                    result["message_type"].append(message_type)
-
-            # If there's no match, it means the line is a continuation of the last line
-            else:
-                result["message"][-1] += f"\n{message}"
+        Parameters:
+        - info (dict): Information of the export, as collected by chat_reader.
+        """
 
-        return result
+        self._first_line = info['first_line']
+        self._last_line = info['last_line']
+        self.chat_downloaded_from_apple_device = info['apple_device']
+
+    def _parse_in_parallel(self,
+                           txt_file,
+                           workers: int
+                           ) -> pd.DataFrame:
+        """
+        Parses and enriches the export in a process pool, one byte range of complete messages per process.
+
+        Parameters:
+        - txt_file (str or bytes): Path to the .txt file, or the content of the chat (see chat_reader.read_export).
+        - workers (int): Maximum number of processes.
+
+        Returns:
+        - pd.DataFrame: The enriched chat DataFrame, in the order of the export, or None if the format of the chat was not recognized.
+        """
+
+        ranges, info = chat_reader.shard_file(txt_file, workers)
+        self._store_export_info(info)
+        if not ranges: return None
+
+        starts, ends = zip(*ranges)
+        sources = repeat(txt_file)
+        apple_device = repeat(self.chat_downloaded_from_apple_device)
+
+        # A chat held in memory is sent to each process as the slice of its range rather than as a whole
+        if not isinstance(txt_file, str):
+            sources = [txt_file[start:end] for start, end in ranges]
+            starts, ends = repeat(0), [end - start for start, end in ranges]
+
+        if len(ranges) == 1:
+            shards = map(_parse_shard, sources, starts, ends, apple_device)
+            return next(shards)
+
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            shards = list(pool.map(_parse_shard, sources, starts, ends, apple_device))
+
+        # The order of the day and the month is detected on each range, a single month first range settles it for all
+        formats = [shard.attrs.get('timestamp_format') for shard in shards]
+        timestamp_format = MONTH_FIRST if MONTH_FIRST in formats else formats[0]
+        if timestamp_format == MONTH_FIRST:
+            shards = [self._swap_day_and_month(shard, self.chat_downloaded_from_apple_device) if shard_format == DAY_FIRST else shard
+                      for shard, shard_format in zip(shards, formats)]
+
+        chat_dataframe = pd.concat(shards, ignore_index=True)
+        chat_dataframe.attrs['timestamp_format'] = timestamp_format
+
+        return chat_dataframe
 
     def _define_excel_file_name(self) -> str:
         """
@@ -200,12 +525,12 @@ class WhatsAppParser:
         """
 
         # Extract the timestamp from the last message
-        last_message_timestamp = self.txt_file_list[-1][1:21].replace(', ', '_').replace('/', '').replace(':', '')
+        last_message_timestamp = self._last_line[1:21].replace(', ', '_').replace('/', '').replace(':', '')
 
         # Check the number of users in the chat
         if len(self.users) > 2:
             # If more than two users, use a format with the timestamp and part of the chat title
-            return f"{last_message_timestamp[1:]}_{self.txt_file_list[0].split(':')[2][4:]}.xlsx"
+            return f"{last_message_timestamp[1:]}_{self._first_line.split(':')[2][4:]}.xlsx"
         else:
             # If two users, use a format with the timestamp and usernames
             return f"{last_message_timestamp}_{self.users[0]}-{self.users[1]}.xlsx"
@@ -219,12 +544,12 @@ class WhatsAppParser:
         """
 
         # Extract the timestamp from the last message
-        last_message_timestamp = self.txt_file_list[-1][1:21].replace(', ', '_').replace('/', '').replace(':', '')
+        last_message_timestamp = self._last_line[1:21].replace(', ', '_').replace('/', '').replace(':', '')
 
         # Check the number of users in the chat
         if len(self.users) > 2:
             # If more than two users, use a format with the timestamp and part of the chat title
-            return f"{last_message_timestamp[1:]}_{self.txt_file_list[0].split(':')[2][4:]}"
+            return f"{last_message_timestamp[1:]}_{self._first_line.split(':')[2][4:]}"
         else:
             # If two users, use a format with the timestamp and usernames
             return f"{last_message_timestamp}_{self.users[0]}-{self.users[1]}"
@@ -234,13 +559,16 @@ class WhatsAppParser:
                                 path: str = None
                                 ):
         """
-        Saves the chat data to an Excel file.
+        Saves the chat data to an Excel file, written row by row so that the workbook is never held in memory
+        (see export.write_xlsx). Use export for the other file formats.
 
         Parameters:
         - file_name (str, optional): Name of the Excel file. If not provided, uses the pre-defined Excel file name.
         - path (str, optional): Path where the Excel file will be saved. If not provided, uses the current working directory.
         """
 
+        self._require_messages()
+
         # Set default values if parameters are not provided
         if file_name is None: file_name = self.excel_file_name
         if not file_name.endswith(".xlsx"): file_name += ".xlsx"
@@ -249,8 +577,118 @@ class WhatsAppParser:
         # Create the full file path
         file_path = os.path.join(path, file_name)
 
-        # Save the chat DataFrame to an Excel file
-        self.chat_dataframe.to_excel(file_path, index=False)
+        # Stream the chat DataFrame to an Excel file
+        export.write_xlsx(self.chat_dataframe, file_path)
+
+    def save_report(self,
+                    file_name: str = None,
+                    path: str = None,
+                    title: str = None,
+                    language: str = 'English 🇺🇸',
+                    start_date: str = None,
+                    end_date: str = None,
+                    include_plotlyjs=True
+                    ) -> str:
+        """
+        Saves the word cloud and every graph of a date range to a single HTML report, which includes plotly.js
+        once instead of once per graph as with save_as_file (see report.write_report).
+
+        Parameters:
+        - file_name (str, optional): Name of the HTML file. If not provided, uses 'Report'.
+        - path (str, optional): Folder where the report will be saved. If not provided, uses the graphs folder.
+        - title (str, optional): Title of the report. If not provided, uses the name of the graphs folder.
+        - language (str, optional): Language of the graphs.
+        - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
+        - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
+        - include_plotlyjs (bool or str, optional): True to embed plotly.js in the report, 'directory' to share a
+          plotly.min.js with the other reports of the folder, or the path or URL of plotly.min.js to reference.
+
+        Returns:
+        - str: The path of the report.
+        """
+
+        self._require_messages()
+
+        # Set default values if parameters are not provided
+        if not file_name: file_name = 'Report'
+        if not file_name.endswith('.html'): file_name += '.html'
+        path = self._create_graphs_folder(path)
+        if title is None: title = os.path.basename(os.path.normpath(self._folder_name))
+
+        dates = {'start_date': start_date, 'end_date': end_date}
+        items = []
+
+        # A date range without words has no word cloud
+        try: items.append(self.generate_word_cloud(**dates).to_image())
+        except ValueError: pass
+
+        items.append(self.generate_activity_heatmap(language=language, **dates))
+        items.append(self.generate_graph_number_of_messages_per_hour(language=language, **dates))
+        items.append(self.generate_graph_number_of_messages_per_day(language=language, **dates))
+        if self.chat_downloaded_from_apple_device:
+            items.append(self.generate_graph_number_of_types_of_messages_per_user(language=language, **dates))
+        items.append(self.generate_number_of_messages_per_user(language=language, **dates))
+        if self.chat_downloaded_from_apple_device:
+            items.append(self.generate_graph_number_of_types_of_messages(language=language, **dates))
+        items.append(self.generate_first_last_message(language=language, **dates))
+
+        file_path = os.path.join(path, file_name)
+        report.write_report(file_path, title, items, include_plotlyjs)
+
+        return file_path
+
+    def export(self,
+               file_format: str = 'xlsx',
+               start_date: str = None,
+               end_date: str = None
+               ) -> bytes:
+        """
+        Exports the messages of a date range to a file in memory, e.g. for a download button.
+
+        The file is kept in the export cache, keyed by the hash of the content of chat_dataframe, the file format
+        and the date range, so that exporting the same messages again returns it at once. Parquet and csv files
+        take many times less to write than Excel workbooks.
+
+        Parameters:
+        - file_format (str, optional): 'xlsx', 'parquet', 'csv' or 'csv.gz', see export.FORMATS.
+        - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
+        - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
+
+        Returns:
+        - bytes: The content of the file.
+        """
+
+        self._require_messages()
+        if file_format not in export.FORMATS: raise ValueError(f"file_format must be one of {list(export.FORMATS)}, not {file_format!r}")
+
+        key = (self._get_content_hash(), file_format, start_date, end_date)
+        with _exports_lock:
+            if key in _exports:
+                _exports.move_to_end(key)
+                return _exports[key]
+
+        buffer = BytesIO()
+        export.write(Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe, self._day_index), buffer, file_format)
+        content = buffer.getvalue()
+
+        with _exports_lock:
+            _exports[key] = content
+            if len(_exports) > EXPORT_CACHE_SIZE: _exports.popitem(last=False)
+
+        return content
+
+    def _get_content_hash(self) -> str:
+        """
+        Returns the SHA-256 of the content of chat_dataframe, hashing it on the first export.
+        """
+
+        # The columns and their types are hashed too, so that the standard and compact layouts differ
+        if self._content_hash is None:
+            digest = hashlib.sha256(repr(list(self.chat_dataframe.dtypes.items())).encode())
+            digest.update(pd.util.hash_pandas_object(self.chat_dataframe, index=False).to_numpy())
+            self._content_hash = digest.hexdigest()
+
+        return self._content_hash
 
     def _remove_cryptography_message(self):
         """
@@ -263,65 +701,508 @@ class WhatsAppParser:
         # Check if the cryptography warning message is present
         if 'cryptography' in self.chat[0] or 'criptografia' in self.chat[0]: del self.chat[0]  # Remove the cryptography warning message from the chat data
 
-    def _create_graphs_folder(self):
+    def _create_graphs_folder(self, path: str = None) -> str:
         """
         Creates a folder to store graphs.
 
         If the folder does not already exist, it will be created.
+
+        Parameters:
+        - path (str, optional): The folder. If not provided, uses the graphs folder of the chat.
+
+        Returns:
+        - str: The folder.
         """
-        if not os.path.exists(self._folder_name): os.makedirs(self._folder_name)  # Creating folder to store the graphs
+        if path is None: path = self._folder_name
+        if not os.path.exists(path): os.makedirs(path)  # Creating folder to store the graphs
+        return path
 
-    def _tidy_data_frame(self):
+    def _tidy_data_frame(self, enrich: bool = True):
         """
         Tidies up the chat DataFrame by converting timestamp to datetime,
         extracting date, time, hour, and weekday information.
 
         The 'timestamp' column is converted to datetime format with the specified format and dayfirst parameter.
         New columns 'date', 'time', 'hour', and 'weekday' are created based on the 'timestamp' information.
-        """
-        # Convert 'timestamp' to datetime format
-        try: self.chat_dataframe['timestamp'] = pd.to_datetime(self.chat_dataframe['timestamp'], format='%d/%m/%Y %H:%M:%S', dayfirst=True)
-        except: self.chat_dataframe['timestamp'] = pd.to_datetime(self.chat_dataframe['timestamp'], format='%y/%m/%d %H:%M:%S', dayfirst=True)
 
-        # Extract date, time, hour, and weekday information
-        self.chat_dataframe['date'] = self.chat_dataframe['timestamp'].dt.date
-        self.chat_dataframe['time'] = self.chat_dataframe['timestamp'].dt.time
-        self.chat_dataframe['hour'] = self.chat_dataframe['timestamp'].dt.hour
-        self.chat_dataframe['weekday'] = pd.to_datetime(self.chat_dataframe['date']).dt.day_name()
-        day_mapping = {"Monday": 1, "Tuesday": 2, "Wednesday": 3, "Thursday": 4, "Friday": 5, "Saturday": 6, "Sunday": 7}
-        self.chat_dataframe['weekday_number'] = self.chat_dataframe['weekday'].map(day_mapping)
-        self.chat_dataframe['message'] = self.chat_dataframe['message'].str.replace('\u200e', '').str.replace('\u202f', '')
+        Parameters:
+        - enrich (bool, optional): If False, the DataFrame already has those columns (e.g. it was parsed in parallel).
+        """
+        if enrich: self.chat_dataframe = self._enrich_data_frame(self.chat_dataframe, self.chat_downloaded_from_apple_device)
 
         self.chat_is_group = True if self.chat_dataframe['who_sended'].nunique() > 2 else False
         first_row = self.chat_dataframe.loc[self.chat_dataframe.index[0]]['message']
+        self._group_sender = None
 
         if self.chat_is_group:
             if any(keyword in first_row.lower() for keyword in ['criptografia', 'cryptography']):
-                rows_to_delete = self.chat_dataframe.loc[0]['who_sended']
+                rows_to_delete = self._group_sender = self.chat_dataframe.loc[0]['who_sended']
                 self.chat_dataframe = self.chat_dataframe[self.chat_dataframe['who_sended'] != rows_to_delete]
 
-        self.chat_dataframe['message_type'] = self.chat_dataframe['message'].apply(self._categorize_message)
+    @staticmethod
+    def _enrich_data_frame(chat_dataframe: pd.DataFrame,
+                           apple_device: bool,
+                           timestamp_format: str = None
+                           ) -> pd.DataFrame:
+        """
+        Adds the 'date', 'time', 'hour', 'weekday', 'weekday_number' and 'message_type' columns to a chat DataFrame.
 
-    def _categorize_message(self, message):
+        Parameters:
+        - chat_dataframe (pd.DataFrame): DataFrame with the 'timestamp', 'who_sended' and 'message' columns.
+        - apple_device (bool): Whether the chat was downloaded from an Apple device.
+        - timestamp_format (str, optional): Format of the timestamp strings. If not provided, it is detected (see
+          _parse_timestamps).
 
-        if self.chat_downloaded_from_apple_device:
-            possible_audio_messages = ['áudio ocultado', 'audio omitted', 'áudio ocultado\n', 'audio omitted\n']
-            possible_video_messages = ['vídeo omitido', 'video omitted', 'vídeo omitido\n', 'video omitted\n']
-            possible_image_messages = ['imagem ocultada', 'image omitted', 'imagem ocultada\n', 'image omitted\n']
-            possible_sticker_messages = ['figurinha omitida', 'sticker omitted', 'figurinha omitida\n', 'sticker omitted\n']
-            possible_gif_messages = ['GIF omitido', 'GIF omitted', 'GIF omitido\n', 'GIF omitted\n']
-
-            if message in possible_audio_messages: return 'Audio'
-            elif message in possible_video_messages: return 'Video'
-            elif message in possible_image_messages: return 'Foto'
-            elif message in possible_sticker_messages: return 'Sticker'
-            elif message in possible_gif_messages: return 'GIF'
-            else: return 'Text'
+        Returns:
+        - pd.DataFrame: The enriched DataFrame, with the format of its timestamps in attrs['timestamp_format'].
+        """
+        # Convert 'timestamp' to datetime format. Many messages share the same timestamp, so each distinct one is converted once
+        codes, timestamps = pd.factorize(chat_dataframe['timestamp'])
+        if not isinstance(timestamps, pd.DatetimeIndex): timestamps, timestamp_format = WhatsAppParser._parse_timestamps(timestamps, timestamp_format)
+        chat_dataframe['timestamp'] = timestamps.take(codes)
+        chat_dataframe.attrs['timestamp_format'] = timestamp_format
+
+        # Extract date, time, hour, and weekday information from the distinct timestamps
+        weekday = timestamps.dayofweek.values
+        chat_dataframe['date'] = timestamps.date[codes]
+        chat_dataframe['time'] = timestamps.time[codes]
+        chat_dataframe['hour'] = timestamps.hour.values.astype('int64')[codes]
+        chat_dataframe['weekday'] = WEEKDAY_NAMES[weekday][codes]
+        chat_dataframe['weekday_number'] = (weekday.astype('int64') + 1)[codes]
+        chat_dataframe['message'] = chat_dataframe['message'].str.replace('\u200e', '').str.replace('\u202f', '')
+        chat_dataframe['message_type'] = WhatsAppParser._categorize_messages(chat_dataframe['message'], apple_device)
+
+        return chat_dataframe
+
+    @staticmethod
+    def _compact_data_frame(chat_dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converts a tidy chat DataFrame to the compact layout (see the compact parameter of __init__).
 
-        else:
-            if message in ['<Mídia oculta>', '<Mídia oculta>\n']: return 'Mídia'
-            else: return 'Text'
+        Parameters:
+        - chat_dataframe (pd.DataFrame): Tidy chat DataFrame, in the standard or compact layout.
+
+        Returns:
+        - pd.DataFrame: The DataFrame in the compact layout.
+        """
+
+        compact = chat_dataframe.drop(columns='time', errors='ignore')
+        compact['date'] = compact['timestamp'].dt.normalize()
+        compact['who_sended'] = compact['who_sended'].astype('category')
+        compact['weekday'] = pd.Categorical(compact['weekday'], categories=WEEKDAY_NAMES)
+        compact['message_type'] = compact['message_type'].astype('category')
+        compact['hour'] = compact['hour'].astype('int8')
+        compact['weekday_number'] = compact['weekday_number'].astype('int8')
+
+        return compact
+
+    @staticmethod
+    def _swap_day_and_month(chat_dataframe: pd.DataFrame,
+                            apple_device: bool
+                            ) -> pd.DataFrame:
+        """
+        Reads again as month first the timestamps of an enriched DataFrame that were read day first, e.g. a part of
+        a month first chat without a day after the 12th.
+
+        Parameters:
+        - chat_dataframe (pd.DataFrame): Enriched DataFrame, with day first timestamps.
+        - apple_device (bool): Whether the chat was downloaded from an Apple device.
+
+        Returns:
+        - pd.DataFrame: The DataFrame enriched again from the month first timestamps.
+        """
+
+        timestamps = chat_dataframe['timestamp'].dt
+        swapped = pd.to_datetime(pd.DataFrame({'year': timestamps.year, 'month': timestamps.day, 'day': timestamps.month,
+                                               'hour': timestamps.hour, 'minute': timestamps.minute, 'second': timestamps.second}))
+
+        return WhatsAppParser._enrich_data_frame(chat_dataframe[['timestamp', 'who_sended', 'message']].assign(timestamp=swapped),
+                                                 apple_device, MONTH_FIRST)
+
+    @staticmethod
+    def _parse_timestamps(timestamps, timestamp_format: str = None) -> tuple:
+        """
+        Converts timestamp strings to datetime, detecting their format on a sample of them.
+
+        The formats are tried in the order of TIMESTAMP_FORMATS, so the timestamps are read day first unless
+        some of them only make sense month first.
+
+        Parameters:
+        - timestamps (array-like): Distinct timestamp strings.
+        - timestamp_format (str, optional): Format of the timestamps, if it is known.
 
+        Returns:
+        - tuple: The converted timestamps (pd.DatetimeIndex) and their format.
+        """
+
+        # A sample spread over the whole chat, so that e.g. days after the 12th are in it
+        sample = timestamps[::max(1, len(timestamps) // 1000)]
+        error = None
+
+        for timestamp_format in [timestamp_format] if timestamp_format else TIMESTAMP_FORMATS:
+            try:
+                pd.to_datetime(sample, format=timestamp_format)
+            except ValueError as exception:
+                error = exception
+                continue
+
+            if timestamp_format == DAY_FIRST:
+                converted = WhatsAppParser._parse_padded_timestamps(timestamps)
+                if converted is not None: return converted, timestamp_format
+
+            try:
+                return pd.DatetimeIndex(pd.to_datetime(timestamps, format=timestamp_format)), timestamp_format
+            except ValueError as exception:
+                error = exception
+
+        raise error
+
+    @staticmethod
+    def _parse_padded_timestamps(timestamps) -> pd.DatetimeIndex:
+        """
+        Converts zero-padded 'dd/mm/yyyy hh:mm:ss' timestamps to datetime by rearranging their characters
+        into ISO 8601, which numpy parses much faster than strptime.
+
+        Parameters:
+        - timestamps (array-like): Distinct timestamp strings.
+
+        Returns:
+        - pd.DatetimeIndex: The converted timestamps, or None if they are not all in that exact layout.
+        """
+
+        try:
+            characters = np.array(timestamps, dtype='S')
+        except UnicodeEncodeError:
+            return None
+
+        # The array is as wide as the longest timestamp, so all of them must have exactly 19 characters
+        if len(characters) == 0 or characters.dtype.itemsize != 19 or np.char.str_len(characters).min() != 19: return None
+        characters = characters.view(np.uint8).reshape(-1, 19)
+
+        if not all((characters[:, position] == ord(separator)).all()
+                   for position, separator in zip((2, 5, 10, 13, 16), '// ::')):
+            return None
+
+        iso = np.empty_like(characters)
+        iso[:, 0:4] = characters[:, 6:10]
+        iso[:, 4] = iso[:, 7] = ord('-')
+        iso[:, 5:7] = characters[:, 3:5]
+        iso[:, 8:10] = characters[:, 0:2]
+        iso[:, 10] = ord('T')
+        iso[:, 11:19] = characters[:, 11:19]
+
+        # Invalid dates must be parsed from unicode: parsing them from bytes crashes numpy instead of raising
+        try:
+            return pd.DatetimeIndex(iso.view('S19').ravel().astype('U19').astype('datetime64[s]').astype('datetime64[ns]'))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _categorize_messages(messages: pd.Series,
+                             apple_device: bool
+                             ) -> pd.Categorical:
+        """
+        Categorizes the messages by type (Text, Audio, Foto, ...), based on the placeholders of their media.
+
+        Parameters:
+        - messages (pd.Series): Content of the messages.
+        - apple_device (bool): Whether the chat was downloaded from an Apple device.
+
+        Returns:
+        - pd.Categorical: The type of each message, with every type of the device as categories.
+        """
+
+        device = 'apple' if apple_device else 'android'
+        codes = messages.map(MESSAGE_TYPE_CODES[device]).fillna(0).astype('int8')
+
+        return pd.Categorical.from_codes(codes, categories=['Text'] + list(MEDIA_PLACEHOLDERS[device]))
+
+    @classmethod
+    def iter_chunks(cls,
+                    txt_file,
+                    chunk_messages: int = 100000,
+                    info: dict = None):
+        """
+        Streams a WhatsApp export as tidy DataFrame chunks of complete messages.
+
+        Only one chunk is kept in memory at a time, and multi-line messages are never split between chunks.
+        In group chats, the messages of the group itself are removed from the moment the chat has more than
+        two senders, as _tidy_data_frame does. Whether the dates are month first is detected on the headers
+        before the first chunk (see chat_reader.detect_month_first), which may take a first pass over the
+        export when its dates read the same both ways for long.
+
+        Parameters:
+        - txt_file (str, bytes or file-like): The export, see __init__. The chat of a .zip export is streamed out of the archive.
+        - chunk_messages (int, optional): Maximum number of messages in each chunk.
+        - info (dict, optional): Dictionary filled with the 'first_line', 'last_line' and 'apple_device'
+          information of the export, and with the 'users' of the chat once all the chunks are consumed.
+
+        Yields:
+        - pd.DataFrame: Tidy chunk of the chat, indexed by the position of the messages in the export.
+        """
+
+        if info is None: info = {}
+        users = {}
+        group_sender = None
+        offset = 0
+
+        # A chunk without a day after the 12th reads the same both ways, so the order is told by the whole export
+        with chat_reader.open_text(txt_file) as data:
+            timestamp_format = MONTH_FIRST if chat_reader.detect_month_first(data) else None
+
+        with chat_reader.open_text(txt_file) as data:
+            for chunk_dict in chat_reader.iter_chunks(data, chunk_messages, info):
+                chunk = pd.DataFrame(chunk_dict, index=pd.RangeIndex(offset, offset + len(chunk_dict['timestamp'])))
+                offset += len(chunk)
+
+                # In some cases, the first message is the Group name with the cryptography message
+                if not users and any(keyword in chunk_dict['message'][0].lower() for keyword in ['criptografia', 'cryptography']):
+                    group_sender = chunk_dict['who_sended'][0]
+                users.update(dict.fromkeys(chunk_dict['who_sended']))
+
+                chunk = cls._enrich_data_frame(chunk, info['apple_device'], timestamp_format)
+                if group_sender is not None and len(users) > 2: chunk = chunk[chunk['who_sended'] != group_sender]
+
+                yield chunk
+
+        info['users'] = list(users)
+
+    def _aggregate_chunks(self,
+                          txt_file,
+                          chunk_messages: int):
+        """
+        Streams the chat in chunks, keeping only the message counts and the information about the export.
+
+        Parameters:
+        - txt_file (str, bytes or file-like): The export, see __init__.
+        - chunk_messages (int): Maximum number of messages in each chunk.
+        """
+
+        info = {}
+        self.message_cube = self._day_index = self._word_index = self._word_frequencies = None
+        self._clear_figure_cache()
+
+        for chunk in self.iter_chunks(txt_file, chunk_messages, info):
+            cube = MessageCube.from_frame(chunk)
+            self.message_cube = cube if self.message_cube is None else self.message_cube.merge(cube)
+
+        self._store_export_info(info)
+        self.users = info['users']
+
+    def _index_chat(self, message_cube: MessageCube = None):
+        """
+        Sorts chat_dataframe by timestamp and builds its day-boundary index, so that filtering it by date is a
+        binary search and a slice (see Utils.check_and_apply_filter_dates), and its message cube.
+
+        Parameters:
+        - message_cube (MessageCube, optional): Cube of the chat, if it was already built.
+        """
+
+        # Exports are almost always in chronological order already
+        if not self.chat_dataframe['timestamp'].is_monotonic_increasing:
+            self.chat_dataframe = self.chat_dataframe.sort_values('timestamp', kind='stable')
+
+        self._day_index = Utils.index_days(self.chat_dataframe)
+        self.message_cube = MessageCube.from_frame(self.chat_dataframe) if message_cube is None else message_cube
+        self._word_index = self._word_frequencies = None
+        self._clear_figure_cache()
+
+    def clear_figure_cache(self):
+        """
+        Removes every graph from the figure cache and forgets the hash of the content of the chat, which keys its
+        exports.
+
+        Call it after changing chat_dataframe by hand: the chat is also indexed again (see _index_chat), so that the
+        date filters, the message cube and the word index the graphs are built from reflect the change.
+        """
+        if self.chat_dataframe is None: self._clear_figure_cache()
+        else: self._index_chat()
+
+    def _clear_figure_cache(self):
+        """
+        Removes every graph from the figure cache and forgets the hash of the content of the chat, see clear_figure_cache.
+        """
+        with self._figure_cache_lock: self._figure_cache.clear()
+        self._content_hash = None
+
+    def figure_cache_info(self) -> dict:
+        """
+        Reports the use of the figure cache.
+
+        Returns:
+        - dict: The number of 'hits' and 'misses' of the cache, and its current and maximum 'size'.
+        """
+        return {**self._figure_cache_stats, 'size': len(self._figure_cache), 'max_size': self.figure_cache_size}
+
+    @property
+    def parse_state(self) -> dict:
+        """
+        State of the last parse, which allows appending a new export of the same chat with update, see
+        _define_parse_state. None if the chat was parsed in chunks.
+
+        Without a cache, the export is only hashed the first time this is read. If the .txt file was changed in the
+        meantime, it can no longer be hashed as it was parsed: the state is None and update parses the chat again.
+        """
+
+        if self._unhashed_export is not None:
+            txt_file, stamp, parse_state = self._unhashed_export
+            self._unhashed_export = None
+
+            if chat_reader.stamp_export(txt_file) != stamp: parse_state = None
+            else:
+                export_hash = chat_reader.hash_export(txt_file)
+                parse_state = {**parse_state, 'offset': export_hash['size'], 'prefix_hash': export_hash['sha256']}
+
+            self._parse_state = parse_state
+
+        return self._parse_state
+
+    @parse_state.setter
+    def parse_state(self, parse_state: dict):
+        self._parse_state = parse_state
+        self._unhashed_export = None
+
+    def _define_parse_state(self, export_hash: dict) -> dict:
+        """
+        Defines the state of the parse, which allows appending a new export of the same chat with update.
+
+        Parameters:
+        - export_hash (dict): Hash of the parsed export, as returned by chat_reader.hash_export, or None if it
+          wasn't hashed yet.
+
+        Returns:
+        - dict: The 'offset' (size in bytes) and 'prefix_hash' (SHA-256) of the parsed export, the
+          'last_timestamp' of its messages in ISO format and the 'timestamp_format' of their headers.
+        """
+
+        return {'offset': export_hash and export_hash['size'],
+                'prefix_hash': export_hash and export_hash['sha256'],
+                'last_timestamp': self.chat_dataframe['timestamp'].max().isoformat(),
+                'timestamp_format': self._timestamp_format}
+
+    def update(self,
+               txt_file,
+               parse_state: dict = None
+               ) -> bool:
+        """
+        Updates the chat with a new export of it, e.g. the same chat exported again a few days later.
+
+        If the new export starts with exactly the content that was already parsed, only the new messages
+        are parsed and appended to chat_dataframe. Otherwise, the chat is parsed again from scratch.
+
+        The new messages are scanned in memory, so the chat of a .zip export is decompressed whole here, unlike in
+        __init__, where it's streamed out of the archive.
+
+        Parameters:
+        - txt_file (str, bytes or file-like): The new export, see __init__.
+        - parse_state (dict, optional): State of the previous parse. If not provided, uses parse_state, which is
+          only hashed once read when there is no cache: read it before overwriting the parsed .txt file with the
+          new export, or the chat is parsed again from scratch.
+
+        Returns:
+        - bool: True if only the new messages were parsed, False if the whole chat was parsed again.
+        """
+
+        self._require_messages()
+        if parse_state is None: parse_state = self.parse_state
+
+        tail = None
+        self.media = self._index_media(txt_file)
+        source, txt_file = txt_file, chat_reader.read_export(txt_file)
+        export_hash = chat_reader.hash_export(txt_file, parse_state and parse_state['offset'])
+
+        if parse_state is not None and export_hash['prefix_sha256'] == parse_state['prefix_hash']:
+            tail, info = chat_reader.scan_tail(txt_file, parse_state['offset'], self.chat_downloaded_from_apple_device)
+
+        if tail is not None and not tail['timestamp']:
+            # Nothing new in the export
+            self._store_export_info(info)
+            self.parse_state = self._define_parse_state(export_hash)
+            return True
+
+        if tail is not None:
+            start = self.chat_dataframe.index.max() + 1
+            tail = pd.DataFrame(tail, index=pd.RangeIndex(start, start + len(tail['timestamp'])))
+            timestamp_format = parse_state.get('timestamp_format', DAY_FIRST)
+
+            # The new messages of a month first chat are month first too, whatever their days
+            try: tail = self._enrich_data_frame(tail, self.chat_downloaded_from_apple_device, timestamp_format if timestamp_format == MONTH_FIRST else None)
+            except ValueError: tail = None
+
+        if tail is not None:
+            users = list(dict.fromkeys(self.users + list(tail['who_sended'].unique())))
+
+            # The new messages must come after the parsed ones, be in the same format (a day first chat turns out month
+            # first once a day after the 12th shows up) and the chat must not turn into a group
+            if tail['timestamp'].min() < pd.Timestamp(parse_state['last_timestamp']): tail = None
+            elif tail.attrs['timestamp_format'] != timestamp_format: tail = None
+            elif (len(users) > 2) != self.group_chat: tail = None
+
+        if tail is None:
+            # A path is parsed again from the file itself, so that a .zip export is streamed
+            self._parse_export(source if isinstance(source, str) else txt_file)
+            return False
+
+        if self._group_sender is not None: tail = tail[tail['who_sended'] != self._group_sender]
+
+        self.chat_dataframe = pd.concat([self.chat_dataframe, tail])
+        if self._parse_options['compact']: self.chat_dataframe = self._compact_data_frame(self.chat_dataframe)
+        self._index_chat(self.message_cube.merge(MessageCube.from_frame(tail)))
+
+        self._store_export_info(info)
+        self.users = users
+        self._timestamp_format = timestamp_format
+        self._define_chat_names()
+        self.parse_state = self._define_parse_state(export_hash)
+        if self._parse_options['cache'] is not None: self._store_in_cache(self._parse_options['cache'], export_hash['sha256'])
+
+        return True
+
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Reports the memory used by chat_dataframe, e.g. to compare the standard and compact layouts.
+
+        Returns:
+        - pd.DataFrame: The 'dtype', 'bytes' and 'bytes_per_message' of the index and of each column,
+          and their sum in the 'Total' row.
+        """
+
+        self._require_messages()
+
+        usage = self.chat_dataframe.memory_usage(deep=True)
+        report = pd.DataFrame({'dtype': self.chat_dataframe.dtypes.astype(str), 'bytes': usage}, index=usage.index)
+        report.loc['Total'] = [None, usage.sum()]
+        report['bytes'] = report['bytes'].astype('int64')
+        report['bytes_per_message'] = report['bytes'] / max(len(self.chat_dataframe), 1)
+
+        return report
+
+    @staticmethod
+    def _message_type_order(message_types) -> list:
+        """
+        Returns the order of the types of message in the graphs: MESSAGE_TYPE_ORDER, then the other types in the order they appear.
+        """
+        return MESSAGE_TYPE_ORDER + [message_type for message_type in pd.unique(np.asarray(message_types, dtype=object))
+                                     if message_type not in MESSAGE_TYPE_ORDER]
+
+    def _message_type_color(self, message_type: str, type_order: list) -> str:
+        """
+        Returns the color of the bars of a type of message, given the order of the types in the graph.
+        """
+
+        colors = {'Text': self.hex['main_wpp_1'], 'Audio': self.hex['main_wpp_2'], 'Foto': self.hex['main_wpp_3'],
+                  'Sticker': self.hex['main_wpp_4'], 'Video': self.hex['main_wpp_5'], 'GIF': self.hex['main_wpp_6']}
+
+        return colors.get(message_type, figures.DEFAULT_COLORS[type_order.index(message_type) % len(figures.DEFAULT_COLORS)])
+
+    def _require_messages(self):
+        """
+        Raises an error if the messages of the chat were not kept, i.e. the chat was parsed in chunks.
+        """
+        if self.chat_dataframe is None:
+            raise ValueError("The messages of the chat are not available when it is parsed with chunk_messages.")
+
+    @_cached_figure
     def generate_graph_number_of_messages_per_day(self,
                                                   start_date: str = None,
                                                   end_date: str = None,
@@ -329,18 +1210,30 @@ class WhatsAppParser:
                                                   title: str = None,
                                                   file_name: str = None,
                                                   language: str = 'English 🇺🇸',
-                                                  fill_missing: bool = False
+                                                  fill_missing: bool = False,
+                                                  bucket: str = 'auto',
+                                                  max_points: int = 1000,
+                                                  downsample: bool = False,
+                                                  path: str = None
                                                   ) -> plotly.graph_objs._figure.Figure:
         """
         Generates a line graph showing the number of messages per day within a specified date range.
 
+        Long date ranges are shown per week or per month, so that the graph stays light in the browser.
+
         Parameters:
         - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
         - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
         - save_as_file (bool, optional): If True, saves the graph as an HTML file.
         - title (str, optional): Title of the graph.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
         - fill_missing (bool, optional): If True, fills missing days with 0 messages for each user.
+        - bucket (str, optional): 'day', 'week' or 'month' to count the messages per day, per week (dated by its
+          Monday) or per month (dated by its first day). 'auto' picks the finest one with at most max_points points per user.
+        - max_points (int, optional): Number of points per user the 'auto' bucket and downsample aim for.
+        - downsample (bool, optional): If True, the lines with more than max_points points are downsampled with the
+          Largest-Triangle-Three-Buckets algorithm, which keeps their peaks and shape.
 
         Returns:
         - plotly.graph_objs._figure.Figure: The generated line graph.
@@ -350,44 +1243,52 @@ class WhatsAppParser:
         if not title: title = texts['Graph_1']['title']
         if not file_name: file_name = '# of messages per day'
 
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
-        chat_df_grouped = filtered_df.groupby(by=["date", "who_sended"], sort=False).count()['message'].reset_index()
-
-        if fill_missing:
-            # Generate a DataFrame with all dates within the range for each sender
-            all_dates = pd.date_range(start=start_date, end=end_date).to_series(name='date')
-            all_senders = pd.Series(filtered_df['who_sended'].unique(), name='who_sended')
-            complete_df = pd.MultiIndex.from_product([all_dates, all_senders], names=['date', 'who_sended']).to_frame(index=False)
-
-            # Convert 'date' columns to datetime
-            complete_df['date'] = pd.to_datetime(complete_df['date'])
-            chat_df_grouped['date'] = pd.to_datetime(chat_df_grouped['date'])
-
-            # Merge and fill missing messages with 0
-            complete_df = pd.merge(complete_df, chat_df_grouped, how='left', on=['date', 'who_sended'])
-            complete_df['message'] = complete_df['message'].fillna(0)
-            chat_df_grouped = complete_df
-
-        fig = px.line(chat_df_grouped, x='date', y="message",
-                      title=title,
-                      labels={
-                          'date': texts['Graph_1']['labels']["0"],
-                          'who_sended': texts['Graph_1']['labels']["1"],
-                          'message': texts['Graph_1']['labels']["2"],
-                      },
-                      color='who_sended',
-                      color_discrete_sequence=[self.hex[f'main_wpp_{i}'] for i in range(1, 6)])
-
-        if not self.group_chat:
-            fig['data'][1]['line']['color'] = self.hex['main_wpp_1']
-            fig['data'][0]['line']['color'] = self.hex['main_wpp_5']
+        days, senders, counts = self.message_cube.messages_per_day_and_sender(start_date, end_date)
+
+        if fill_missing and len(days):
+            # Reindex the counts on every day of the range, with 0 messages on the days without any. The range starts
+            # where the range of the cube does, which ignores a start date without an end date (see Utils.day_range)
+            start = start_date if start_date and end_date else days[0]
+            calendar = np.arange(np.datetime64(start, 'D'), np.datetime64(end_date or days[-1], 'D') + 1)
+            filled = np.zeros((len(calendar), len(senders)), dtype=np.int64)
+            filled[(days - calendar[0]).astype(np.int64)] = counts
+            days, counts = calendar, filled
+
+        if bucket == 'auto': bucket = figures.choose_bucket(days, max_points)
+        days, counts = figures.resample(days, counts, bucket)
+
+        # The points of each user: every period if the missing days are filled, else the periods they sent messages in
+        lines = []
+        for sender, sender_counts in zip(senders, counts.T):
+            points = slice(None) if fill_missing else np.flatnonzero(sender_counts)
+            sender_days, sender_counts = days[points], sender_counts[points]
+
+            if downsample:
+                kept = figures.lttb(sender_days, sender_counts, max_points)
+                sender_days, sender_counts = sender_days[kept], sender_counts[kept]
+
+            lines.append((sender, sender_days, sender_counts))
+
+        labels = texts['Graph_1']['labels']
+        colors = [self.hex[f'main_wpp_{i}'] for i in range(1, 6)]
+        if not self.group_chat: colors[:2] = [self.hex['main_wpp_5'], self.hex['main_wpp_1']]
+
+        # A line for each user, in the order they first sent a message in the range
+        webgl = sum(len(sender_days) for _, sender_days, _ in lines) > figures.WEBGL_POINTS
+        traces = [figures.line(sender_days, sender_counts, sender, colors[position % len(colors)],
+                               f"{labels['1']}={sender}<br>{labels['0']}=%{{x}}<br>{labels['2']}=%{{y}}<extra></extra>",
+                               webgl=webgl)
+                  for position, (sender, sender_days, sender_counts) in enumerate(lines)]
+
+        fig = go.Figure(data=traces, layout=figures.layout(title, labels['0'], labels['2'], legend_title=labels['1']))
 
         if save_as_file:
-            self._create_graphs_folder()
-            fig.write_html(f"{self._folder_name}/{file_name}.html")
+            path = self._create_graphs_folder(path)
+            fig.write_html(f"{path}/{file_name}.html")
 
         return fig
 
+    @_cached_figure
     def generate_graph_number_of_types_of_messages(self,
                                                    save_as_file: bool = False,
                                                    title: str = None,
@@ -395,6 +1296,7 @@ class WhatsAppParser:
                                                    language: str = 'English 🇺🇸',
                                                    start_date: str = None,
                                                    end_date: str = None,
+                                                   path: str = None
                                                    ) -> plotly.graph_objs._figure.Figure:
         """
         Generates a bar graph showing the number of each type of messages.
@@ -403,6 +1305,7 @@ class WhatsAppParser:
         - save_as_file (bool, optional): If True, saves the graph as an HTML file.
         - title (str, optional): Title of the graph.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
 
         Returns:
         - plotly.graph_objs._figure.Figure: The generated bar graph.
@@ -412,52 +1315,34 @@ class WhatsAppParser:
         texts = Utils.read_language_files(language)
         if not title: title = texts['Graph_2']['title']
         if not file_name: file_name = '# of type of message'
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
-
-        # Group chat DataFrame by message type and count the number of messages
-        chat_df_grouped = filtered_df.groupby(by=['message_type']).count()['message']
-        chat_df_grouped = chat_df_grouped.reset_index(drop=False)
-
-        # Create a bar graph using plotly express
-        fig = px.bar(chat_df_grouped.sort_values(by=['message'], ascending=False), x='message_type', y='message',
-                     labels={
-                         'message': texts['Graph_2']['labels']['message'],
-                         'message_type': texts['Graph_2']['labels']['message_type']},
-                     color='message_type',
-                     text='message',
-                     title=title,
-                     hover_name="message_type",
-                     hover_data=["message"],
-                     category_orders={"message_type": ["Text", "Audio", "Foto", "Sticker", "Video", "GIF"]})
-
-        # Set marker colors for each message type
-        try:
-            offsetgroup_colors = {
-                'Text': self.hex['main_wpp_1'],
-                'Audio': self.hex['main_wpp_2'],
-                'Foto': self.hex['main_wpp_3'],
-                'Sticker': self.hex['main_wpp_4'],
-                'Video': self.hex['main_wpp_5'],
-                'GIF': self.hex['main_wpp_6'],
-            }
 
-            for entry in fig['data']:
-                offsetgroup = entry['offsetgroup']
-                if offsetgroup in offsetgroup_colors:
-                    entry['marker']['color'] = offsetgroup_colors[offsetgroup]
-
-        except Exception: pass
-
-        # Update trace properties and layout
-        fig.update_traces(texttemplate='', textposition='outside')
-        fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
+        # Count the number of messages of each message type
+        chat_df_grouped = self.message_cube.messages_per_type(start_date, end_date).sort_values(by=['message'], ascending=False)
+        labels = texts['Graph_2']['labels']
+        type_order = self._message_type_order(chat_df_grouped['message_type'])
+
+        # A bar for each message type
+        traces = [figures.bar(types, messages, message_type, self._message_type_color(message_type, type_order),
+                              f"<b>%{{hovertext}}</b><br><br>{labels['message_type']}=%{{x}}<br>{labels['message']}=%{{text}}<extra></extra>",
+                              hovertext=types, text=messages.astype(str), textposition='outside', texttemplate='')
+                  for message_type, types, messages in figures.groups(chat_df_grouped['message_type'],
+                                                                      chat_df_grouped['message_type'],
+                                                                      chat_df_grouped['message'],
+                                                                      order=type_order)]
+
+        fig = go.Figure(data=traces, layout=figures.layout(title, labels['message_type'], labels['message'],
+                                                           legend_title=labels['message_type'],
+                                                           xaxis=dict(categoryorder='array', categoryarray=type_order),
+                                                           barmode='relative',
+                                                           uniformtext=dict(minsize=8, mode='hide')))
 
         # Save the graph as an HTML file if save_as_file is True
         if not save_as_file: return fig
 
-        self._create_graphs_folder()
-        fig.write_html(f"{self._folder_name}/{file_name}.html")
+        path = self._create_graphs_folder(path)
+        fig.write_html(f"{path}/{file_name}.html")
 
+    @_cached_figure
     def generate_graph_number_of_types_of_messages_per_user(self,
                                                             save_as_file: bool = False,
                                                             title: str = None,
@@ -465,6 +1350,7 @@ class WhatsAppParser:
                                                             language: str = 'English 🇺🇸',
                                                             start_date: str = None,
                                                             end_date: str = None,
+                                                            path: str = None
                                                             ) -> plotly.graph_objs._figure.Figure:
         """
         Generates a bar graph showing the number of each type of messages per user.
@@ -473,6 +1359,7 @@ class WhatsAppParser:
         - save_as_file (bool, optional): If True, saves the graph as an HTML file.
         - title (str, optional): Title of the graph.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
 
         Returns:
         - plotly.graph_objs._figure.Figure: The generated bar graph.
@@ -482,11 +1369,9 @@ class WhatsAppParser:
         texts = Utils.read_language_files(language)
         if not title: title = texts['Graph_3']['title']
         if not file_name: file_name = '# of type of message per user'
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
 
-        # Group chat DataFrame by sender and message type, count the number of messages
-        df_d = filtered_df.groupby(by=["who_sended", "message_type"]).count()["message"]
-        df_d = df_d.reset_index(drop=False)
+        # Count the number of messages of each sender and message type
+        df_d = self.message_cube.messages_per_sender_and_type(start_date, end_date)
 
         # Calculate the total number of messages per user
         total_messages_per_user = df_d.groupby('who_sended')['message'].sum().reset_index()
@@ -494,44 +1379,31 @@ class WhatsAppParser:
         # Sort DataFrame based on the total number of messages in descending order
         total_messages_per_user = total_messages_per_user.sort_values(by='message', ascending=False)
 
-        # Create a bar graph using plotly express
-        fig = px.bar(df_d, x="who_sended", y="message",
-                     color='message_type',
-                     title=title,
-                     labels={
-                         'index': texts['Graph_3']['labels']['index'],
-                         'who_sended': texts['Graph_3']['labels']['who_sended'],
-                         'message_type': texts['Graph_3']['labels']['message_type'],
-                         'message': texts['Graph_3']['labels']['message']
-                     },
-                     hover_name="message_type",
-                     hover_data=["message"],
-                     category_orders={"message_type": ["Text", "Audio", "Foto", "Sticker", "Video", "GIF"],
-                                      "who_sended": total_messages_per_user['who_sended'].tolist()})
-        # Set marker colors for each message type
-        try:
-            offsetgroup_colors = {
-                'Text': self.hex['main_wpp_1'],
-                'Audio': self.hex['main_wpp_2'],
-                'Foto': self.hex['main_wpp_3'],
-                'Sticker': self.hex['main_wpp_4'],
-                'Video': self.hex['main_wpp_5'],
-                'GIF': self.hex['main_wpp_6'],
-            }
-
-            for entry in fig['data']:
-                offsetgroup = entry['offsetgroup']
-                if offsetgroup in offsetgroup_colors:
-                    entry['marker']['color'] = offsetgroup_colors[offsetgroup]
-
-        except Exception: pass
+        # A group of bars for each message type, with a bar for each user who sent it
+        labels = texts['Graph_3']['labels']
+        type_order = self._message_type_order(df_d['message_type'])
+        traces = [figures.bar(senders, messages, message_type, self._message_type_color(message_type, type_order),
+                              f"<b>%{{hovertext}}</b><br><br>{labels['message_type']}={message_type}<br>"
+                              f"{labels['who_sended']}=%{{x}}<br>{labels['message']}=%{{y}}<extra></extra>",
+                              hovertext=np.full(len(senders), message_type, dtype=object))
+                  for message_type, senders, messages in figures.groups(df_d['message_type'],
+                                                                        df_d['who_sended'],
+                                                                        df_d['message'],
+                                                                        order=type_order)]
+
+        fig = go.Figure(data=traces, layout=figures.layout(title, labels['who_sended'], labels['message'],
+                                                           legend_title=labels['message_type'],
+                                                           xaxis=dict(categoryorder='array',
+                                                                      categoryarray=total_messages_per_user['who_sended'].tolist()),
+                                                           barmode='relative'))
 
         # Save the graph as an HTML file if save_as_file is True
         if not save_as_file: return fig
 
-        self._create_graphs_folder()
-        fig.write_html(f"{self._folder_name}/{file_name}.html")
+        path = self._create_graphs_folder(path)
+        fig.write_html(f"{path}/{file_name}.html")
 
+    @_cached_figure
     def generate_graph_number_of_messages_per_hour(self,
                                                    save_as_file: bool = False,
                                                    title: str = None,
@@ -539,6 +1411,7 @@ class WhatsAppParser:
                                                    language: str = 'English 🇺🇸',
                                                    start_date: str = None,
                                                    end_date: str = None,
+                                                   path: str = None
                                                    ) -> plotly.graph_objs._figure.Figure:
         """
         Generates a bar graph showing the number of messages per hour.
@@ -547,6 +1420,7 @@ class WhatsAppParser:
         - save_as_file (bool, optional): If True, saves the graph as an HTML file.
         - title (str, optional): Title of the graph.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
 
         Returns:
         - plotly.graph_objs._figure.Figure: The generated bar graph.
@@ -556,99 +1430,85 @@ class WhatsAppParser:
         texts = Utils.read_language_files(language)
         if not title: title = texts['Graph_4']['title']
         if not file_name: file_name = '# of messages per hour'
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
-
-        # Create a DataFrame with all hours
-        all_hours_df = pd.DataFrame({'hour': range(24)})
-
-        # Merge with your current DataFrame to fill missing hours with 0 messages
-        df_d = pd.merge(all_hours_df, filtered_df.groupby(by=["hour"]).count()['message'].reset_index(),
-                        how='left', on='hour').fillna(0)
-
-        # Sort the DataFrame by hour
-        df_d = df_d.sort_values('hour', ascending=True)
-
-        # Create a bar graph using plotly express
-        fig = px.bar(df_d, x='hour', y='message',
-                     text='message',
-                     color="message",
-                     title=title,
-                     labels={
-                         'message': texts['Graph_4']['labels']['message'],
-                         'hour': texts['Graph_4']['labels']['hour']
-                     },
-                     color_continuous_scale='Greens')
-
-        # Update trace properties and layout
-        fig.update_traces(texttemplate='', textposition='auto')
-
-        fig.update_xaxes(
-            showgrid=True,
-            ticks="outside",
-            tickson="boundaries",
-            ticklen=20,
-            tickmode='array',
-            tickvals=df_d['hour'].tolist(),
-            ticktext=df_d['hour'].tolist()
-        )
 
-        fig.update_layout(uniformtext_minsize=10, bargap=0.1)
+        # Number of messages of every hour, with 0 messages for the hours without any
+        per_hour = self.message_cube.messages_per_hour(start_date, end_date)
+        hours = np.arange(24)
+        messages = np.zeros(24, dtype=np.int64)
+        messages[per_hour['hour'].to_numpy()] = per_hour['message'].to_numpy()
+
+        labels = texts['Graph_4']['labels']
+        trace = figures.bar(hours, messages, color=messages, coloraxis='coloraxis',
+                            hovertemplate=f"{labels['hour']}=%{{x}}<br>{labels['message']}=%{{marker.color}}<extra></extra>",
+                            text=messages.astype(str), texttemplate='')
+
+        fig = go.Figure(data=[trace], layout=figures.layout(title, labels['hour'], labels['message'],
+                                                            xaxis=dict(showgrid=True,
+                                                                       ticks='outside',
+                                                                       tickson='boundaries',
+                                                                       ticklen=20,
+                                                                       tickmode='array',
+                                                                       tickvals=hours.tolist(),
+                                                                       ticktext=hours.tolist()),
+                                                            coloraxis=dict(colorbar=dict(title=dict(text=labels['message'])),
+                                                                           colorscale='Greens'),
+                                                            barmode='relative',
+                                                            uniformtext=dict(minsize=10),
+                                                            bargap=0.1))
 
         # Save the graph as an HTML file if save_as_file is True
         if not save_as_file: return fig
 
-        self._create_graphs_folder()
-        fig.write_html(f"{self._folder_name}/{file_name}.html")
+        path = self._create_graphs_folder(path)
+        fig.write_html(f"{path}/{file_name}.html")
 
+    @_cached_figure
     def generate_word_cloud(self,
                             remove_words: list = None,
                             save_as_file: bool = False,
-                            file_name: str = None
+                            file_name: str = None,
+                            start_date: str = None,
+                            end_date: str = None,
+                            preview: bool = False,
+                            path: str = None
                             ) -> WordCloud:
         """
         Generates a word cloud from text messages.
 
+        The words are counted per day once (see WordFrequencies), so a date range only merges the counts of its days,
+        and the rendered word clouds are kept in a render cache keyed by their frequencies. No matplotlib figure is
+        created: show it with wordcloud.to_image() or wordcloud.to_array().
+
         Parameters:
         - remove_words (list, optional): List of words to be removed from the word cloud.
         - save_as_file (bool, optional): If True, saves the word cloud as a PNG file.
         - file_name (str, optional): Name of the PNG file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
+        - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
+        - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
+        - preview (bool, optional): If True, renders a lower resolution word cloud, faster for interactive use.
 
         Returns:
         - WordCloud: The generated word cloud object.
         """
 
+        self._require_messages()
+
         # Set default values for file_name and remove_words if not provided
         if not file_name: file_name = 'WordCloud'
         if not remove_words: remove_words = self.words_to_be_removed
 
-        # Filter DataFrame to include only text messages
-        df = self.chat_dataframe[self.chat_dataframe['message_type'] == 'Text']
-
-        # Concatenate all text messages into a single string
-        summary = df['message']
-        all_summary = " ".join(str(s) for s in summary)
+        frequencies = self._get_word_frequencies().frequencies(start_date, end_date, remove_words)
 
-        # Set up stopwords and update with words to be removed
-        stopwords = set(STOPWORDS)
-        stopwords.update(remove_words)
-
-        wordcloud = WordCloud(stopwords=stopwords,
-                              background_color='black',
-                              width=1600,
-                              height=800,
-                              colormap='BuGn_r').generate(all_summary)
-
-        # Create a plot for the word cloud
-        _, ax = plt.subplots(figsize=(16, 8))
-        ax.imshow(wordcloud, interpolation='bilinear')
-        ax.set_axis_off()
+        wordcloud = _render_word_cloud(frequencies, WORD_CLOUD_PREVIEW_SIZE if preview else WORD_CLOUD_SIZE)
 
         # Save the word cloud as a PNG file if save_as_file is True
         if not save_as_file: return wordcloud
 
-        self._create_graphs_folder()
-        wordcloud.to_file(f'{self._folder_name}/{file_name}.png')
+        path = self._create_graphs_folder(path)
+        wordcloud.to_file(f'{path}/{file_name}.png')
 
+    @_cached_figure
     def generate_number_of_messages_per_user(self,
                                              save_as_file: bool = False,
                                              title: str = None,
@@ -656,6 +1516,7 @@ class WhatsAppParser:
                                              language: str = 'English 🇺🇸',
                                              start_date: str = None,
                                              end_date: str = None,
+                                             path: str = None
                                              ) -> plotly.graph_objs._figure.Figure:
         """
         Generates a pie chart showing the number of messages per user.
@@ -664,6 +1525,7 @@ class WhatsAppParser:
         - save_as_file (bool, optional): If True, saves the pie chart as an HTML file.
         - title (str, optional): Title of the pie chart.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
 
         Returns:
         - plotly.graph_objs._figure.Figure: The generated pie chart.
@@ -673,26 +1535,22 @@ class WhatsAppParser:
         texts = Utils.read_language_files(language)
         if not title: title = texts['Graph_5']['title']
         if not file_name: file_name = '# of messages per user'
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
 
         # Count the number of messages per user
-        message_counts = filtered_df['who_sended'].value_counts()
+        message_counts = self.message_cube.messages_per_sender(start_date, end_date).sort_values(ascending=False)
 
         group = [self.hex[f'main_wpp_{i}'] for i in range(1, 6)]
         not_group = [self.hex['main_wpp_1'], self.hex['main_wpp_5']]
-        fig = px.pie(
-            names=message_counts.index,
-            values=message_counts,
-            title=title,
-            color_discrete_sequence=group if self.group_chat else not_group
-        )
+        fig = go.Figure(data=[figures.pie(message_counts.index.to_numpy(), message_counts.to_numpy())],
+                        layout=figures.layout(title, piecolorway=group if self.group_chat else not_group))
 
         # Save the pie chart as an HTML file if save_as_file is True
         if not save_as_file: return fig
 
-        self._create_graphs_folder()
-        fig.write_html(f"{self._folder_name}/{file_name}.html")
+        path = self._create_graphs_folder(path)
+        fig.write_html(f"{path}/{file_name}.html")
 
+    @_cached_figure
     def generate_activity_heatmap(self,
                                   save_as_file: bool = False,
                                   title: str = None,
@@ -700,6 +1558,7 @@ class WhatsAppParser:
                                   language: str = 'English 🇺🇸',
                                   start_date: str = None,
                                   end_date: str = None,
+                                  path: str = None
                                   ) -> go.Figure:
         """
         Generates an activity heatmap showing the message count per hour of the day and day of the week.
@@ -708,6 +1567,7 @@ class WhatsAppParser:
         - save_as_file (bool, optional): If True, saves the heatmap as an HTML file.
         - title (str, optional): Title of the heatmap.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
 
         Returns:
         - go.Figure: The generated activity heatmap.
@@ -719,85 +1579,52 @@ class WhatsAppParser:
             title = texts['Graph_6']['title']
         if not file_name:
             file_name = 'Activity Heatmap'
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
-
-        # Generate all combinations of weekday numbers and hours
-        all_combinations = pd.DataFrame(list(product(range(7), range(24))),
-                                        columns=['weekday_number', 'hour'])
-        all_combinations['weekday_number'] = all_combinations['weekday_number'].astype(int)
-        all_combinations['hour'] = all_combinations['hour'].astype(int)
-
-        # Calculate message counts per weekday and hour
-        activity_data = filtered_df.groupby(['weekday_number', 'hour']).size().reset_index(name='message_count')
-
-        # Merge all combinations with actual data, filling missing values with zeros
-        result = pd.merge(all_combinations, activity_data, on=['weekday_number', 'hour'], how='left').fillna(0)
-        result.sort_values(by=['weekday_number', 'hour'], ascending=[True, True], inplace=True)
 
-        # Pivot the result to create a table with rows as weekday numbers, columns as hours, and values as message counts
-        pivot_df = result.pivot(index='weekday_number', columns='hour', values='message_count')
+        # Message count of every weekday and hour. The weekdays of the labels start on Sunday, which is day 7
+        activity_data = self.message_cube.messages_per_weekday_and_hour(start_date, end_date)
+        hours = np.arange(24)
+        counts = np.zeros((7, 24), dtype=np.int64)
+        counts[activity_data['weekday_number'].to_numpy() % 7, activity_data['hour'].to_numpy()] = activity_data['message_count'].to_numpy()
 
-        # Verifica o idioma e faz o mapeamento dos dias da semana de acordo
         weekdays = texts['Graph_6']['labels']['weekdays']
-        weekday_mapping = {i: weekdays[i] for i in range(7)}
-        pivot_df.index = pivot_df.index.map(weekday_mapping)
-
-        # Create the activity heatmap using plotly.graph_objs
-        fig = go.Figure(data=go.Heatmap(
-            z=pivot_df.values,
-            x=pivot_df.columns,
-            y=pivot_df.index,
-            colorscale='Greens',  # Mantendo a paleta de cores Greens
-            zmin=0,
-            zmax=pivot_df.values.max(),
-            colorbar=dict(title=texts['Graph_6']['labels'].get('z', 'Message Count')),
-            hovertemplate=(
-                f"<b>{texts['Graph_6']['hover'].get('x', 'Hour')}:</b> %{{x}}<br>"
-                f"<b>{texts['Graph_6']['hover'].get('y', 'Day')}:</b> %{{y}}<br>"
-                f"<b>{texts['Graph_6']['hover'].get('z', 'Message Count')}:</b> %{{z}}<extra></extra>"
-            )
-        ))
-
-        # Add annotations to each cell with the message count value
-        annotations = []
-        for i, weekday in enumerate(pivot_df.index):
-            for j, hour in enumerate(pivot_df.columns):
-                value = pivot_df.iloc[i, j]
-                annotations.append(
-                    dict(
-                        x=hour,
-                        y=weekday,
-                        text=str(int(value)),  # Convert the value to an integer string
-                        showarrow=False,
-                        font=dict(
-                            color='white' if value > (pivot_df.values.max() * 0.3) else 'black'  # Aumentando o limite para melhor visibilidade dos valores baixos
-                        )
-                    )
-                )
 
+        # Create the activity heatmap, with the message count written on each cell
+        traces = figures.heatmap(counts, hours, weekdays,
+                                 colorscale='Greens',
+                                 colorbar=dict(title=texts['Graph_6']['labels'].get('z', 'Message Count')),
+                                 hovertemplate=(
+                                     f"<b>{texts['Graph_6']['hover'].get('x', 'Hour')}:</b> %{{x}}<br>"
+                                     f"<b>{texts['Graph_6']['hover'].get('y', 'Day')}:</b> %{{y}}<br>"
+                                     f"<b>{texts['Graph_6']['hover'].get('z', 'Message Count')}:</b> %{{z}}<extra></extra>"
+                                 ))
+
+        # The axes end at the edges of the cells
+        fig = go.Figure(data=traces)
         fig.update_layout(
             title=title,
             yaxis=dict(
                 tickmode='array',
-                tickvals=list(pivot_df.index),
-                ticktext=list(pivot_df.index),
+                tickvals=weekdays,
+                ticktext=weekdays,
+                range=[-0.5, len(weekdays) - 0.5],
                 title=texts['Graph_6']['labels'].get('y', 'Weekday')
             ),
             xaxis=dict(
                 tickmode='array',
-                tickvals=list(pivot_df.columns),
+                tickvals=hours.tolist(),
+                range=[-0.5, len(hours) - 0.5],
                 title=texts['Graph_6']['labels'].get('x', 'Hour of Day')
-            ),
-            annotations=annotations
+            )
         )
 
         # Save the heatmap as an HTML file if save_as_file is True
         if save_as_file:
-            self._create_graphs_folder()
-            fig.write_html(f"{self._folder_name}/{file_name}.html")
+            path = self._create_graphs_folder(path)
+            fig.write_html(f"{path}/{file_name}.html")
 
         return fig
 
+    @_cached_figure
     def generate_first_last_message(self,
                                     save_as_file: bool = False,
                                     title: str = None,
@@ -805,6 +1632,7 @@ class WhatsAppParser:
                                     language: str = 'English 🇺🇸',
                                     start_date: str = None,
                                     end_date: str = None,
+                                    path: str = None
                                     ) -> plotly.graph_objs._figure.Figure:
         """
         Generates a grouped bar chart comparing the counts of first and last messages sent by each user.
@@ -813,6 +1641,7 @@ class WhatsAppParser:
         - save_as_file (bool, optional): If True, saves the chart as an HTML file.
         - title (str, optional): Title of the grouped bar chart.
         - file_name (str, optional): Name of the HTML file if save_as_file is True.
+        - path (str, optional): Folder of the file if save_as_file is True. If not provided, uses the graphs folder of the chat.
         - language (str, optional): Language for localization. Default is 'English 🇺🇸'.
         - start_date (str, optional): Start date for filtering the data.
         - end_date (str, optional): End date for filtering the data.
@@ -825,78 +1654,205 @@ class WhatsAppParser:
         texts = Utils.read_language_files(language)
         if not title: title = texts['Graph_7']['title']
         if not file_name: file_name = 'Comparison_of_First_and_Last_Messages_Count'
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
+        filtered_df = self.message_cube.first_last_senders(start_date, end_date)
 
-        first_message_users = filtered_df.groupby(['date']).agg({'who_sended': 'first'})
-        user_counts = first_message_users['who_sended'].value_counts()
+        user_counts = filtered_df['first'].value_counts()
         first_messages_df = pd.DataFrame({'user': user_counts.index, texts['Graph_7']['dataframe_columns']['first']: user_counts.values})
 
-        last_message_users = filtered_df.groupby(['date']).agg({'who_sended': 'last'})
-        user_counts = last_message_users['who_sended'].value_counts()
+        user_counts = filtered_df['last'].value_counts()
         last_messages_df = pd.DataFrame({'user': user_counts.index, texts['Graph_7']['dataframe_columns']['last']: user_counts.values})
 
         # Merge the two DataFrames on the 'user' column
         merged_df = pd.merge(first_messages_df, last_messages_df, on='user', suffixes=('_first', '_last'))
-        fig = px.bar(merged_df, x='user', y=[texts['Graph_7']['dataframe_columns']['first'], texts['Graph_7']['dataframe_columns']['last']],
-                     labels={texts['Graph_7']['dataframe_columns']['first']: 'First Messages', texts['Graph_7']['dataframe_columns']['last']: 'Last Messages'},
-                     title=title,
-                     color_discrete_map={texts['Graph_7']['dataframe_columns']['first']: self.hex['main_wpp_5'],
-                                         texts['Graph_7']['dataframe_columns']['last']: self.hex['main_wpp_1']})
+        # A group of bars for the first and the last messages, if any user sent both
+        columns = [texts['Graph_7']['dataframe_columns']['first'], texts['Graph_7']['dataframe_columns']['last']]
+        traces = [figures.bar(merged_df['user'].to_numpy(), merged_df[column].to_numpy(), column, color,
+                              f"variable={column}<br>user=%{{x}}<br>value=%{{y}}<extra></extra>")
+                  for column, color in zip(columns, [self.hex['main_wpp_5'], self.hex['main_wpp_1']]) if len(merged_df)]
 
-        fig.update_layout(barmode='group',
-                          xaxis_title=texts['Graph_7']['labels']['xaxis_title'],
-                          yaxis_title=texts['Graph_7']['labels']['yaxis_title'],
-                          legend_title=texts['Graph_7']['labels']['legend_title'])
+        labels = texts['Graph_7']['labels']
+        fig = go.Figure(data=traces, layout=figures.layout(title, labels['xaxis_title'], labels['yaxis_title'],
+                                                           legend_title=labels['legend_title'], barmode='group'))
 
         if not save_as_file: return fig
 
-        self._create_graphs_folder()
-        fig.write_html(f"{self._folder_name}/{file_name}.html")
+        path = self._create_graphs_folder(path)
+        fig.write_html(f"{path}/{file_name}.html")
+
+    def _get_word_frequencies(self) -> WordFrequencies:
+        """
+        Returns the per-day word frequencies of the text messages, counting them on the first word cloud.
+        """
+
+        with self._indexes_lock:
+            if self._word_frequencies is None:
+                text = (self.chat_dataframe['message_type'] == 'Text').to_numpy()
+                self._word_frequencies = WordFrequencies(self.chat_dataframe['message'][text], self.chat_dataframe['timestamp'][text])
+
+        return self._word_frequencies
+
+    def _get_word_index(self) -> WordIndex:
+        """
+        Returns the word index of the chat, building it on the first search.
+        """
+
+        with self._indexes_lock:
+            if self._word_index is None:
+                self._word_index = WordIndex(self.chat_dataframe['message'], self.chat_dataframe['who_sended'])
+
+        return self._word_index
+
+    @staticmethod
+    def _word_pattern(word: str, whole_word: bool) -> str:
+        """
+        Returns the pattern searched in the lower-cased messages when a word can't be answered from the word index.
+        """
+        return rf'(?<!\w){re.escape(word.lower())}(?!\w)' if whole_word else word.lower()
+
+    def _messages_to_search(self, word: str, whole_word: bool) -> pd.DataFrame:
+        """
+        Returns the messages searched for a word that can't be answered from the word index, e.g. a phrase: only
+        the ones with all of its words, found from the word index (see WordIndex.messages_containing).
+        """
+
+        # Without whole_word the word is searched as a regular expression, whose words aren't all in every match
+        if not whole_word and re.search(r'[.^$*+?{}\[\]\\|()]', word): return self.chat_dataframe
+
+        positions = self._get_word_index().messages_containing(word, whole_word)
+        return self.chat_dataframe if positions is None else self.chat_dataframe.iloc[positions]
 
     def count_word_occurrences(self,
-                               word: str) -> int:
+                               word: str,
+                               whole_word: bool = False) -> int:
         """
         Count the occurrences of a word in the 'message' column of the WhatsApp conversation data.
 
+        Words made only of letters, digits and '_' are counted from the word index of the chat. Any other
+        word, e.g. a phrase, is searched as a regular expression in the messages that have all of its words.
+
         Parameters:
         - word (str): The word to count occurrences for.
+        - whole_word (bool, optional): If True, counts only whole words, otherwise also the occurrences inside longer words.
 
         Returns:
         - int: The number of occurrences of the word in the 'message' column.
         """
-        # Ensure 'message' column is of type string
-        self.chat_dataframe['message'] = self.chat_dataframe['message'].astype(str)
+        self._require_messages()
+
+        if WordIndex.supports(word): return self._get_word_index().count_by_sender(word, whole_word).sum()
 
         # Count occurrences of the word in the 'message' column
-        return self.chat_dataframe['message'].str.lower().str.count(word.lower()).sum()
+        messages = self._messages_to_search(word, whole_word)['message']
+        return messages.astype(str).str.lower().str.count(self._word_pattern(word, whole_word)).sum()
 
     def count_word_occurrences_by_person(self,
-                                         word: str) -> pd.DataFrame:
+                                         word: str,
+                                         whole_word: bool = False) -> pd.DataFrame:
         """
         Count the occurrences of a word in the 'message' column of the WhatsApp conversation data for each person.
 
         Parameters:
         - word (str): The word to count occurrences for.
+        - whole_word (bool, optional): If True, counts only whole words, otherwise also the occurrences inside longer words.
 
         Returns:
         - pd.DataFrame: A dataframe where the index (username) starts from 1 and values are the number of occurrences of the word.
         """
 
+        self._require_messages()
+
         # Count occurrences of the word in the 'message' column for each person
-        word_counts_by_person = self.chat_dataframe.groupby('who_sended')['message'].apply(lambda x: x.str.lower().str.count(word.lower()).sum())
+        if WordIndex.supports(word):
+            word_counts_by_person = self._get_word_index().count_by_sender(word, whole_word).sort_index()
+            word_counts_by_person = word_counts_by_person.rename('message').rename_axis('who_sended')
+        else:
+            # Every person is listed, also the ones without any message to search
+            pattern = self._word_pattern(word, whole_word)
+            messages = self._messages_to_search(word, whole_word)
+            word_counts_by_person = messages['message'].str.lower().str.count(pattern).groupby(messages['who_sended'], observed=True).sum()
+            word_counts_by_person = word_counts_by_person.reindex(sorted(self.message_cube.senders), fill_value=0).rename_axis('who_sended')
 
         # Reset index starting from 1
         result_df = pd.DataFrame(word_counts_by_person).sort_values(by=['message'], ascending=False).reset_index()
         result_df.index += 1  # Add 1 to the index
         return result_df
 
+    def count_terms(self,
+                    terms: list,
+                    start_date: str = None,
+                    end_date: str = None,
+                    case_sensitive: bool = False,
+                    whole_word: bool = False,
+                    regex: bool = False) -> pd.DataFrame:
+        """
+        Count the occurrences of several terms at once for each person, e.g. a list of product names or topics.
+
+        Over the whole chat, case-insensitive terms made only of letters, digits and '_' are counted from the word
+        index of the chat. The other terms are all counted in a single pass over the messages in the date range.
+
+        Parameters:
+        - terms (list): The terms to count occurrences for.
+        - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
+        - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
+        - case_sensitive (bool, optional): If False, the terms are counted case-insensitively.
+        - whole_word (bool, optional): If True, counts only whole words, otherwise also the occurrences inside longer words.
+        - regex (bool, optional): If True, the terms are regular expressions (whole_word is ignored).
+
+        Returns:
+        - pd.DataFrame: A dataframe with a row per person ('who_sended'), sorted by name, and a column with the number of occurrences of each term.
+        """
+
+        self._require_messages()
+
+        terms = list(terms)
+        senders = pd.Index(sorted(self.message_cube.senders), name='who_sended')
+        counts = np.zeros((len(senders), len(terms)), dtype=np.int64)
+        scanned = list(range(len(terms)))
+
+        if not (start_date or end_date or case_sensitive or regex):
+            scanned = [column for column, term in enumerate(terms) if not WordIndex.supports(term)]
+            for column in set(range(len(terms))) - set(scanned):
+                counts[:, column] = self._get_word_index().count_by_sender(terms[column], whole_word).reindex(senders, fill_value=0)
+
+        if scanned:
+            filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe, self._day_index)
+            found = count_terms(filtered_df['message'], filtered_df['who_sended'], [terms[column] for column in scanned],
+                                case_sensitive, whole_word, regex)
+            counts[:, scanned] = found.reindex(senders, fill_value=0).to_numpy()
+
+        return pd.DataFrame(counts, index=senders, columns=terms)
+
     def display_dataframe(self,
                           language: str = 'English 🇺🇸',
                           start_date: str = None,
                           end_date: str = None):
 
+        self._require_messages()
+
         texts = Utils.read_language_files(language)
-        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe)
-        if language == 'Português 🇧🇷': filtered_df['weekday'] = filtered_df['weekday'].map(self.weekdays_translation)
+        filtered_df = Utils.check_and_apply_filter_dates(start_date, end_date, self.chat_dataframe, self._day_index)
+        if language == 'Português 🇧🇷': filtered_df = filtered_df.assign(weekday=filtered_df['weekday'].map(self.weekdays_translation))
 
         return filtered_df[['timestamp', 'who_sended', 'message', 'message_type', 'weekday']].rename(columns=texts['dataframe_columns'])
+
+
+def _parse_shard(txt_file,
+                 start: int,
+                 end: int,
+                 apple_device: bool
+                 ) -> pd.DataFrame:
+    """
+    Parses and enriches a byte range of an export. Defined at module level so it can run in a process pool.
+
+    Parameters:
+    - txt_file (str or bytes): Path to the .txt file, or the content of the chat.
+    - start (int): Offset of the first message of the range.
+    - end (int): Offset where the range ends.
+    - apple_device (bool): Whether the chat was downloaded from an Apple device.
+
+    Returns:
+    - pd.DataFrame: The enriched messages of the range.
+    """
+
+    chat_dataframe = pd.DataFrame(chat_reader.scan_range(txt_file, start, end, apple_device))
+    return WhatsAppParser._enrich_data_frame(chat_dataframe, apple_device)
@@ -0,0 +1,98 @@
+from collections import Counter
+from wordcloud import STOPWORDS
+from utils import Utils
+import pandas as pd
+import numpy as np
+import re
+
+# Words as WordCloud.generate splits them
+TOKEN = r"\w[\w']*"
+
+
+class WordFrequencies:
+    def __init__(self, messages: pd.Series, timestamps: pd.Series):
+        """
+        Initializes a WordFrequencies instance, the number of times each word was written on each day, which the
+        word cloud of any date range is built from.
+
+        The messages are split in words once, the way WordCloud.generate does it, without the numbers and the
+        STOPWORDS. The frequencies of a date range are then merged from the tables of its days.
+
+        Parameters:
+        - messages (pd.Series): Content of the text messages.
+        - timestamps (pd.Series): Timestamp of each message, in chronological order.
+        """
+
+        messages = messages.fillna('').astype(str)
+        day_codes, days = pd.factorize(timestamps.values.astype('datetime64[D]'), sort=True)
+        words, table_days, counts = [], [], []
+
+        # Split the messages of each day at once
+        for code, day_messages in messages.groupby(day_codes, sort=True):
+            day_counts = Counter(re.findall(TOKEN, ' '.join(day_messages)))
+            words.extend(day_counts.keys())
+            table_days.append(np.full(len(day_counts), code))
+            counts.append(np.fromiter(day_counts.values(), dtype=np.int64, count=len(day_counts)))
+
+        # Remove the "'s" endings, the numbers and the stopwords, once per distinct word
+        word_codes, vocabulary = pd.factorize(np.array(words, dtype=object))
+        vocabulary = pd.Index(vocabulary, dtype=object).str.replace(r"'[sS]$", '', regex=True)
+        removed = vocabulary.str.isdigit() | vocabulary.str.lower().isin({stopword.lower() for stopword in STOPWORDS})
+        clean_codes, vocabulary = pd.factorize(vocabulary)
+        kept = ~np.asarray(removed)[word_codes]
+
+        table = pd.DataFrame({'day': np.concatenate(table_days or [[]]).astype(np.int64)[kept],
+                              'word': clean_codes[word_codes][kept],
+                              'count': np.concatenate(counts or [[]]).astype(np.int64)[kept]})
+        table = table.groupby(['day', 'word'], sort=True)['count'].sum()
+
+        # One row per day and word, by day: the rows of a day are a slice between two offsets
+        table_days = table.index.get_level_values('day').to_numpy()
+        self.words = np.asarray(vocabulary, dtype=object)[table.index.get_level_values('word').to_numpy()]
+        self.counts = table.to_numpy()
+        self.days = np.asarray(days, dtype='datetime64[D]')
+        self.offsets = np.searchsorted(table_days, np.arange(len(self.days) + 1))
+
+    def frequencies(self,
+                    start_date: str = None,
+                    end_date: str = None,
+                    remove_words: list = None
+                    ) -> dict:
+        """
+        Merges the frequencies of the words of a date range.
+
+        As in WordCloud.generate, each word is counted under its most common capitalization and the plurals
+        ending in 's' are counted with their singular.
+
+        Parameters:
+        - start_date (str, optional): Start date of the date range (format: 'YYYY-MM-DD').
+        - end_date (str, optional): End date of the date range (format: 'YYYY-MM-DD').
+        - remove_words (list, optional): Words to leave out, in any capitalization.
+
+        Returns:
+        - dict: The number of occurrences of each word, for WordCloud.generate_from_frequencies.
+        """
+
+        first, last = Utils.day_range(start_date, end_date, self.days)
+        rows = slice(self.offsets[first], self.offsets[max(first, last)])
+
+        counts = pd.Series(self.counts[rows], index=self.words[rows]).groupby(level=0, sort=False).sum()
+        lower = counts.index.str.lower()
+
+        if remove_words:
+            kept = ~lower.isin({word.lower() for word in remove_words})
+            counts, lower = counts[kept], lower[kept]
+
+        # Count the plurals with their singular, when the singular was written too
+        singular = lower.str[:-1]
+        plural = lower.str.endswith('s') & ~lower.str.endswith('ss') & singular.isin(set(lower))
+        words = np.where(plural, counts.index.str[:-1], counts.index)
+        lower = np.where(plural, singular, lower)
+
+        # Count every capitalization of a word under the most common one
+        cases = pd.DataFrame({'lower': lower, 'word': words, 'count': counts.to_numpy()})
+        cases = cases.groupby(['lower', 'word'], sort=False)['count'].sum().reset_index()
+        totals = cases.groupby('lower', sort=False)['count'].sum()
+        common = cases.loc[cases.groupby('lower', sort=False)['count'].idxmax()]
+
+        return dict(zip(common['word'], totals[common['lower']].to_numpy()))
@@ -0,0 +1,255 @@
+from collections import Counter
+import pandas as pd
+import numpy as np
+import re
+
+# Words of the messages, once lower-cased. An occurrence of a query made only of word characters is always inside one of them
+WORD = re.compile(r'\w+')
+
+# Length of the n-grams of the words indexed to find the words that contain a query
+NGRAM = 3
+
+
+class WordIndex:
+    def __init__(self, messages: pd.Series, senders: pd.Series):
+        """
+        Initializes a WordIndex instance, an inverted index of the words of a chat: the number of times each
+        sender wrote each word, and the words that contain each n-gram.
+
+        A query made only of word characters (letters, digits and '_') is counted from the words that contain
+        it, without going through the messages. The messages that may contain any other query, e.g. a phrase, are
+        found from the messages of each of its words, see messages_containing.
+
+        Parameters:
+        - messages (pd.Series): Content of the messages.
+        - senders (pd.Series): Sender of each message.
+        """
+
+        sender_codes, self.senders = pd.factorize(senders)
+        self._messages = messages
+        self.message_offsets = self.message_positions = None
+        posting_words, posting_senders, posting_counts = [], [], []
+
+        # Count the words of each sender in a single pass over all of their messages
+        for code, sender_messages in messages.fillna('').astype(str).groupby(sender_codes):
+            counts = Counter(WORD.findall('\n'.join(sender_messages).lower()))
+            posting_words.extend(counts.keys())
+            posting_senders.append(np.full(len(counts), code))
+            posting_counts.append(np.fromiter(counts.values(), dtype=np.int64, count=len(counts)))
+
+        word_codes, words = pd.factorize(np.array(posting_words, dtype=object))
+        self.words = np.asarray(words, dtype=object)
+
+        # Postings of each word, i.e. the senders that wrote it and how many times, sorted by word
+        order = np.argsort(word_codes, kind='stable')
+        self.posting_senders = np.concatenate(posting_senders or [[]]).astype(np.int64)[order]
+        self.posting_counts = np.concatenate(posting_counts or [[]]).astype(np.int64)[order]
+        self.offsets = np.searchsorted(word_codes[order], np.arange(len(self.words) + 1))
+
+        # Words that contain each n-gram
+        ngrams = {}
+        for code, word in enumerate(self.words):
+            for ngram in {word[start:start + NGRAM] for start in range(len(word) - NGRAM + 1)}:
+                ngrams.setdefault(ngram, []).append(code)
+        self.ngrams = {ngram: np.array(codes) for ngram, codes in ngrams.items()}
+
+    @staticmethod
+    def supports(word: str) -> bool:
+        """
+        Whether a query can be answered from the index, i.e. it is made only of word characters.
+        """
+        return WORD.fullmatch(word.lower()) is not None
+
+    def _matching_words(self, word: str, whole_word: bool) -> tuple:
+        """
+        Finds the words that match a query.
+
+        Returns:
+        - tuple: The codes of the matching words, and the number of occurrences of the query in each of them.
+        """
+
+        word = word.lower()
+
+        if whole_word:
+            codes = np.flatnonzero(self.words == word)
+            return codes, np.ones(len(codes), dtype=np.int64)
+
+        if len(word) < NGRAM:
+            candidates = np.arange(len(self.words))
+        else:
+            candidates = None
+            for ngram in {word[start:start + NGRAM] for start in range(len(word) - NGRAM + 1)}:
+                codes = self.ngrams.get(ngram)
+                if codes is None: return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+                candidates = codes if candidates is None else np.intersect1d(candidates, codes, assume_unique=True)
+
+        occurrences = np.fromiter((candidate.count(word) for candidate in self.words[candidates]), dtype=np.int64, count=len(candidates))
+        found = occurrences > 0
+
+        return candidates[found], occurrences[found]
+
+    def _index_messages(self):
+        """
+        Lists the messages of each word, i.e. their positions in the chat, sorted by word. Only built for the first
+        query that isn't made only of word characters.
+        """
+
+        words = self._messages.fillna('').astype(str).str.lower().str.findall(WORD.pattern)
+        words = words.reset_index(drop=True).explode().dropna()
+        word_codes = pd.Index(self.words).get_indexer(words.to_numpy())
+
+        # A word is listed once per message, however many times it's written in it
+        postings = np.unique(word_codes.astype(np.int64) * len(self._messages) + words.index.to_numpy())
+        self.message_positions = postings % max(len(self._messages), 1)
+        self.message_offsets = np.searchsorted(postings // max(len(self._messages), 1), np.arange(len(self.words) + 1))
+
+    def messages_containing(self, query: str, whole_word: bool = False):
+        """
+        Finds the messages that may contain a query, case-insensitively: the ones with all of its words. Each word
+        between two other characters of the query must be a whole word of the message, the words at its ends may
+        also be the end or the start of a longer one, unless whole_word.
+
+        Parameters:
+        - query (str): The query, e.g. a phrase.
+        - whole_word (bool, optional): If True, the query is searched as a whole word.
+
+        Returns:
+        - np.ndarray or None: The sorted positions of the messages in the chat, or None if the query has no words
+          to find them by.
+        """
+
+        query = query.lower()
+        found = None
+
+        for match in WORD.finditer(query):
+            whole = (whole_word or match.start() > 0) and (whole_word or match.end() < len(query))
+            codes, _ = self._matching_words(match.group(), whole)
+
+            if self.message_offsets is None: self._index_messages()
+            starts, ends = self.message_offsets[codes], self.message_offsets[codes + 1]
+            messages = np.unique(np.concatenate([self.message_positions[start:end] for start, end in zip(starts, ends)] or [[]])).astype(np.int64)
+            found = messages if found is None else np.intersect1d(found, messages, assume_unique=True)
+
+        return found
+
+    def count_by_sender(self, word: str, whole_word: bool = False) -> pd.Series:
+        """
+        Counts the occurrences of a query made only of word characters, case-insensitively, for each sender.
+
+        Parameters:
+        - word (str): The query.
+        - whole_word (bool, optional): If True, counts only the words equal to the query, otherwise every
+          occurrence of it, also inside longer words.
+
+        Returns:
+        - pd.Series: The number of occurrences for each sender, indexed by sender.
+        """
+
+        codes, occurrences = self._matching_words(word, whole_word)
+
+        # Gather the postings of all the matching words at once
+        starts, lengths = self.offsets[codes], self.offsets[codes + 1] - self.offsets[codes]
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        totals = np.bincount(self.posting_senders[positions],
+                             weights=self.posting_counts[positions] * np.repeat(occurrences, lengths),
+                             minlength=len(self.senders))
+
+        return pd.Series(totals.astype(np.int64), index=self.senders)
+
+
+def _combine_terms(patterns: dict, flags: int = 0):
+    """
+    Combines the patterns of several terms into one alternation, where the term of each match is told by the name
+    of its group, 't<column>'.
+
+    Returns:
+    - re.Pattern or None: The combined pattern, or None if the patterns can't be combined, e.g. a regular
+      expression with groups of its own, whose backreferences would point to other groups once combined.
+    """
+
+    try:
+        if any(re.compile(pattern, flags).groups for pattern in patterns.values()): return None
+        return re.compile('|'.join(f'(?P<t{column}>{pattern})' for column, pattern in patterns.items()), flags)
+    except re.error:
+        return None
+
+
+def _overlap(term: str, other: str) -> bool:
+    """
+    Whether an occurrence of a literal term may overlap one of another, i.e. one contains the other or ends with
+    the start of the other.
+    """
+    return term in other or other in term or any(term.endswith(other[:size]) or other.endswith(term[:size])
+                                                 for size in range(1, min(len(term), len(other))))
+
+
+def count_terms(messages: pd.Series,
+                senders: pd.Series,
+                terms: list,
+                case_sensitive: bool = False,
+                whole_word: bool = False,
+                regex: bool = False
+                ) -> pd.DataFrame:
+    """
+    Counts the occurrences of several terms in the messages of each sender, going through the messages once.
+
+    The messages of each sender are joined and case-folded once. All the terms made only of word characters are
+    counted from a single pass that counts the words of the text, other substrings with str.count, and the whole
+    words and regular expressions from a single pass of an alternation of them, over the text or, for regular
+    expressions, over each message. Where occurrences of different regular expressions overlap, only the first one
+    is counted, for the first of them in terms. Whole words that may overlap another are counted on their own instead.
+
+    Parameters:
+    - messages (pd.Series): Content of the messages.
+    - senders (pd.Series): Sender of each message.
+    - terms (list): Terms to count.
+    - case_sensitive (bool, optional): If False, the terms are counted case-insensitively.
+    - whole_word (bool, optional): If True, counts only whole words, otherwise also the occurrences inside longer words.
+    - regex (bool, optional): If True, the terms are regular expressions (whole_word is ignored).
+
+    Returns:
+    - pd.DataFrame: The number of occurrences of each term (columns, in the order of terms) for each sender (index).
+    """
+
+    sender_codes, names = pd.factorize(senders)
+    counts = np.zeros((len(names), len(terms)), dtype=np.int64)
+    folded = [term if case_sensitive or regex else term.lower() for term in terms]
+    word_terms = {column for column, term in enumerate(folded) if not regex and WORD.fullmatch(term)}
+
+    # Whole words and regular expressions are matched all at once, but for the whole words that may overlap another.
+    # Plain substrings are found faster by str.count, one at a time
+    flags = 0 if case_sensitive or not regex else re.IGNORECASE
+    substrings = set() if regex or whole_word else set(range(len(terms))) - word_terms
+    other_terms = [column for column in range(len(terms)) if column not in word_terms | substrings]
+    alone = set() if regex else {column for column in other_terms
+                                 if any(_overlap(folded[column], folded[other]) for other in other_terms if other != column)}
+    patterns = {column: folded[column] if regex else rf'(?<!\w){re.escape(folded[column])}(?!\w)' for column in other_terms}
+    pattern = _combine_terms({column: patterns[column] for column in other_terms if column not in alone}, flags)
+    if pattern is None: alone = set(other_terms)
+
+    for code, sender_messages in messages.fillna('').astype(str).groupby(sender_codes):
+        # Regular expressions are matched message by message, e.g. so that '^' matches at the start of each one
+        if regex:
+            texts = sender_messages.tolist()
+        else:
+            # Joined with a character no term contains, so that no occurrence spans two messages
+            text = '\x00'.join(sender_messages)
+            if not case_sensitive: text = text.lower()
+            texts = [text]
+
+        words = Counter(WORD.findall(texts[0])) if word_terms else None
+        for column in word_terms:
+            term = folded[column]
+            counts[code, column] = words[term] if whole_word else sum(count * word.count(term) for word, count in words.items() if term in word)
+
+        if len(alone) < len(other_terms):
+            found = Counter(match.lastgroup for text in texts for match in pattern.finditer(text))
+            for group, count in found.items(): counts[code, int(group[1:])] = count
+
+        for column in alone:
+            counts[code, column] = sum(len(re.findall(patterns[column], text, flags)) for text in texts)
+
+        for column in substrings:
+            counts[code, column] = texts[0].count(folded[column])
+
+    return pd.DataFrame(counts, index=names, columns=list(terms))